@@ -1,19 +1,40 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
+import json
 import requests
 import logging
 from datetime import datetime
 import os
+import sqlite3
+import sys
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# The meeting classifier is shared with the module2 uploaders
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'module2'))
+from meeting_classifier import classify_meeting, to_workflow_classification
+from transcript_prep import prepare_transcript
+from progress_events import format_event, result_events, stream_webhook
+from meeting_index import MeetingIndex
+from telemetry import CORRELATION_HEADER, configure_logging, instrument
+
+# Configure logging; every line carries the request's correlation id
+configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# Request metrics at /metrics and a correlation id per request
+metrics = instrument(app)
+# Local search index of analysed meetings, shared with the Streamlit uploader (MEETING_INDEX_PATH)
+meeting_index = MeetingIndex()
 
 # Configuration
 N8N_WEBHOOK_URL = os.getenv('N8N_WEBHOOK_URL', 'https://your-n8n-instance.com/webhook/meeting-intelligence-webhook')
+# Seconds the streaming endpoint waits for n8n to send anything; its clients get "waiting" events meanwhile
+STREAM_TIMEOUT = int(os.getenv('N8N_STREAM_TIMEOUT', '300'))
+# Meeting types the workflow routes; others are still sent on but share one metrics label
+MEETING_TYPES = ['standup', 'strategy', 'client', 'general']
+# Stages the API reports itself; the workflow's own versions of these are not relayed
+API_STAGES = ('queued', 'preparing', 'classifying', 'done')
 
 @dataclass
 class MeetingRequest:
@@ -21,32 +42,94 @@ class MeetingRequest:
     meeting_type: str
     meeting_notes: str
     attendees: str
+    classification: Optional[Dict[str, Any]] = None
+    preparation: Optional[Dict[str, Any]] = None
+    correlation_id: Optional[str] = None
     
     def validate(self) -> tuple[bool, Optional[str]]:
         """Validate the meeting request"""
-        if not self.meeting_type or not self.meeting_type.strip():
-            return False, "Meeting type is required"
-        
         if not self.meeting_notes or not self.meeting_notes.strip():
             return False, "Meeting notes are required"
         
         if len(self.meeting_notes.strip()) < 20:
             return False, "Meeting notes too short"
         
-        valid_types = ['standup', 'strategy', 'client', 'general']
-        if self.meeting_type.lower() not in valid_types:
+        valid_types = MEETING_TYPES + ['auto']
+        if self.meeting_type and self.meeting_type.strip().lower() not in valid_types:
             return False, f"Meeting type must be one of: {', '.join(valid_types)}"
         
         return True, None
     
+    def prepare(self) -> None:
+        """Clean the notes and split long ones into overlapping chunks for map-reduce analysis"""
+        self.preparation = prepare_transcript(self.meeting_notes)
+        self.meeting_notes = self.preparation['transcript'] or self.meeting_notes
+    
+    def classify(self) -> None:
+        """Classify the notes locally, so n8n can route without its classifier node"""
+        prediction = classify_meeting(self.meeting_notes)
+        self.classification = to_workflow_classification(prediction)
+        meeting_type = (self.meeting_type or '').strip().lower()
+        if not meeting_type or meeting_type == 'auto':
+            self.meeting_type = prediction['predicted_type']
+        else:
+            # A type chosen by the caller wins over the prediction
+            self.meeting_type = meeting_type
+            self.classification.update(detectedType=meeting_type, confidence=1.0, reasoning='Chosen by the caller')
+    
     def to_webhook_payload(self) -> Dict[str, Any]:
         """Convert to n8n webhook payload format"""
         return {
-            'meetingType': self.meeting_type.lower(),
+            'meetingType': self.meeting_type.strip().lower(),
             'meetingNotes': self.meeting_notes.strip(),
-            'attendees': self.attendees.strip() if self.attendees else 'Not specified'
+            'attendees': self.attendees.strip() if self.attendees else 'Not specified',
+            'classification': self.classification,
+            'originalTokens': self.preparation['originalTokens'] if self.preparation else None,
+            'transcriptTokens': self.preparation['transcriptTokens'] if self.preparation else None,
+            'chunks': self.preparation['chunks'] if self.preparation else [],
+            'correlationId': self.correlation_id
         }
 
+def meeting_request_from(data: Dict[str, Any]) -> MeetingRequest:
+    return MeetingRequest(
+        meeting_type=data.get('meeting_type', ''),
+        meeting_notes=data.get('meeting_notes', ''),
+        attendees=data.get('attendees', ''),
+        correlation_id=g.correlation_id
+    )
+
+def metrics_meeting_type(payload: Dict[str, Any]) -> str:
+    """Meeting type label for the metrics; types outside MEETING_TYPES share "other", so the series stay bounded"""
+    return payload['meetingType'] if payload['meetingType'] in MEETING_TYPES else 'other'
+
+def webhook_request(payload: Dict[str, Any]) -> tuple[str, Dict[str, str]]:
+    """JSON body and headers for n8n; the body is encoded once, so its size is known for the metrics"""
+    return json.dumps(payload), {'Content-Type': 'application/json', CORRELATION_HEADER: payload['correlationId']}
+
+def analysis_result(meeting_request: MeetingRequest, payload: Dict[str, Any], webhook_response: str) -> Dict[str, Any]:
+    """Response body for an analysis n8n accepted"""
+    return {
+        'success': True,
+        'message': 'Meeting analysis started',
+        'meeting_type': payload['meetingType'],
+        'classification': meeting_request.classification,
+        'original_tokens': payload['originalTokens'],
+        'transcript_tokens': payload['transcriptTokens'],
+        'chunk_count': len(payload['chunks']),
+        'correlation_id': payload['correlationId'],
+        'webhook_response': webhook_response
+    }
+
+def index_meeting(meeting_request: MeetingRequest, payload: Dict[str, Any], response_body: Any,
+                  streamed_results=()) -> None:
+    """Add an analysed meeting to the search index; the analysis still succeeds if this fails"""
+    try:
+        meeting_index.add_meeting(payload['correlationId'], response_body, streamed_results,
+                                  transcript=meeting_request.meeting_notes, attendees=payload['attendees'],
+                                  meeting_type=payload['meetingType'])
+    except sqlite3.Error as e:
+        logger.warning("Could not index the meeting: %s", e)
+
 @app.route('/health', methods=['GET'])
 def health():
     """Simple health check"""
@@ -62,29 +145,29 @@ def analyse_meeting():
             return jsonify({'error': 'JSON payload required'}), 400
         
         # Create meeting request
-        meeting_request = MeetingRequest(
-            meeting_type=data.get('meeting_type', ''),
-            meeting_notes=data.get('meeting_notes', ''),
-            attendees=data.get('attendees', '')
-        )
+        meeting_request = meeting_request_from(data)
         
         # Validate
         is_valid, error_message = meeting_request.validate()
         if not is_valid:
             return jsonify({'error': error_message}), 400
         
+        meeting_request.prepare()
+        meeting_request.classify()
+        
         # Send to n8n webhook
         payload = meeting_request.to_webhook_payload()
-        logger.info(f"Sending {meeting_request.meeting_type} meeting to n8n")
+        g.meeting_type = metrics_meeting_type(payload)
+        logger.info("Sending %s meeting to n8n", meeting_request.meeting_type)
         
-        response = requests.post(N8N_WEBHOOK_URL, json=payload, timeout=30)
+        body, headers = webhook_request(payload)
+        with metrics.webhook_call(g.meeting_type, len(body)) as call:
+            response = requests.post(N8N_WEBHOOK_URL, data=body, headers=headers, timeout=30)
+            call['outcome'] = str(response.status_code)
         
         if response.status_code == 200:
-            return jsonify({
-                'success': True,
-                'message': 'Meeting analysis started',
-                'webhook_response': response.text
-            })
+            index_meeting(meeting_request, payload, response.text)
+            return jsonify(analysis_result(meeting_request, payload, response.text))
         else:
             return jsonify({
                 'success': False,
@@ -93,17 +176,110 @@ def analyse_meeting():
             }), 400
             
     except requests.RequestException as e:
-        logger.error(f"Request error: {e}")
+        logger.error("Request error: %s", e)
         return jsonify({'error': 'Failed to reach n8n webhook'}), 502
     except Exception as e:
-        logger.error(f"Error: {e}")
+        logger.error("Error: %s", e)
         return jsonify({'error': 'Something went wrong'}), 500
 
+@app.route('/meeting/analyse/stream', methods=['POST'])
+def analyse_meeting_stream():
+    """Analyse meeting notes, reporting progress as server-sent events until n8n answers"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'JSON payload required'}), 400
+    
+    meeting_request = meeting_request_from(data)
+    is_valid, error_message = meeting_request.validate()
+    if not is_valid:
+        return jsonify({'error': error_message}), 400
+    
+    return Response(stream_with_context(analysis_events(meeting_request)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def analysis_events(meeting_request: MeetingRequest) -> Iterator[str]:
+    """Stage events, partial results and finally a "response" event with what /meeting/analyse returns"""
+    yield format_event('stage', {'stage': 'queued'})
+    try:
+        yield format_event('stage', {'stage': 'preparing'})
+        meeting_request.prepare()
+        yield format_event('stage', {'stage': 'classifying'})
+        meeting_request.classify()
+        yield format_event('classification', meeting_request.classification)
+        
+        payload = meeting_request.to_webhook_payload()
+        g.meeting_type = metrics_meeting_type(payload)
+        logger.info("Streaming %s meeting to n8n", meeting_request.meeting_type)
+        yield format_event('stage', {'stage': 'analysing', 'chunk_count': len(payload['chunks'])})
+        # Webhooks that stream (e.g. workflow_simulator.py) report their own stages and results as they go
+        partial_results = False
+        streamed_results = []
+        body, headers = webhook_request(payload)
+        with metrics.webhook_call(g.meeting_type, len(body)) as call:
+            for event, data in stream_webhook(N8N_WEBHOOK_URL, data=body, headers=headers, timeout=STREAM_TIMEOUT):
+                if event == 'response':
+                    call['outcome'] = str(data['status_code'])
+                    break
+                if event == 'stage' and data.get('stage') in API_STAGES:
+                    continue
+                if event in ('action_item', 'summary'):
+                    partial_results = True
+                    streamed_results.append((event, data))
+                yield format_event(event, data)
+        
+        status_code, body = data['status_code'], data['body']
+        webhook_response = body if isinstance(body, str) else json.dumps(body)
+        if status_code != 200:
+            yield format_event('response', {'status_code': 400, 'body': {
+                'success': False,
+                'error': f'Webhook failed with status {status_code}',
+                'details': webhook_response
+            }})
+            return
+        if not partial_results:
+            for event, data in result_events(body):
+                yield format_event(event, data)
+        index_meeting(meeting_request, payload, body, streamed_results)
+        yield format_event('stage', {'stage': 'done'})
+        yield format_event('response', {'status_code': 200,
+                                        'body': analysis_result(meeting_request, payload, webhook_response)})
+    
+    except requests.RequestException as e:
+        logger.error("Request error: %s", e)
+        yield format_event('response', {'status_code': 502, 'body': {'error': 'Failed to reach n8n webhook'}})
+    except Exception as e:
+        logger.error("Error: %s", e)
+        yield format_event('response', {'status_code': 500, 'body': {'error': 'Something went wrong'}})
+
+@app.route('/meetings/search', methods=['GET'])
+def search_meetings():
+    """Search analysed meetings and their action items by keyword, owner, meeting type and date"""
+    for name in ('from', 'to'):
+        value = request.args.get(name)
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({'error': f"'{name}' must be a date in YYYY-MM-DD format"}), 400
+    
+    limit = request.args.get('limit', '20')
+    if not limit.isdigit():
+        return jsonify({'error': "'limit' must be a positive number"}), 400
+    
+    results = meeting_index.search(request.args.get('q'), owner=request.args.get('owner'),
+                                   meeting_type=request.args.get('type'), date_from=request.args.get('from'),
+                                   date_to=request.args.get('to'), limit=int(limit))
+    return jsonify(results)
+
 @app.route('/meeting/types', methods=['GET'])
 def get_meeting_types():
     """Get supported meeting types"""
     return jsonify({
-        'types': ['standup', 'strategy', 'client', 'general'],
+        'types': MEETING_TYPES,
+        'auto_classification': 'Leave out meeting_type (or send "auto") to detect it from the notes',
+        'streaming': 'POST the same payload to /meeting/analyse/stream for server-sent progress events',
+        'tracing': f'Send an {CORRELATION_HEADER} header to choose the correlation id passed on to n8n',
+        'search': 'GET /meetings/search?q=budget&owner=alice&type=strategy&from=2025-01-01&to=2025-12-31',
         'example_payload': {
             'meeting_type': 'standup',
             'meeting_notes': 'Your meeting notes here...',
@@ -0,0 +1,97 @@
+"""
+Measures what the API's metrics and correlation ids add to each request.
+
+Times the metric primitives on their own (single threaded and contended), the
+/metrics export, and a minimal Flask route with and without instrument(). Run
+from the Module1 directory:
+
+    python -m benchmarks.telemetry_overhead --requests 20000 --threads 8
+"""
+import argparse
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+from telemetry import ApiMetrics, instrument
+
+MEETING_TYPES = ['standup', 'strategy', 'client', 'general']
+
+
+def per_call_ns(function, calls: int, threads: int = 1) -> float:
+    """Wall time per call in nanoseconds, with the calls shared across threads"""
+    def work():
+        for index in range(calls // threads):
+            function(index)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) * 1e9 / calls
+
+
+def make_app(instrumented: bool) -> Flask:
+    app = Flask(__name__)
+    if instrumented:
+        instrument(app)
+
+    # Reads its JSON body like the meeting routes, so request parsing is not counted as overhead
+    @app.route('/ping', methods=['POST'])
+    def ping():
+        return jsonify({'received': len(request.get_json()['meeting_notes'])})
+
+    return app
+
+
+def per_request_us(app: Flask, requests: int) -> float:
+    client = app.test_client()
+    start = time.perf_counter()
+    for _ in range(requests):
+        # Closing the response is what a WSGI server does; it records the request's metrics
+        client.post('/ping', json={'meeting_notes': 'x' * 200}).close()
+    return (time.perf_counter() - start) * 1e6 / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=1_000_000, help='metric updates per primitive')
+    parser.add_argument('--requests', type=int, default=10_000, help='requests per Flask app')
+    parser.add_argument('--threads', type=int, default=8, help='threads for the contended runs')
+    parser.add_argument('--rounds', type=int, default=5, help='alternating rounds per app; the fastest counts')
+    args = parser.parse_args()
+
+    metrics = ApiMetrics()
+    primitives = {
+        'baseline (empty call)': lambda index: None,
+        'counter.labels().inc()': lambda index: metrics.requests.labels('POST', '/meeting/analyse', '200').inc(),
+        'histogram.labels().observe()': lambda index: metrics.request_duration.labels(
+            'POST', '/meeting/analyse', MEETING_TYPES[index & 3]).observe(index % 500 / 100),
+        'gauge inc + dec': lambda index: (metrics.in_flight.labels('/meeting/analyse').inc(),
+                                          metrics.in_flight.labels('/meeting/analyse').dec()),
+    }
+    print(f"{'primitive':<32} {'1 thread':>10} {f'{args.threads} threads':>11}")
+    for name, function in primitives.items():
+        print(f"{name:<32} {per_call_ns(function, args.calls):>8.0f}ns "
+              f"{per_call_ns(function, args.calls, args.threads):>9.0f}ns")
+
+    start = time.perf_counter()
+    exposition = metrics.registry.exposition()
+    print(f"\n/metrics export: {len(exposition.splitlines())} lines in {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    plain, instrumented = make_app(False), make_app(True)
+    # Warm both up so imports and first-request set-up are not timed
+    per_request_us(plain, 100)
+    per_request_us(instrumented, 100)
+    # Alternate the apps and keep each one's fastest round, so background noise hits both alike
+    rounds = [(per_request_us(plain, args.requests), per_request_us(instrumented, args.requests))
+              for _ in range(args.rounds)]
+    plain_us, instrumented_us = min(plain for plain, _ in rounds), min(timed for _, timed in rounds)
+    print(f"\nFlask request without telemetry {plain_us:.1f}us, with {instrumented_us:.1f}us: "
+          f"+{instrumented_us - plain_us:.1f}us ({(instrumented_us - plain_us) / plain_us:.1%}) per request")
+
+
+if __name__ == '__main__':
+    main()
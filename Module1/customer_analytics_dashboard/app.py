@@ -1,7 +1,9 @@
+from datetime import timedelta
+
 import streamlit as st
-from modules import data_processing, analytics, visualizations
-import pandas as pd
-import plotly.express as px
+# Heavy libraries (plotly, lifetimes) are imported by the pages that use them; see modules/warmup.py
+from modules import data_processing, analytics, visualizations, sql_backend, rollups, parallel, profiling, time_index, warmup
+from modules import report_bundle
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -17,30 +19,142 @@ This dashboard provides insights into customer behavior and sales performance
 for an e-commerce business. Use the sidebar to navigate through different analyses.
 """)
 
+# --- Table Pagination ---
+# Large tables are sent to the browser one page at a time, capped by rows and estimated bytes
+MAX_TABLE_ROWS = 500
+MAX_TABLE_BYTES = 500_000
+
+def show_paginated_dataframe(data, key):
+    """
+    Renders a single page of a DataFrame with a page selector.
+    """
+    sample = data.head(100)
+    bytes_per_row = max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)
+    page_size = max(1, min(MAX_TABLE_ROWS, int(MAX_TABLE_BYTES // bytes_per_row)))
+    total_pages = max(1, -(-len(data) // page_size))
+
+    page = 1
+    if total_pages > 1:
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, key=key)
+    start = (page - 1) * page_size
+    st.dataframe(data.iloc[start:start + page_size])
+    if total_pages > 1:
+        st.caption(f"Showing rows {start + 1:,}-{min(start + page_size, len(data)):,} of {len(data):,}")
+
 # --- Sidebar ---
 st.sidebar.title("Navigation")
 analysis_choice = st.sidebar.radio("Go to", ["Home", "Customer Segmentation (RFM)", "Customer Lifetime Value", "Sales Performance"])
 
+st.sidebar.header("Data Backend")
+use_sql_backend = st.sidebar.checkbox(
+    "Use embedded SQL backend",
+    help="Keep transactions in a local SQLite database and compute each chart's aggregation in SQL"
+)
+show_profiling = st.sidebar.checkbox(
+    "Show profiling panel",
+    help="Times every data, analytics and chart function called while rendering this page"
+)
+profiling.start_run(show_profiling)
+
 # --- Data Loading and Caching ---
 DATA_PATH = "data/sample_ecommerce_data.csv"
-df = data_processing.load_data(DATA_PATH)
-df_processed = data_processing.preprocess_data(df.copy() if df is not None else None)
+DB_PATH = "data/sample_ecommerce_data.db"
+INCOMING_DIR = "data/incoming"
+# Written by `python -m modules.report_bundle` after each data refresh
+BUNDLE_DIR = report_bundle.BUNDLE_DIR
+
+def load_transactions():
+    """
+    Returns the preprocessed transactions, sorted by date once per data version so reruns only slice them.
+    """
+    return time_index.load_time_index(DATA_PATH, data_version)
+
+bundle = None
+if use_sql_backend:
+    # The store exposes the same functions to the analytics and visualization modules
+    df_processed = sql_backend.build_store(DATA_PATH, DB_PATH)
+    # New invoice batches dropped into data/incoming are appended without rebuilding the store
+    new_transactions = sql_backend.ingest_new_batches(df_processed, INCOMING_DIR)
+    if new_transactions:
+        st.sidebar.success(f"Ingested {new_transactions:,} new transactions")
+    data_version = df_processed.data_version() if df_processed is not None else None
+else:
+    data_version = data_processing.get_data_version(DATA_PATH)
+    # A bundle built from this version of the CSV already holds every page's results,
+    # so the transactions are only loaded when a page needs more than it has
+    bundle = report_bundle.load_bundle(BUNDLE_DIR, data_version)
+    sorted_transactions = load_transactions() if bundle is None else None
+    df_processed = sorted_transactions.df if sorted_transactions is not None else None
+
+# --- Date Range ---
+# Pages analyse the transactions in this window; the full range keeps the precomputed aggregates
+df_window, window = df_processed, None
+snapshot_date = observation_end = None
+date_bounds = None
+if bundle is not None:
+    date_bounds = bundle.date_bounds()
+elif df_processed is not None:
+    date_bounds = df_processed.date_bounds() if use_sql_backend else sorted_transactions.date_bounds()
+if date_bounds is not None:
+    first_day, last_day = date_bounds
+    st.sidebar.header("Date Range")
+    selected_days = st.sidebar.date_input("Transactions between", value=date_bounds,
+                                          min_value=first_day, max_value=last_day)
+    if len(selected_days) == 2:
+        start_day, end_day = selected_days
+    else:
+        # Only the start has been picked so far
+        start_day, end_day = (selected_days[0] if selected_days else first_day), last_day
+
+    if (start_day, end_day) != date_bounds:
+        window = time_index.window_bounds(start_day, end_day)
+        if bundle is not None:
+            # The bundle covers the full range only
+            bundle, sorted_transactions = None, load_transactions()
+            df_processed = sorted_transactions.df
+        if use_sql_backend:
+            df_window = df_processed.transactions_between(*window)
+        else:
+            # A binary search on the sorted transactions, not a mask over every row
+            df_window = sorted_transactions.window(*window)
+        # Recency and the CLV models' observation period end with the window, not the data
+        snapshot_date, observation_end = window[1], window[1] - timedelta(days=1)
+        st.sidebar.caption(f"{len(df_window):,} transactions from {start_day:%d %b %Y} to {end_day:%d %b %Y}")
+        if df_window.empty:
+            st.sidebar.warning("No transactions in the selected dates.")
+            df_window = None
+
+if bundle is not None:
+    st.sidebar.caption(f"Showing the report built {bundle.manifest['built_at'].replace('T', ' ')}")
 
 # --- Home Page ---
 if analysis_choice == "Home":
     st.header("Business Overview")
-    if df_processed is not None:
-        total_revenue = df_processed['TotalPrice'].sum()
-        total_customers = df_processed['CustomerID'].nunique()
-        total_orders = df_processed['InvoiceNo'].nunique()
+    if bundle is not None:
+        total_revenue = bundle.summary['total_revenue']
+        total_customers = bundle.summary['total_customers']
+        total_orders = bundle.summary['total_orders']
+        preview = bundle.table('preview')
+    elif df_window is not None:
+        preview = df_window.head()
+        if use_sql_backend and window is None:
+            metrics = df_processed.summary_metrics()
+            total_revenue = metrics['total_revenue']
+            total_customers = metrics['total_customers']
+            total_orders = metrics['total_orders']
+        else:
+            total_revenue = df_window['TotalPrice'].sum()
+            total_customers = df_window['CustomerID'].nunique()
+            total_orders = df_window['InvoiceNo'].nunique()
 
+    if bundle is not None or df_window is not None:
         col1, col2, col3 = st.columns(3)
         col1.metric("Total Revenue", f"${total_revenue:,.2f}")
         col2.metric("Total Unique Customers", f"{total_customers:,}")
         col3.metric("Total Orders", f"{total_orders:,}")
 
         st.subheader("Data Preview")
-        st.dataframe(df_processed.head())
+        st.dataframe(preview)
     else:
         st.warning("Could not load or process data. Please check the data file.")
 
@@ -48,21 +162,32 @@ if analysis_choice == "Home":
 elif analysis_choice == "Customer Segmentation (RFM)":
     st.header("Customer Segmentation using RFM Analysis")
 
-    if df_processed is not None:
-        rfm_data = analytics.calculate_rfm(df_processed)
-        rfm_segmented = analytics.segment_customers(rfm_data)
+    if bundle is not None or df_window is not None:
+        if bundle is not None:
+            rfm_segmented = bundle.table('rfm_segmented')
+        else:
+            rfm_data = analytics.calculate_rfm(df_window, snapshot_date=snapshot_date)
+            rfm_segmented = analytics.segment_customers(rfm_data)
 
         st.subheader("RFM Segmentation Plot")
-        fig_rfm = visualizations.create_rfm_scatter(rfm_segmented)
+        plot_modes = {"Auto": "auto", "All points": "points", "Sampled": "sample", "Binned": "binned"}
+        if len(rfm_segmented) > visualizations.MAX_SCATTER_POINTS:
+            # Every customer as a marker would make the browser payload unbounded
+            del plot_modes["All points"]
+        plot_mode = st.radio("Rendering mode", list(plot_modes), horizontal=True,
+                             help=f"Auto draws every customer up to {visualizations.MAX_SCATTER_POINTS:,} and bins beyond that")
+        fig_rfm = bundle.figure('rfm_scatter') if bundle is not None and plot_mode == "Auto" else None
+        if fig_rfm is None:
+            fig_rfm = visualizations.create_rfm_scatter(rfm_segmented, mode=plot_modes[plot_mode])
         st.plotly_chart(fig_rfm, use_container_width=True)
 
         st.subheader("Customer Segments")
-        st.dataframe(rfm_segmented)
+        show_paginated_dataframe(rfm_segmented, key="rfm_all_page")
 
         st.sidebar.header("Filter by Segment")
         selected_segment = st.sidebar.selectbox("Choose a customer segment", rfm_segmented['Customer_Segment'].unique())
         st.subheader(f"Customers in '{selected_segment}' Segment")
-        st.dataframe(rfm_segmented[rfm_segmented['Customer_Segment'] == selected_segment])
+        show_paginated_dataframe(rfm_segmented[rfm_segmented['Customer_Segment'] == selected_segment], key=f"rfm_segment_page_{selected_segment}")
 
     else:
         st.warning("Data not available for RFM analysis.")
@@ -72,9 +197,23 @@ elif analysis_choice == "Customer Segmentation (RFM)":
 elif analysis_choice == "Sales Performance":
     st.header("Sales Performance Metrics")
 
-    if df_processed is not None:
+    if bundle is not None or df_window is not None:
+        # Month x country x product totals, built once per data version and shared by all three charts
+        if bundle is not None:
+            sales_rollup = bundle.sales_rollup()
+        elif window is None:
+            sales_rollup = rollups.load_sales_rollup(df_processed, (use_sql_backend, data_version))
+        elif use_sql_backend:
+            sales_rollup = rollups.SalesRollup.from_transactions(df_window)
+        else:
+            # Whole months come from the full rollup; only the window's edge months are aggregated
+            full_rollup = rollups.load_sales_rollup(df_processed, (use_sql_backend, data_version))
+            sales_rollup = rollups.window_rollup(full_rollup, sorted_transactions, *window)
+
         st.subheader("Monthly Sales Revenue Trend")
-        fig_sales_trend = visualizations.create_sales_trend(df_processed)
+        fig_sales_trend = bundle.figure('sales_trend') if bundle is not None else None
+        if fig_sales_trend is None:
+            fig_sales_trend = visualizations.create_sales_trend(sales_rollup)
         st.plotly_chart(fig_sales_trend, use_container_width=True)
 
         col1, col2 = st.columns(2)
@@ -82,12 +221,17 @@ elif analysis_choice == "Sales Performance":
         with col1:
             st.subheader("Top Selling Products")
             top_n_products = st.slider("Select number of top products", 5, 20, 10)
-            fig_top_products = visualizations.create_top_products_bar(df_processed, top_n=top_n_products)
+            # The bundle's chart is drawn for the default of 10
+            fig_top_products = bundle.figure('top_products') if bundle is not None and top_n_products == 10 else None
+            if fig_top_products is None:
+                fig_top_products = visualizations.create_top_products_bar(sales_rollup, top_n=top_n_products)
             st.plotly_chart(fig_top_products, use_container_width=True)
 
         with col2:
             st.subheader("Sales by Country")
-            fig_country_map = visualizations.create_country_map(df_processed)
+            fig_country_map = bundle.figure('country_map') if bundle is not None else None
+            if fig_country_map is None:
+                fig_country_map = visualizations.create_country_map(sales_rollup)
             st.plotly_chart(fig_country_map, use_container_width=True)
     else:
         st.warning("Data not available for sales performance analysis.")
@@ -96,12 +240,34 @@ elif analysis_choice == "Sales Performance":
 elif analysis_choice == "Customer Lifetime Value":
     st.header("Customer Lifetime Value Analysis")
 
-    if df_processed is not None:
-        # Traditional CLV
-        traditional_clv = analytics.calculate_clv(df_processed)
-        
-        # Predictive CLV
-        predictive_clv = analytics.calculate_predictive_clv(df_processed)
+    if bundle is not None or df_window is not None:
+        per_country = st.sidebar.checkbox(
+            "Fit predictive CLV per country",
+            disabled=use_sql_backend,
+            help="Fits one BG/NBD and Gamma-Gamma model per country, in parallel worker processes"
+        )
+
+        if per_country and bundle is not None:
+            # The bundle holds the models fitted on all customers; fitting per country needs the transactions
+            bundle, sorted_transactions = None, load_transactions()
+            df_window = df_processed = sorted_transactions.df
+
+        if bundle is not None:
+            traditional_clv = bundle.table('clv')
+            predictive_clv = bundle.table('predictive_clv')
+        elif per_country and not use_sql_backend:
+            country_analytics = parallel.parallel_customer_analytics(
+                df_window, partition_by='Country', predictive='per_partition',
+                snapshot_date=snapshot_date, observation_end=observation_end
+            )
+            traditional_clv = country_analytics['clv']
+            predictive_clv = country_analytics['predictive_clv']
+        else:
+            # Traditional CLV
+            traditional_clv = analytics.calculate_clv(df_window)
+
+            # Predictive CLV
+            predictive_clv = analytics.calculate_predictive_clv(df_window, observation_period_end=observation_end)
         
         tab1, tab2 = st.tabs(["Traditional CLV", "Predictive CLV"])
         
@@ -138,13 +304,23 @@ elif analysis_choice == "Customer Lifetime Value":
                 
                 # Distribution plot of predicted CLV
                 st.subheader("Distribution of Predicted CLV")
-                fig = px.histogram(predictive_clv, 
-                                x='predicted_clv',
-                                title='Distribution of Predicted Customer Lifetime Value',
-                                labels={'predicted_clv': 'Predicted CLV ($)'},
-                                nbins=50)
+                fig = bundle.figure('predictive_clv_histogram') if bundle is not None else None
+                if fig is None:
+                    fig = visualizations.create_predictive_clv_histogram(predictive_clv)
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.warning("Could not calculate predictive CLV. This usually happens when there are not enough repeat purchases in the data.")
     else:
         st.warning("Data not available for CLV analysis.")
+
+# --- Profiling Panel ---
+if show_profiling:
+    timings, total_seconds = profiling.run_report()
+    with st.sidebar.expander("⏱️ Rerun Profile", expanded=True):
+        st.metric("Script run time", f"{total_seconds * 1000:,.0f} ms")
+        st.caption("Nested calls are already included in their caller's time.")
+        st.dataframe(timings.style.format({'Seconds': '{:.4f}'}), hide_index=True)
+
+# --- Background Pre-warm ---
+# The page has been sent; import the chart and model libraries now so other pages open quickly
+warmup.prewarm()
@@ -0,0 +1,129 @@
+"""
+Headless benchmark of the dashboard's data, analytics and chart functions.
+
+Runs every function a page calls over synthetic datasets of growing size and
+records wall time and peak traced memory per function and per page. Run from
+the dashboard directory:
+
+    python -m benchmarks.dashboard_benchmark --sizes 10000,100000,1000000,10000000 --output results.csv
+"""
+import argparse
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_transactions
+from modules import analytics, data_processing, rollups, visualizations
+
+# Pages as app.py renders them on a cold cache: the data is preprocessed first
+PAGES = {
+    'Home': ['preprocess_data', 'home_metrics'],
+    'Customer Segmentation (RFM)': ['preprocess_data', 'calculate_rfm', 'segment_customers', 'create_rfm_scatter'],
+    'Customer Lifetime Value': ['preprocess_data', 'calculate_clv', 'calculate_predictive_clv'],
+    'Sales Performance': ['preprocess_data', 'build_sales_rollup', 'create_sales_trend (rollup)',
+                          'create_top_products_bar (rollup)', 'create_country_map (rollup)']
+}
+
+
+def _home_metrics(df):
+    return df['TotalPrice'].sum(), df['CustomerID'].nunique(), df['InvoiceNo'].nunique()
+
+
+def _chart(create, *args, **kwargs):
+    # Streamlit serialises every figure to JSON before sending it to the browser
+    return create(*args, **kwargs).to_json()
+
+
+def build_steps(raw):
+    """
+    Returns (name, callable) pairs; each callable receives the results of earlier steps.
+    """
+    return [
+        ('preprocess_data', lambda r: data_processing.preprocess_data(raw.copy())),
+        ('home_metrics', lambda r: _home_metrics(r['preprocess_data'])),
+        ('calculate_rfm', lambda r: analytics.calculate_rfm(r['preprocess_data'])),
+        ('segment_customers', lambda r: analytics.segment_customers(r['calculate_rfm'])),
+        ('create_rfm_scatter', lambda r: _chart(visualizations.create_rfm_scatter, r['segment_customers'])),
+        ('calculate_clv', lambda r: analytics.calculate_clv(r['preprocess_data'])),
+        ('calculate_predictive_clv', lambda r: analytics.calculate_predictive_clv(r['preprocess_data'])),
+        ('create_sales_trend', lambda r: _chart(visualizations.create_sales_trend, r['preprocess_data'])),
+        ('create_top_products_bar', lambda r: _chart(visualizations.create_top_products_bar, r['preprocess_data'])),
+        ('create_country_map', lambda r: _chart(visualizations.create_country_map, r['preprocess_data'])),
+        ('build_sales_rollup', lambda r: rollups.SalesRollup.from_transactions(r['preprocess_data'])),
+        ('create_sales_trend (rollup)',
+         lambda r: _chart(visualizations.create_sales_trend, r['build_sales_rollup'])),
+        ('create_top_products_bar (rollup)',
+         lambda r: _chart(visualizations.create_top_products_bar, r['build_sales_rollup'])),
+        ('create_country_map (rollup)',
+         lambda r: _chart(visualizations.create_country_map, r['build_sales_rollup'])),
+    ]
+
+
+def run_size(rows, track_memory=True, skip=()):
+    """
+    Benchmarks every step for one dataset size and returns one record per step.
+    """
+    raw = generate_transactions(rows)
+    results, records = {}, []
+    for name, step in build_steps(raw):
+        if name in skip:
+            continue
+        if track_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        results[name] = step(results)
+        elapsed = time.perf_counter() - start
+        peak_mb = None
+        if track_memory:
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            tracemalloc.stop()
+        records.append({'rows': rows, 'function': name, 'seconds': elapsed, 'peak_mb': peak_mb})
+        print(f"{rows:>12,} {name:<34} {elapsed:9.3f}s" + (f" {peak_mb:10.1f} MB" if track_memory else ''))
+    return records
+
+
+def page_summary(functions):
+    """
+    Aggregates per-function records into per-page time (sum) and peak memory (max).
+    """
+    pages = []
+    for page, steps in PAGES.items():
+        page_functions = functions[functions['function'].isin(steps)]
+        summary = page_functions.groupby('rows').agg(seconds=('seconds', 'sum'), peak_mb=('peak_mb', 'max'))
+        pages.append(summary.reset_index().assign(page=page))
+    return pd.concat(pages)[['rows', 'page', 'seconds', 'peak_mb']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='comma separated row counts, e.g. 10000,100000,1000000,10000000')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip tracemalloc, which slows allocation-heavy steps down')
+    parser.add_argument('--skip', default='', help='comma separated steps to leave out, e.g. calculate_predictive_clv')
+    parser.add_argument('--output', help='write per-function and per-page results to this CSV')
+    args = parser.parse_args()
+
+    # The analytics functions report through st.warning, which only logs outside Streamlit
+    warnings.filterwarnings('ignore')
+    skip = {name for name in args.skip.split(',') if name}
+
+    records = []
+    for rows in [int(size) for size in args.sizes.split(',')]:
+        records.extend(run_size(rows, track_memory=not args.no_memory, skip=skip))
+
+    functions = pd.DataFrame(records)
+    pages = page_summary(functions)
+    print()
+    print(pages.to_string(index=False, float_format=lambda value: f'{value:,.3f}'))
+
+    if args.output:
+        pd.concat([functions.assign(kind='function'), pages.rename(columns={'page': 'function'}).assign(kind='page')]) \
+            .to_csv(args.output, index=False)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
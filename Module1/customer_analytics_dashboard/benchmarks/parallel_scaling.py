@@ -0,0 +1,49 @@
+"""
+Measures how partitioned customer analytics scale with the number of worker processes.
+
+Run from the dashboard directory:
+
+    python -m benchmarks.parallel_scaling --rows 2000000 --workers 1,2,4,8
+"""
+import argparse
+import time
+
+from benchmarks.synthetic_data import generate_transactions
+from modules import analytics, parallel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='number of synthetic transactions')
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts to try')
+    parser.add_argument('--partition-by', choices=parallel.PARTITION_MODES, default='customer')
+    parser.add_argument('--predictive', choices=['none', 'global', 'per_partition'], default='none')
+    parser.add_argument('--serial-baseline', action='store_true',
+                        help='also time the unpartitioned analytics functions')
+    args = parser.parse_args()
+    predictive = None if args.predictive == 'none' else args.predictive
+
+    df = generate_transactions(args.rows, raw=False)
+    print(f"{len(df):,} transactions, {df['CustomerID'].nunique():,} customers, "
+          f"{df['Country'].nunique()} countries")
+
+    if args.serial_baseline:
+        start = time.perf_counter()
+        analytics.calculate_rfm(df)
+        analytics.calculate_clv(df)
+        if predictive:
+            analytics.calculate_predictive_clv(df)
+        print(f"{'unpartitioned':>14}: {time.perf_counter() - start:8.2f}s")
+
+    baseline = None
+    for workers in [int(value) for value in args.workers.split(',')]:
+        start = time.perf_counter()
+        parallel.parallel_customer_analytics(df, partition_by=args.partition_by, workers=workers,
+                                             predictive=predictive)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>6} workers: {elapsed:8.2f}s  speedup x{baseline / elapsed:.2f}")
+
+
+if __name__ == '__main__':
+    main()
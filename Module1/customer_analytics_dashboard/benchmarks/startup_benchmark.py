@@ -0,0 +1,141 @@
+"""
+Cold-start benchmark of the dashboard: what a fresh server process imports and how long it takes.
+
+Runs app.py headless in a new interpreter under `python -X importtime`, renders the Home
+page, then switches to another page, and reports the wall time and the slowest imports of
+each step. Fails (exit code 1) when Home loads a heavy library or its imports go over
+--max-home-import-ms, so a top-level import that slips back in is caught. Run from the
+dashboard directory:
+
+    python -m benchmarks.startup_benchmark --page "Customer Lifetime Value"
+    python -m benchmarks.startup_benchmark --page "Sales Performance" --no-prewarm --max-home-import-ms 3000
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+# Libraries only the chart and predictive CLV pages need; Home must not import them
+HEAVY_PREFIXES = ('plotly', 'lifetimes', 'scipy', 'autograd')
+MARK = 'MARK:'
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S.*)$')
+
+
+def mark(label, started):
+    print(f"{MARK}{label}:{(time.perf_counter() - started) * 1000:.1f}", file=sys.stderr, flush=True)
+
+
+def run_worker(page):
+    """Runs inside the child interpreter; marks each step on stderr between the import lines"""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    # Streamlit itself, which every server process pays for before running app.py
+    mark('streamlit', started)
+
+    # -X importtime logs every thread's imports in one stream, so the pre-warm thread is held
+    # until Home is measured; a real server starts it only once the page is sent anyway
+    from modules import warmup
+    home_done = threading.Event()
+    import_all = warmup._import_all
+    warmup._import_all = lambda modules: (home_done.wait(), import_all(modules))
+
+    started = time.perf_counter()
+    at = AppTest.from_file(APP, default_timeout=300).run()
+    if at.exception:
+        raise SystemExit(f"Home failed: {at.exception[0].message}")
+    mark('home', started)
+    home_done.set()
+
+    started = time.perf_counter()
+    warmup.wait()
+    mark('prewarm', started)
+
+    started = time.perf_counter()
+    at.sidebar.radio[0].set_value(page).run()
+    if at.exception:
+        raise SystemExit(f"{page} failed: {at.exception[0].message}")
+    mark('page', started)
+
+
+def parse_sections(stderr):
+    """Splits the importtime output at the marks: {label: (wall_ms, [(module, self_us, cumulative_us, depth)])}"""
+    sections, imports = {}, []
+    for line in stderr.splitlines():
+        if line.startswith(MARK):
+            label, wall_ms = line[len(MARK):].rsplit(':', 1)
+            sections[label] = (float(wall_ms), imports)
+            imports = []
+            continue
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module.strip(), int(self_us), int(cumulative_us), len(indent) // 2))
+    return sections
+
+
+def top_level_ms(imports):
+    """Import time of a step: the cumulative time of the imports nothing else in the step started"""
+    return sum(cumulative for _, _, cumulative, depth in imports if depth == 0) / 1000
+
+
+def heavy_modules(imports):
+    return sorted({module.split('.')[0] for module, _, _, _ in imports if module.startswith(HEAVY_PREFIXES)})
+
+
+def report(label, wall_ms, imports, top):
+    print(f"\n{label}: {wall_ms:,.0f}ms wall, {top_level_ms(imports):,.0f}ms importing {len(imports)} modules")
+    roots = sorted((entry for entry in imports if entry[3] == 0), key=lambda entry: -entry[2])
+    for module, _, cumulative, _ in roots[:top]:
+        print(f"  {cumulative / 1000:>8.1f}ms  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--page', default='Customer Lifetime Value', help='page to switch to after Home')
+    parser.add_argument('--no-prewarm', action='store_true', help='leave every heavy import to first use')
+    parser.add_argument('--top', type=int, default=10, help='slowest top-level imports to list per step')
+    parser.add_argument('--max-home-import-ms', type=float, help='fail when Home spends longer importing')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.page)
+        return
+
+    env = dict(os.environ, DASHBOARD_PREWARM='0' if args.no_prewarm else '1')
+    command = [sys.executable, '-X', 'importtime', '-m', 'benchmarks.startup_benchmark', '--worker', '--page', args.page]
+    started = time.perf_counter()
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    total_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        print(completed.stderr[-4000:], file=sys.stderr)
+        raise SystemExit(completed.returncode)
+
+    sections = parse_sections(completed.stderr)
+    print(f"Cold start of app.py, pre-warm {'off' if args.no_prewarm else 'on'}: {total_ms:,.0f}ms in total")
+    titles = {'streamlit': 'Importing Streamlit', 'home': 'Home (first paint)',
+              'prewarm': 'Waiting for the pre-warm thread', 'page': args.page}
+    for label in ('streamlit', 'home', 'prewarm', 'page'):
+        wall_ms, imports = sections[label]
+        report(titles[label], wall_ms, imports, args.top)
+
+    failures = []
+    home_imports = sections['home'][1]
+    heavy = heavy_modules(home_imports)
+    if heavy:
+        failures.append(f"Home imported {', '.join(heavy)}")
+    home_ms = top_level_ms(home_imports)
+    if args.max_home_import_ms is not None and home_ms > args.max_home_import_ms:
+        failures.append(f"Home spent {home_ms:,.0f}ms importing, over the {args.max_home_import_ms:,.0f}ms budget")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+COUNTRIES = ['United Kingdom', 'Germany', 'France', 'EIRE', 'Spain', 'Netherlands',
+             'Belgium', 'Switzerland', 'Portugal', 'Australia', 'Norway', 'Italy']
+# Roughly the skew of the sample data: most orders come from the UK
+COUNTRY_WEIGHTS = np.array([60, 6, 6, 5, 4, 4, 3, 3, 3, 2, 2, 2], dtype=float)
+
+
+def generate_transactions(n_rows, n_customers=None, n_products=4000, start='2010-12-01', days=365,
+                          raw=True, seed=42):
+    """
+    Generates synthetic e-commerce transactions with the columns of sample_ecommerce_data.csv.
+
+    With raw=True the frame looks like the CSV (string dates, float CustomerID, some
+    missing customers, returns and duplicates) and should go through preprocess_data;
+    otherwise it is already in the preprocessed shape, including TotalPrice.
+    """
+    rng = np.random.default_rng(seed)
+    n_customers = n_customers or max(n_rows // 50, 10)
+    n_invoices = max(n_rows // 5, 1)
+
+    # Each invoice belongs to one customer, country and timestamp, like real orders. Purchase
+    # rates and active periods vary per customer so the BG/NBD model has something to fit.
+    minutes = days * 24 * 60
+    customer_rates = rng.gamma(0.5, 1.0, n_customers)
+    customer_start = rng.integers(0, minutes, n_customers)
+    customer_lifetime = rng.exponential(minutes / 3, n_customers)
+    customer = rng.choice(n_customers, n_invoices, p=customer_rates / customer_rates.sum())
+    invoice_minutes = np.minimum(customer_start[customer] + rng.random(n_invoices) * customer_lifetime[customer],
+                                 minutes - 1).astype(np.int64)
+    # Number invoices in date order
+    by_date = np.argsort(invoice_minutes, kind='stable')
+    invoice_customer = 12000 + customer[by_date]
+    invoice_minutes = invoice_minutes[by_date]
+    customer_country = rng.choice(len(COUNTRIES), n_customers, p=COUNTRY_WEIGHTS / COUNTRY_WEIGHTS.sum())
+    invoice = np.sort(rng.integers(0, n_invoices, n_rows))
+
+    products = rng.integers(0, n_products, n_rows)
+    df = pd.DataFrame({
+        'InvoiceNo': 536365 + invoice,
+        'StockCode': pd.Categorical.from_codes(products, [f'{20000 + i}' for i in range(n_products)]),
+        'Description': pd.Categorical.from_codes(products, [f'PRODUCT {i}' for i in range(n_products)]),
+        'Quantity': rng.integers(1, 25, n_rows),
+        'InvoiceDate': pd.Timestamp(start) + pd.to_timedelta(invoice_minutes[invoice], unit='m'),
+        'UnitPrice': np.round(rng.gamma(2.0, 2.0, n_rows) + 0.1, 2),
+        'CustomerID': invoice_customer[invoice],
+        'Country': pd.Categorical.from_codes(customer_country[invoice_customer[invoice] - 12000], COUNTRIES)
+    })
+
+    if not raw:
+        df['TotalPrice'] = df['Quantity'] * df['UnitPrice']
+        return df
+
+    df['Description'] = df['Description'].astype(object)
+    df['StockCode'] = df['StockCode'].astype(object)
+    df['Country'] = df['Country'].astype(object)
+    df['CustomerID'] = df['CustomerID'].astype(float)
+    df.loc[rng.random(n_rows) < 0.02, 'CustomerID'] = np.nan
+    df.loc[rng.random(n_rows) < 0.01, 'Quantity'] *= -1
+    df['InvoiceDate'] = df['InvoiceDate'].dt.strftime('%m/%d/%Y %H:%M')
+    duplicates = df.sample(frac=0.005, random_state=seed)
+    return pd.concat([df, duplicates], ignore_index=True)
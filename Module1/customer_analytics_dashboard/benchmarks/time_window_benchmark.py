@@ -0,0 +1,79 @@
+"""
+Benchmark of date-window filtering: boolean masks against the sorted time index.
+
+Builds the time index and full sales rollup once, then for random windows times
+selecting the rows with a mask and with TimeIndex.window, and the rollup built from
+the masked rows against rollups.window_rollup, plus the RFM and CLV recomputation a
+page does for the window. Run from the dashboard directory:
+
+    python -m benchmarks.time_window_benchmark --rows 5000000 --windows 20
+"""
+import argparse
+import statistics
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_transactions
+from modules import analytics, rollups
+from modules.time_index import TimeIndex
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def random_windows(first, last, count, seed=0):
+    """
+    Windows of one to six months at random positions between first and last.
+    """
+    rng = np.random.default_rng(seed)
+    span = (last - first).days
+    for _ in range(count):
+        days = int(rng.integers(30, 183))
+        start = first + pd.Timedelta(days=int(rng.integers(0, max(span - days, 1))))
+        yield start, start + pd.Timedelta(days=days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--days', type=int, default=730, help='days of history in the synthetic data')
+    parser.add_argument('--windows', type=int, default=10)
+    args = parser.parse_args()
+
+    # The analytics functions report through st.warning, which only logs outside Streamlit
+    warnings.filterwarnings('ignore')
+    # Shuffled, as rows arrive from a CSV in no particular order
+    df = generate_transactions(args.rows, days=args.days, raw=False).sample(frac=1, random_state=0)
+    index, build_seconds = timed(TimeIndex, df)
+    full_rollup, rollup_seconds = timed(rollups.SalesRollup.from_transactions, index.df)
+    print(f"{args.rows:,} rows: time index built in {build_seconds:.2f}s, full rollup in {rollup_seconds:.2f}s "
+          f"({len(index.month_keys)} months)")
+
+    timings = {name: [] for name in ('mask', 'index', 'mask rollup', 'window rollup', 'rfm', 'clv')}
+    first, last = (pd.Timestamp(day) for day in index.date_bounds())
+    for start, end in random_windows(first, last, args.windows):
+        masked, seconds = timed(lambda: df[(df['InvoiceDate'] >= start) & (df['InvoiceDate'] < end)])
+        timings['mask'].append(seconds)
+        window, seconds = timed(index.window, start, end)
+        timings['index'].append(seconds)
+        assert len(window) == len(masked)
+
+        timings['mask rollup'].append(timed(rollups.SalesRollup.from_transactions, masked)[1])
+        timings['window rollup'].append(timed(rollups.window_rollup, full_rollup, index, start, end)[1])
+        timings['rfm'].append(timed(lambda: analytics.segment_customers(
+            analytics.calculate_rfm(window, snapshot_date=end)))[1])
+        timings['clv'].append(timed(analytics.calculate_clv, window)[1])
+
+    print(f"\n{'step':<16} {'median':>10} {'max':>10}   over {args.windows} windows")
+    for name, seconds in timings.items():
+        print(f"{name:<16} {statistics.median(seconds) * 1000:>8.1f}ms {max(seconds) * 1000:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
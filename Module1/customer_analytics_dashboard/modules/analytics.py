@@ -1,23 +1,33 @@
 import pandas as pd
 import streamlit as st
 from datetime import timedelta
-from lifetimes import BetaGeoFitter, GammaGammaFitter
-from lifetimes.utils import summary_data_from_transaction_data
+from modules import profiling
+from modules.sql_backend import TransactionStore
 
-def calculate_rfm(df):
+@profiling.timed
+def calculate_rfm(df, snapshot_date=None):
     """
     Calculates Recency, Frequency, and Monetary values for each customer.
+
+    Recency is measured from snapshot_date, which defaults to the day after the
+    last transaction in df.
     """
     if df is None:
         return None
 
-    snapshot_date = df['InvoiceDate'].max() + timedelta(days=1)
+    if isinstance(df, TransactionStore):
+        return df.rfm()
+
+    if snapshot_date is None:
+        snapshot_date = df['InvoiceDate'].max() + timedelta(days=1)
 
     rfm = df.groupby('CustomerID').agg({
-        'InvoiceDate': lambda date: (snapshot_date - date.max()).days,
+        'InvoiceDate': 'max',
         'InvoiceNo': 'nunique',
         'TotalPrice': 'sum'
     })
+    # One vectorised subtraction instead of a Python call per customer
+    rfm['InvoiceDate'] = (snapshot_date - rfm['InvoiceDate']).dt.days
 
     rfm.rename(columns={
         'InvoiceDate': 'Recency',
@@ -27,6 +37,7 @@ def calculate_rfm(df):
 
     return rfm
 
+@profiling.timed
 def segment_customers(rfm):
     """
     Segments customers into different tiers based on RFM scores.
@@ -67,6 +78,7 @@ def segment_customers(rfm):
 
     return rfm
 
+@profiling.timed
 def calculate_clv(df):
     """
     Calculates the Customer Lifetime Value (CLV) for each customer.
@@ -74,16 +86,26 @@ def calculate_clv(df):
     if df is None:
         return None
 
-    clv = df.groupby('CustomerID').agg({
-        'TotalPrice': 'sum',
-        'InvoiceNo': 'nunique'
-    })
-    clv.rename(columns={'TotalPrice': 'TotalRevenue', 'InvoiceNo': 'TotalTransactions'}, inplace=True)
-    
+    if isinstance(df, TransactionStore):
+        clv = df.customer_totals()
+    else:
+        clv = df.groupby('CustomerID').agg({
+            'TotalPrice': 'sum',
+            'InvoiceNo': 'nunique'
+        })
+        clv.rename(columns={'TotalPrice': 'TotalRevenue', 'InvoiceNo': 'TotalTransactions'}, inplace=True)
+
+    return clv_from_totals(clv)
+
+def clv_from_totals(clv):
+    """
+    Adds the CLV columns to a per-customer frame of TotalRevenue and TotalTransactions.
+    """
     # Add error handling for division by zero
     clv['AverageOrderValue'] = clv['TotalRevenue'].div(clv['TotalTransactions']).fillna(0)
 
-    total_customers = len(df['CustomerID'].unique())
+    # Every customer has at least one transaction, so this equals df['CustomerID'].nunique()
+    total_customers = len(clv)
     if total_customers > 0:
         purchase_frequency = clv['TotalTransactions'] / total_customers
     else:
@@ -95,7 +117,8 @@ def calculate_clv(df):
 
     return clv
 
-def calculate_predictive_clv(df):
+@profiling.timed
+def calculate_predictive_clv(df, observation_period_end=None):
     """
     Calculates predictive CLV using BG/NBD and Gamma-Gamma models.
     """
@@ -103,43 +126,66 @@ def calculate_predictive_clv(df):
         return None
 
     try:
-        summary = summary_data_from_transaction_data(
-            df,
-            customer_id_col='CustomerID',
-            datetime_col='InvoiceDate',
-            monetary_value_col='TotalPrice'
-        )
+        if isinstance(df, TransactionStore):
+            summary = df.predictive_summary()
+        else:
+            summary = predictive_summary(df, observation_period_end)
+    except Exception as e:
+        st.warning(f"Error preparing data for CLV calculation: {str(e)}")
+        return None
+
+    return fit_predictive_clv(summary)
+
+def predictive_summary(df, observation_period_end=None):
+    """
+    Builds the per-customer frequency/recency/T/monetary_value table the lifetimes models are fitted on.
+    """
+    # lifetimes loads scipy and autograd, about a second; only the predictive CLV needs it
+    from lifetimes.utils import summary_data_from_transaction_data
+
+    return summary_data_from_transaction_data(
+        df,
+        customer_id_col='CustomerID',
+        datetime_col='InvoiceDate',
+        monetary_value_col='TotalPrice',
+        observation_period_end=observation_period_end
+    )
+
+def fit_predictive_clv(summary):
+    """
+    Fits the BG/NBD and Gamma-Gamma models to a lifetimes summary table and adds predicted CLV.
+    """
+    if summary is None:
+        return None
 
-        # Filter for customers with repeat purchases to ensure model stability
-        summary = summary[summary['frequency'] > 0]
+    # Filter for customers with repeat purchases to ensure model stability
+    summary = summary[summary['frequency'] > 0]
 
-        if len(summary) < 2:
-            st.warning("Insufficient data for predictive CLV calculation. Need more customers with repeat purchases.")
-            return None
+    if len(summary) < 2:
+        st.warning("Insufficient data for predictive CLV calculation. Need more customers with repeat purchases.")
+        return None
 
-        # Add penalizer coefficients to help model convergence with small datasets
-        bgf = BetaGeoFitter(penalizer_coef=0.001)
-        ggf = GammaGammaFitter(penalizer_coef=0.001)
+    from lifetimes import BetaGeoFitter, GammaGammaFitter
 
-        # Fit the models with error handling
-        try:
-            bgf.fit(summary['frequency'], summary['recency'], summary['T'])
-            ggf.fit(summary['frequency'], summary['monetary_value'])
+    # Add penalizer coefficients to help model convergence with small datasets
+    bgf = BetaGeoFitter(penalizer_coef=0.001)
+    ggf = GammaGammaFitter(penalizer_coef=0.001)
 
-            # Calculate conditional expected average profit
-            clv = ggf.conditional_expected_average_profit(
-                summary['frequency'],
-                summary['monetary_value']
-            )
+    # Fit the models with error handling
+    try:
+        bgf.fit(summary['frequency'], summary['recency'], summary['T'])
+        ggf.fit(summary['frequency'], summary['monetary_value'])
 
-            # Add predictive CLV to the summary table
-            summary['predicted_clv'] = clv
-            return summary.sort_values(by='predicted_clv', ascending=False)
+        # Calculate conditional expected average profit
+        clv = ggf.conditional_expected_average_profit(
+            summary['frequency'],
+            summary['monetary_value']
+        )
 
-        except Exception as e:
-            st.warning(f"Could not calculate predictive CLV due to model fitting issues: {str(e)}")
-            return None
+        # Add predictive CLV to the summary table
+        summary['predicted_clv'] = clv
+        return summary.sort_values(by='predicted_clv', ascending=False)
 
     except Exception as e:
-        st.warning(f"Error preparing data for CLV calculation: {str(e)}")
+        st.warning(f"Could not calculate predictive CLV due to model fitting issues: {str(e)}")
         return None
@@ -1,6 +1,9 @@
+import os
 import pandas as pd
 import streamlit as st
+from modules import profiling
 
+@profiling.timed
 @st.cache_data
 def load_data(file_path):
     """
@@ -13,6 +16,17 @@ def load_data(file_path):
         st.error(f"Error: The file at {file_path} was not found.")
         return None
 
+def get_data_version(file_path):
+    """
+    Returns a cheap fingerprint of the data file that changes whenever it is rewritten.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+@profiling.timed
 def preprocess_data(df):
     """
     Cleans and preprocesses the transaction data.
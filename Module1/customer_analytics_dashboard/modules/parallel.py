@@ -0,0 +1,137 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from modules import analytics, profiling
+
+COLUMNAR_COLUMNS = ['CustomerID', 'InvoiceNo', 'InvoiceDate', 'TotalPrice']
+PARTITION_MODES = ['Country', 'customer']
+PREDICTIVE_MODES = [None, 'global', 'per_partition']
+
+
+def write_columnar(df, directory, partition_by='customer', partitions=8):
+    """
+    Writes the columns needed for customer analytics as .npy files, sorted so that
+    every partition is a contiguous row range. Workers memory-map these files and
+    read only their own slice instead of receiving a pickled DataFrame.
+
+    Returns a list of (partition key, start row, stop row).
+    """
+    if partition_by == 'Country':
+        codes, keys = pd.factorize(df['Country'], sort=True, use_na_sentinel=False)
+    elif partition_by == 'customer':
+        # Whole customers land in one bucket, so per-customer results never need merging
+        codes = df['CustomerID'].to_numpy() % partitions
+        keys = np.arange(partitions)
+    else:
+        raise ValueError(f"partition_by must be one of {PARTITION_MODES}")
+
+    order = np.argsort(codes, kind='stable')
+    invoice_codes, _ = pd.factorize(df['InvoiceNo'])
+    columns = {
+        'CustomerID': df['CustomerID'].to_numpy(),
+        'InvoiceNo': invoice_codes,
+        'InvoiceDate': df['InvoiceDate'].to_numpy(dtype='datetime64[ns]'),
+        'TotalPrice': df['TotalPrice'].to_numpy(dtype='float64')
+    }
+    for name, values in columns.items():
+        np.save(os.path.join(directory, f'{name}.npy'), values[order])
+
+    bounds = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+    return [(keys[i], int(bounds[i]), int(bounds[i + 1])) for i in range(len(keys)) if bounds[i] < bounds[i + 1]]
+
+
+def read_partition(directory, start, stop):
+    """
+    Loads rows [start, stop) of the columnar files into a DataFrame.
+    """
+    return pd.DataFrame({
+        name: np.array(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')[start:stop])
+        for name in COLUMNAR_COLUMNS
+    })
+
+
+def analyse_partition(directory, key, start, stop, snapshot_date, observation_end, predictive):
+    """
+    Computes RFM and, depending on `predictive`, the lifetimes summary or a fitted
+    predictive CLV for a single partition.
+    """
+    df = read_partition(directory, start, stop)
+    result = {'key': key, 'rfm': analytics.calculate_rfm(df, snapshot_date=snapshot_date)}
+    if predictive == 'global':
+        result['summary'] = analytics.predictive_summary(df, observation_end)
+    elif predictive == 'per_partition':
+        result['predictive_clv'] = analytics.calculate_predictive_clv(df, observation_period_end=observation_end)
+    return result
+
+
+def _analyse_task(task):
+    return analyse_partition(*task)
+
+
+@profiling.timed
+def parallel_customer_analytics(df, partition_by='customer', workers=None, predictive=None, partitions=None,
+                                snapshot_date=None, observation_end=None):
+    """
+    Computes RFM, CLV and optionally predictive CLV over partitions of the
+    transactions in a process pool and merges the results.
+
+    partition_by is 'customer' (customer id hash buckets) or 'Country'. predictive
+    is None, 'global' (summaries built in parallel, one model fitted on all
+    customers) or 'per_partition' (one model per partition, e.g. per country).
+    workers=1 runs every partition in this process, which is the serial baseline.
+    snapshot_date and observation_end default to the day after and the day of the
+    last transaction in df.
+    """
+    if df is None:
+        return None
+    if predictive not in PREDICTIVE_MODES:
+        raise ValueError(f"predictive must be one of {PREDICTIVE_MODES}")
+    if predictive == 'global' and partition_by != 'customer':
+        raise ValueError("predictive='global' needs customer partitions so each summary row is complete")
+
+    workers = workers or os.cpu_count() or 1
+    partitions = partitions or workers * 2
+
+    # Recency and T are measured from the same dates as the unpartitioned analysis
+    if snapshot_date is None:
+        snapshot_date = df['InvoiceDate'].max() + timedelta(days=1)
+    if observation_end is None:
+        observation_end = df['InvoiceDate'].max()
+
+    with tempfile.TemporaryDirectory(prefix='dashboard_columnar_') as directory:
+        ranges = write_columnar(df, directory, partition_by, partitions)
+        tasks = [(directory, key, start, stop, snapshot_date, observation_end, predictive)
+                 for key, start, stop in ranges]
+
+        if workers == 1:
+            results = [_analyse_task(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_analyse_task, tasks))
+
+    # A customer who bought in several countries appears in several partitions
+    rfm = pd.concat([result['rfm'] for result in results]).groupby(level=0).agg({
+        'Recency': 'min',
+        'Frequency': 'sum',
+        'MonetaryValue': 'sum'
+    })
+    clv = analytics.clv_from_totals(
+        rfm[['MonetaryValue', 'Frequency']].rename(columns={'MonetaryValue': 'TotalRevenue', 'Frequency': 'TotalTransactions'})
+    )
+
+    predictive_clv = None
+    if predictive == 'global':
+        summary = pd.concat([result['summary'] for result in results]).sort_index()
+        predictive_clv = analytics.fit_predictive_clv(summary)
+    elif predictive == 'per_partition':
+        fitted = [result['predictive_clv'].assign(**{partition_by: result['key']})
+                  for result in results if result['predictive_clv'] is not None]
+        if fitted:
+            predictive_clv = pd.concat(fitted).sort_values(by='predicted_clv', ascending=False)
+
+    return {'rfm': rfm, 'clv': clv, 'predictive_clv': predictive_clv}
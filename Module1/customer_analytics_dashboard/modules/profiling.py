@@ -0,0 +1,58 @@
+import functools
+import threading
+import time
+
+import pandas as pd
+
+# Streamlit runs every session's script in its own thread, so each rerun keeps its own records
+_state = threading.local()
+
+
+def start_run(enabled):
+    """
+    Starts collecting timings for the current script run when enabled.
+    """
+    _state.records = [] if enabled else None
+    _state.depth = 0
+    _state.started = time.perf_counter()
+
+
+def is_enabled():
+    return getattr(_state, 'records', None) is not None
+
+
+def timed(func):
+    """
+    Records the wall time of every call made while a profiling run is active.
+    Costs a single attribute lookup otherwise.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        records = getattr(_state, 'records', None)
+        if records is None:
+            return func(*args, **kwargs)
+
+        depth = _state.depth
+        _state.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _state.depth = depth
+            records.append({
+                'Function': f"{func.__module__.split('.')[-1]}.{func.__name__}",
+                'Seconds': time.perf_counter() - start,
+                'Nested': depth > 0
+            })
+
+    return wrapper
+
+
+def run_report():
+    """
+    Returns the calls recorded in this run (slowest first) and the total run time so far.
+    """
+    if not is_enabled():
+        return None, None
+    report = pd.DataFrame(_state.records, columns=['Function', 'Seconds', 'Nested'])
+    return report.sort_values('Seconds', ascending=False), time.perf_counter() - _state.started
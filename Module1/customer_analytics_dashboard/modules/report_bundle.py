@@ -0,0 +1,348 @@
+"""
+Offline report bundle: the dashboard's analytics computed once per data refresh.
+
+Run after the CSV is refreshed (e.g. from a nightly job), from the dashboard directory:
+
+    python -m modules.report_bundle
+    python -m modules.report_bundle --workers 4 --force
+
+RFM segmentation, traditional CLV, predictive CLV (BG/NBD and Gamma-Gamma) and the
+sales rollup run in parallel worker processes. Their tables are written as pandas
+pickles (no Parquet engine needed) and their charts as Plotly JSON, next to a standalone index.html report. The
+app reads the bundle instead of computing when its data version matches the CSV's.
+"""
+import argparse
+import html
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from modules import analytics, data_processing, profiling, rollups, visualizations
+
+DATA_PATH = 'data/sample_ecommerce_data.csv'
+BUNDLE_DIR = 'data/report_bundle'
+MANIFEST = 'manifest.json'
+# Bump when the bundle layout or the analytics behind it change, so older bundles are rebuilt
+BUNDLE_FORMAT = 2
+# Slowest first, so the predictive CLV fit starts straight away
+JOB_ORDER = ['predictive_clv', 'rfm', 'sales', 'clv']
+PREVIEW_ROWS = 5
+REPORT_TOP_ROWS = 20
+
+# The preprocessed transactions of a worker process, loaded once by _load_transactions
+_transactions = None
+
+
+def rfm_job(df):
+    rfm_segmented = analytics.segment_customers(analytics.calculate_rfm(df))
+    return {'rfm_segmented': rfm_segmented}, {'rfm_scatter': visualizations.create_rfm_scatter(rfm_segmented)}
+
+
+def clv_job(df):
+    return {'clv': analytics.calculate_clv(df)}, {}
+
+
+def predictive_clv_job(df):
+    predictive_clv = analytics.calculate_predictive_clv(df)
+    if predictive_clv is None:
+        return {}, {}
+    return ({'predictive_clv': predictive_clv},
+            {'predictive_clv_histogram': visualizations.create_predictive_clv_histogram(predictive_clv)})
+
+
+def sales_job(df):
+    rollup = rollups.SalesRollup.from_transactions(df)
+    return {'sales_cube': rollup.cube}, {
+        'sales_trend': visualizations.create_sales_trend(rollup),
+        'top_products': visualizations.create_top_products_bar(rollup),
+        'country_map': visualizations.create_country_map(rollup)
+    }
+
+
+JOBS = {'rfm': rfm_job, 'clv': clv_job, 'predictive_clv': predictive_clv_job, 'sales': sales_job}
+
+
+def _load_transactions(path):
+    global _transactions
+    _transactions = pd.read_pickle(path)
+
+
+def run_job(name, df=None):
+    """
+    Runs one job on df, or on the worker's transactions. Figures are returned as JSON,
+    which is what the bundle stores and is cheaper to send back than Figure objects.
+    """
+    started = time.perf_counter()
+    tables, figures = JOBS[name](_transactions if df is None else df)
+    figures = {key: figure.to_json() for key, figure in figures.items()}
+    return tables, figures, time.perf_counter() - started
+
+
+def summarize(df):
+    """
+    Returns the Home page metrics and the date range of the transactions.
+    """
+    return {
+        'total_revenue': float(df['TotalPrice'].sum()),
+        'total_customers': int(df['CustomerID'].nunique()),
+        'total_orders': int(df['InvoiceNo'].nunique()),
+        'transactions': len(df),
+        'first_day': df['InvoiceDate'].min().date().isoformat(),
+        'last_day': df['InvoiceDate'].max().date().isoformat()
+    }
+
+
+def build_bundle(data_path=DATA_PATH, directory=BUNDLE_DIR, workers=None):
+    """
+    Computes every job for the transactions in data_path and writes the bundle to
+    directory, replacing any previous bundle once the new one is complete.
+
+    workers=1 runs the jobs one after another in this process. Returns the manifest.
+    """
+    started = time.perf_counter()
+    # Taken before reading, so a CSV rewritten during the build leaves the bundle stale
+    data_version = data_processing.get_data_version(data_path)
+    df = data_processing.load_data(data_path)
+    if data_version is None or df is None:
+        raise FileNotFoundError(f"No data file at {data_path}")
+    df = data_processing.preprocess_data(df.copy())
+
+    workers = min(workers or os.cpu_count() or 1, len(JOB_ORDER))
+    if workers == 1:
+        results = {name: run_job(name, df) for name in JOB_ORDER}
+    else:
+        # Written once and read by each worker, instead of pickling the frame into every task
+        with tempfile.TemporaryDirectory(prefix='dashboard_report_') as scratch:
+            path = os.path.join(scratch, 'transactions.pkl')
+            df.to_pickle(path)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_load_transactions,
+                                     initargs=(path,)) as executor:
+                futures = {name: executor.submit(run_job, name) for name in JOB_ORDER}
+                results = {name: future.result() for name, future in futures.items()}
+
+    tables = {'preview': df.head(PREVIEW_ROWS)}
+    figures = {}
+    for job_tables, job_figures, _ in results.values():
+        tables.update(job_tables)
+        figures.update(job_figures)
+
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'data_path': data_path,
+        'data_version': data_version,
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+        'summary': summarize(df),
+        'tables': sorted(tables),
+        'figures': sorted(figures),
+        'job_seconds': {name: round(seconds, 3) for name, (_, _, seconds) in results.items()},
+        'workers': workers
+    }
+    manifest['build_seconds'] = round(time.perf_counter() - started, 3)
+    write_bundle(directory, manifest, tables, figures)
+    return manifest
+
+
+def write_bundle(directory, manifest, tables, figures):
+    """
+    Writes the bundle next to directory and swaps it in, so the app never reads a half-written one.
+    """
+    staging = f"{directory}.building"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(os.path.join(staging, 'tables'))
+    os.makedirs(os.path.join(staging, 'figures'))
+
+    for name, table in tables.items():
+        table.to_pickle(os.path.join(staging, 'tables', f'{name}.pkl'))
+    for name, figure in figures.items():
+        with open(os.path.join(staging, 'figures', f'{name}.json'), 'w', encoding='utf-8') as file:
+            file.write(figure)
+
+    from plotly.offline import get_plotlyjs
+    with open(os.path.join(staging, 'plotly.min.js'), 'w', encoding='utf-8') as file:
+        file.write(get_plotlyjs())
+    with open(os.path.join(staging, 'index.html'), 'w', encoding='utf-8') as file:
+        file.write(render_html(manifest, tables, figures))
+    # The manifest goes last: a directory without one is never treated as a bundle
+    with open(os.path.join(staging, MANIFEST), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+
+    previous = f"{directory}.previous"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, previous)
+    os.replace(staging, directory)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def _table_html(df, title):
+    if df is None or df.empty:
+        return ''
+    return f"<h3>{html.escape(title)}</h3>\n" + df.to_html(classes='table', float_format=lambda value: f'{value:,.2f}')
+
+
+def render_html(manifest, tables, figures):
+    """
+    Renders the static report: headline metrics, every chart and the top customers.
+    Opens without a server or network access; plotly.min.js sits next to it.
+    """
+    import plotly.io as pio
+
+    summary = manifest['summary']
+    metrics = [('Total Revenue', f"${summary['total_revenue']:,.2f}"),
+               ('Total Unique Customers', f"{summary['total_customers']:,}"),
+               ('Total Orders', f"{summary['total_orders']:,}")]
+    charts = [pio.to_html(json.loads(figures[name]), full_html=False, include_plotlyjs=False, validate=False)
+              for name in ('sales_trend', 'top_products', 'country_map', 'rfm_scatter', 'predictive_clv_histogram')
+              if name in figures]
+
+    sections = []
+    rfm_segmented = tables.get('rfm_segmented')
+    if rfm_segmented is not None:
+        segments = rfm_segmented.groupby('Customer_Segment').agg(
+            Customers=('MonetaryValue', 'size'), AverageMonetaryValue=('MonetaryValue', 'mean'))
+        sections.append(_table_html(segments, 'Customer Segments'))
+    clv = tables.get('clv')
+    if clv is not None:
+        sections.append(_table_html(clv.nlargest(REPORT_TOP_ROWS, 'CLV'), f'Top {REPORT_TOP_ROWS} Customers by CLV'))
+    predictive_clv = tables.get('predictive_clv')
+    if predictive_clv is not None:
+        sections.append(_table_html(predictive_clv.head(REPORT_TOP_ROWS),
+                                    f'Top {REPORT_TOP_ROWS} Customers by Predicted CLV'))
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Customer Analytics Report</title>
+<script src="plotly.min.js"></script>
+<style>
+body {{ font-family: sans-serif; margin: 2em; color: #262730; }}
+.metrics {{ display: flex; gap: 3em; }}
+.metric strong {{ display: block; font-size: 1.8em; }}
+.table {{ border-collapse: collapse; margin-bottom: 2em; }}
+.table td, .table th {{ border: 1px solid #ddd; padding: 4px 8px; text-align: right; }}
+</style>
+</head>
+<body>
+<h1>Customer Analytics Report</h1>
+<p>{summary['transactions']:,} transactions from {summary['first_day']} to {summary['last_day']},
+built {html.escape(manifest['built_at'])} from {html.escape(manifest['data_path'])}.</p>
+<div class="metrics">
+{''.join(f'<div class="metric">{label}<strong>{value}</strong></div>' for label, value in metrics)}
+</div>
+{''.join(charts)}
+{''.join(sections)}
+</body>
+</html>
+"""
+
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def is_current(manifest, data_version):
+    """
+    True when the bundle was built by this code from the data file as it is now.
+    """
+    return (manifest is not None and data_version is not None
+            and manifest.get('format') == BUNDLE_FORMAT and manifest.get('data_version') == data_version)
+
+
+class ReportBundle:
+    """
+    A bundle written by build_bundle. Tables and figures are read on first use, so
+    a page only pays for what it shows.
+    """
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self.summary = manifest['summary']
+        self._tables = {}
+        self._figures = {}
+        self._sales_rollup = None
+
+    def date_bounds(self):
+        return (datetime.fromisoformat(self.summary['first_day']).date(),
+                datetime.fromisoformat(self.summary['last_day']).date())
+
+    def table(self, name):
+        """
+        Returns a stored table, or None when the build did not produce it (e.g. predictive
+        CLV without enough repeat customers). The frame is shared; copy it before changing it.
+        """
+        if name not in self.manifest['tables']:
+            return None
+        if name not in self._tables:
+            self._tables[name] = pd.read_pickle(os.path.join(self.directory, 'tables', f'{name}.pkl'))
+        return self._tables[name]
+
+    def figure(self, name):
+        """
+        Returns a new Figure built from a stored chart, or None when there is none.
+        """
+        if name not in self.manifest['figures']:
+            return None
+        if name not in self._figures:
+            with open(os.path.join(self.directory, 'figures', f'{name}.json'), encoding='utf-8') as file:
+                self._figures[name] = file.read()
+        import plotly.io as pio
+        return pio.from_json(self._figures[name], skip_invalid=True)
+
+    def sales_rollup(self):
+        if self._sales_rollup is None and self.table('sales_cube') is not None:
+            self._sales_rollup = rollups.SalesRollup(self.table('sales_cube'))
+        return self._sales_rollup
+
+
+@st.cache_resource(max_entries=2)
+def _open_bundle(directory, built_at, data_version, _manifest):
+    return ReportBundle(directory, _manifest)
+
+
+@profiling.timed
+def load_bundle(directory, data_version):
+    """
+    Returns the bundle in directory when it is current for data_version, otherwise None
+    so the caller computes live. One bundle object per build is shared by every session.
+    """
+    manifest = read_manifest(directory)
+    if not is_current(manifest, data_version):
+        return None
+    return _open_bundle(directory, manifest['built_at'], data_version, manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data', default=DATA_PATH, help='transactions CSV')
+    parser.add_argument('--output', default=BUNDLE_DIR, help='bundle directory')
+    parser.add_argument('--workers', type=int, help=f'worker processes (at most {len(JOB_ORDER)}; 1 runs serially)')
+    parser.add_argument('--force', action='store_true', help='rebuild even when the bundle is current')
+    args = parser.parse_args()
+
+    if not args.force and is_current(read_manifest(args.output), data_processing.get_data_version(args.data)):
+        print(f"{args.output} is current for {args.data}; use --force to rebuild")
+        return
+
+    manifest = build_bundle(args.data, args.output, args.workers)
+    print(f"Built {args.output} in {manifest['build_seconds']:.2f}s with {manifest['workers']} workers: "
+          f"{len(manifest['tables'])} tables, {len(manifest['figures'])} figures")
+    for name, seconds in manifest['job_seconds'].items():
+        print(f"  {name:<16} {seconds:8.2f}s")
+    print(f"Open {os.path.join(args.output, 'index.html')} to view the report")
+
+
+if __name__ == '__main__':
+    main()
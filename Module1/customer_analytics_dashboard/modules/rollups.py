@@ -0,0 +1,94 @@
+import pandas as pd
+import streamlit as st
+
+from modules import profiling
+
+CUBE_DIMENSIONS = ['Month', 'Country', 'Description']
+CUBE_MEASURES = ['Revenue', 'Quantity']
+
+
+def build_sales_cube(df):
+    """
+    Aggregates transactions into a month x country x product cube of revenue and quantity sums.
+    """
+    month = df['InvoiceDate'].dt.to_period('M').dt.to_timestamp(how='end').dt.normalize()
+    cube = df.assign(Month=month, Revenue=df['TotalPrice']).groupby(
+        CUBE_DIMENSIONS, dropna=False
+    )[CUBE_MEASURES].sum()
+    return cube.reset_index()
+
+
+class SalesRollup:
+    """
+    Pre-aggregated sales totals for the Sales Performance page.
+
+    The cube is small compared to the transactions, and the month, country and
+    product totals derived from it are kept sorted so each chart is a lookup.
+    """
+
+    def __init__(self, cube):
+        self.cube = cube
+        self._refresh_totals()
+
+    @classmethod
+    def from_transactions(cls, df):
+        return cls(build_sales_cube(df))
+
+    def _refresh_totals(self):
+        monthly = self.cube.groupby('Month')['Revenue'].sum()
+        if not monthly.empty:
+            # Fill months without sales with zero, as the pandas resample does
+            monthly = monthly.asfreq('M', fill_value=0)
+        self.monthly = monthly.rename('TotalPrice').rename_axis('InvoiceDate').reset_index()
+        self.by_country = self.cube.groupby('Country')['Revenue'].sum().rename('TotalPrice').reset_index()
+        self.products_by_quantity = self.cube.groupby('Description')['Quantity'].sum().sort_values(ascending=False)
+
+    def monthly_sales(self):
+        return self.monthly
+
+    def top_products(self, top_n=10):
+        return self.products_by_quantity.head(top_n).reset_index()
+
+    def country_sales(self):
+        return self.by_country
+
+
+@profiling.timed
+def window_rollup(rollup, time_index, start, end):
+    """
+    Returns the sales rollup of the transactions with start <= InvoiceDate < end.
+
+    Months whose transactions all fall inside the window are taken from the full
+    rollup's cube; only the rows of the partial months at the window's edges, found
+    through the time index, are aggregated.
+    """
+    lo, hi = time_index.positions(start, end)
+    first, last = time_index.full_months(lo, hi)
+    if first < last:
+        months = pd.DatetimeIndex(time_index.month_keys[first:last])
+        month_ends = months.to_period('M').to_timestamp(how='end').normalize()
+        parts = [rollup.cube[rollup.cube['Month'].isin(month_ends)]]
+        edges = [(lo, time_index.month_offsets[first]), (time_index.month_offsets[last], hi)]
+    else:
+        parts, edges = [], [(lo, hi)]
+
+    # The edge months are not in the cube part, so the parts can be stacked without regrouping
+    parts += [build_sales_cube(time_index.df.iloc[a:b]) for a, b in edges if b > a]
+    if not parts:
+        return SalesRollup(rollup.cube.iloc[:0])
+    return SalesRollup(pd.concat(parts, ignore_index=True))
+
+
+@profiling.timed
+@st.cache_resource(max_entries=2)
+def load_sales_rollup(_data, data_version):
+    """
+    Builds the sales rollup once per data version; `_data` is a preprocessed
+    DataFrame or a TransactionStore and is not hashed by Streamlit.
+    """
+    if _data is None:
+        return None
+
+    if isinstance(_data, pd.DataFrame):
+        return SalesRollup.from_transactions(_data)
+    return SalesRollup(_data.sales_cube())
@@ -0,0 +1,552 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+from modules import profiling
+from modules.data_processing import preprocess_data
+
+TABLE_NAME = 'transactions'
+STAGING_TABLE_NAME = 'transactions_staging'
+DELTA_TABLE_NAME = 'transactions_delta'
+ROLLUP_TABLE_NAME = 'sales_rollup'
+PRODUCT_TOTALS_TABLE_NAME = 'product_totals'
+CUSTOMER_SUMMARY_TABLE_NAME = 'customer_summary'
+CUSTOMER_DAILY_TABLE_NAME = 'customer_daily'
+META_TABLE_NAME = 'store_meta'
+BATCHES_TABLE_NAME = 'ingested_batches'
+# Bump whenever the table layout changes so stale databases are rebuilt
+SCHEMA_VERSION = '2'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+CHUNK_SIZE = 100_000
+# Seconds a connection waits for another session's ingest to release the write lock
+LOCK_TIMEOUT_SECONDS = 60
+SCHEMA = {
+    'InvoiceNo': 'TEXT',
+    'StockCode': 'TEXT',
+    'Description': 'TEXT',
+    'Quantity': 'INTEGER',
+    'InvoiceDate': 'TEXT',
+    'UnitPrice': 'REAL',
+    'CustomerID': 'INTEGER',
+    'Country': 'TEXT',
+    'TotalPrice': 'REAL'
+}
+COLUMNS = list(SCHEMA)
+# Held by the session ingesting data/incoming; other sessions in this process skip ingestion meanwhile
+_ingest_lock = threading.Lock()
+
+
+class TransactionStore:
+    """
+    Preprocessed transactions held in an embedded SQLite database.
+
+    Every query pushes its aggregation down to SQL and only returns the
+    (small) result set needed for plotting or per-customer analytics.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def connect(self):
+        return closing(sqlite3.connect(self.db_path, timeout=LOCK_TIMEOUT_SECONDS))
+
+    def query(self, sql, params=()):
+        """
+        Runs a read-only query and returns the result as a DataFrame.
+        """
+        with self.connect() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def data_version(self):
+        """
+        Returns a counter that changes every time new transactions are ingested.
+        """
+        with self.connect() as conn:
+            return _read_meta(conn, 'data_version')
+
+    def append_transactions(self, df):
+        """
+        Preprocesses a raw batch of transactions and folds it into the store.
+
+        Only the batch is cleaned and deduplicated against the stored history; the
+        per-customer aggregates and rollups are updated in place from the new rows.
+        Returns the number of transactions added.
+        """
+        df = preprocess_data(df)
+        if df is None or df.empty:
+            return 0
+
+        with self.connect() as conn, _write_transaction(conn):
+            _create_transactions_table(conn, STAGING_TABLE_NAME, temporary=True)
+            _write_transactions(df[COLUMNS], conn, STAGING_TABLE_NAME)
+            return _ingest_staged(conn)
+
+    def summary_metrics(self):
+        """
+        Returns total revenue, unique customers and unique orders.
+        """
+        row = self.query(f"""
+            SELECT COALESCE(SUM(revenue), 0) AS total_revenue,
+                   COUNT(*) AS total_customers,
+                   (SELECT COUNT(DISTINCT InvoiceNo) FROM {TABLE_NAME}) AS total_orders
+            FROM {CUSTOMER_SUMMARY_TABLE_NAME}
+        """).iloc[0]
+        return {
+            'total_revenue': float(row['total_revenue']),
+            'total_customers': int(row['total_customers']),
+            'total_orders': int(row['total_orders'])
+        }
+
+    def head(self, n=5):
+        """
+        Returns the first n stored transactions for previewing.
+        """
+        df = self.query(f"SELECT * FROM {TABLE_NAME} LIMIT ?", (n,))
+        df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'], format=DATE_FORMAT)
+        return df
+
+    def date_bounds(self):
+        """
+        Returns the first and last transaction dates, or None when the store is empty.
+        """
+        with self.connect() as conn:
+            first, last = conn.execute(f"SELECT MIN(InvoiceDate), MAX(InvoiceDate) FROM {TABLE_NAME}").fetchone()
+        if first is None:
+            return None
+        return pd.Timestamp(first).date(), pd.Timestamp(last).date()
+
+    def transactions_between(self, start, end):
+        """
+        Returns the transactions with start <= InvoiceDate < end, in date order.
+
+        Dates are stored in a sortable text format, so the range is a seek on the
+        InvoiceDate index rather than a scan of the table.
+        """
+        df = self.query(f"""
+            SELECT * FROM {TABLE_NAME}
+            WHERE InvoiceDate >= ? AND InvoiceDate < ?
+            ORDER BY InvoiceDate
+        """, (pd.Timestamp(start).strftime(DATE_FORMAT), pd.Timestamp(end).strftime(DATE_FORMAT)))
+        df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'], format=DATE_FORMAT)
+        return df
+
+    def monthly_sales(self):
+        """
+        Returns revenue per calendar month, labelled by month end like pd.Grouper(freq='M').
+        """
+        df = self.query(f"""
+            SELECT Month, SUM(Revenue) AS TotalPrice
+            FROM {ROLLUP_TABLE_NAME}
+            GROUP BY Month
+            ORDER BY Month
+        """)
+        if df.empty:
+            return pd.DataFrame({'InvoiceDate': pd.to_datetime([]), 'TotalPrice': []})
+
+        df['InvoiceDate'] = pd.to_datetime(df.pop('Month'), format='%Y-%m') + pd.offsets.MonthEnd(0)
+        # Fill months without sales with zero, as the pandas resample does
+        sales_by_month = df.set_index('InvoiceDate')['TotalPrice'].asfreq('M', fill_value=0)
+        return sales_by_month.reset_index()
+
+    def top_products(self, top_n=10):
+        """
+        Returns the top_n products by total quantity sold.
+        """
+        return self.query(f"""
+            SELECT Description, Quantity
+            FROM {PRODUCT_TOTALS_TABLE_NAME}
+            ORDER BY Quantity DESC
+            LIMIT ?
+        """, (top_n,))
+
+    def country_sales(self):
+        """
+        Returns total revenue per country.
+        """
+        return self.query(f"""
+            SELECT Country, SUM(Revenue) AS TotalPrice
+            FROM {ROLLUP_TABLE_NAME}
+            WHERE Country IS NOT NULL
+            GROUP BY Country
+            ORDER BY Country
+        """)
+
+    def sales_cube(self):
+        """
+        Returns the month x country x product rollup of revenue and quantity.
+        """
+        df = self.query(f"SELECT Month, Country, Description, Revenue, Quantity FROM {ROLLUP_TABLE_NAME}")
+        df['Month'] = pd.to_datetime(df['Month'], format='%Y-%m') + pd.offsets.MonthEnd(0)
+        return df
+
+    def rfm(self):
+        """
+        Returns Recency, Frequency and MonetaryValue per customer.
+        """
+        df = self.query(f"""
+            WITH snapshot AS (
+                SELECT CAST(strftime('%s', MAX(last_purchase)) AS INTEGER) + 86400 AS snapshot_ts
+                FROM {CUSTOMER_SUMMARY_TABLE_NAME}
+            )
+            SELECT CustomerID,
+                   (snapshot.snapshot_ts - CAST(strftime('%s', last_purchase) AS INTEGER)) / 86400 AS Recency,
+                   orders AS Frequency,
+                   revenue AS MonetaryValue
+            FROM {CUSTOMER_SUMMARY_TABLE_NAME}, snapshot
+            ORDER BY CustomerID
+        """)
+        return df.set_index('CustomerID')
+
+    def customer_totals(self):
+        """
+        Returns TotalRevenue and TotalTransactions per customer.
+        """
+        df = self.query(f"""
+            SELECT CustomerID, revenue AS TotalRevenue, orders AS TotalTransactions
+            FROM {CUSTOMER_SUMMARY_TABLE_NAME}
+            ORDER BY CustomerID
+        """)
+        return df.set_index('CustomerID')
+
+    def predictive_summary(self):
+        """
+        Returns the daily frequency/recency/T/monetary_value summary expected by
+        lifetimes, matching summary_data_from_transaction_data(freq='D').
+        """
+        df = self.query(f"""
+            WITH periods AS (
+                SELECT CustomerID, day AS period, value
+                FROM {CUSTOMER_DAILY_TABLE_NAME}
+            ),
+            firsts AS (
+                SELECT CustomerID, MIN(period) AS first_period
+                FROM periods
+                GROUP BY CustomerID
+            ),
+            observation AS (
+                SELECT MAX(period) AS observation_end FROM periods
+            )
+            SELECT p.CustomerID,
+                   COUNT(*) - 1 AS frequency,
+                   julianday(MAX(p.period)) - julianday(f.first_period) AS recency,
+                   julianday(o.observation_end) - julianday(f.first_period) AS T,
+                   CASE WHEN COUNT(*) > 1
+                        THEN SUM(CASE WHEN p.period > f.first_period THEN p.value ELSE 0 END) / (COUNT(*) - 1)
+                        ELSE 0 END AS monetary_value
+            FROM periods p
+            JOIN firsts f ON f.CustomerID = p.CustomerID
+            CROSS JOIN observation o
+            GROUP BY p.CustomerID
+            ORDER BY p.CustomerID
+        """)
+        return df.set_index('CustomerID').astype(float)
+
+
+def _read_meta(conn, key):
+    try:
+        row = conn.execute(f"SELECT value FROM {META_TABLE_NAME} WHERE key = ?", (key,)).fetchone()
+    except sqlite3.OperationalError:
+        # Databases written before the meta table existed
+        return None
+    return row[0] if row else None
+
+
+def _write_meta(conn, key, value):
+    conn.execute(f"""
+        INSERT INTO {META_TABLE_NAME} (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (key, str(value)))
+
+
+def _create_transactions_table(conn, table_name, temporary=False):
+    """
+    Creates an empty table with the transactions columns. Temporary tables belong to
+    the connection, so concurrent ingests never see each other's staging rows.
+    """
+    columns_sql = ', '.join(f'{name} {sql_type}' for name, sql_type in SCHEMA.items())
+    schema = 'temp' if temporary else 'main'
+    conn.execute(f"DROP TABLE IF EXISTS {schema}.{table_name}")
+    conn.execute(f"CREATE {'TEMP ' if temporary else ''}TABLE {table_name} ({columns_sql})")
+
+
+def _write_transactions(df, conn, table_name):
+    """
+    Appends preprocessed transactions to the given table.
+    """
+    df = df.copy()
+    df['InvoiceDate'] = df['InvoiceDate'].dt.strftime(DATE_FORMAT)
+    # executemany rather than to_sql, which only looks for the table in the main schema
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    placeholders = ', '.join('?' * len(df.columns))
+    conn.executemany(f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({placeholders})", rows)
+
+
+@contextmanager
+def _write_transaction(conn):
+    """
+    Runs the block as one transaction that takes the write lock up front.
+
+    Concurrent ingests queue on the lock instead of deduplicating against rows the
+    other has not committed, and a failure rolls back the new rows together with
+    every aggregate they were folded into, so a retry cannot count them twice.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def create_schema(conn):
+    """
+    Creates the empty transactions table and the aggregate tables maintained alongside it.
+    """
+    _create_transactions_table(conn, TABLE_NAME)
+    conn.executescript(f"""
+        CREATE INDEX idx_{TABLE_NAME}_invoice ON {TABLE_NAME} (InvoiceNo);
+        CREATE INDEX idx_{TABLE_NAME}_customer ON {TABLE_NAME} (CustomerID, InvoiceNo);
+        CREATE INDEX idx_{TABLE_NAME}_date ON {TABLE_NAME} (InvoiceDate);
+
+        CREATE TABLE {ROLLUP_TABLE_NAME} (
+            Month TEXT, Country TEXT, Description TEXT, Revenue REAL, Quantity INTEGER
+        );
+        CREATE INDEX idx_{ROLLUP_TABLE_NAME}_key ON {ROLLUP_TABLE_NAME} (Month, Country, Description);
+
+        CREATE TABLE {PRODUCT_TOTALS_TABLE_NAME} (Description TEXT PRIMARY KEY, Quantity INTEGER);
+        CREATE INDEX idx_{PRODUCT_TOTALS_TABLE_NAME}_quantity ON {PRODUCT_TOTALS_TABLE_NAME} (Quantity DESC);
+
+        CREATE TABLE {CUSTOMER_SUMMARY_TABLE_NAME} (
+            CustomerID INTEGER PRIMARY KEY, first_purchase TEXT, last_purchase TEXT, revenue REAL, orders INTEGER
+        );
+        CREATE TABLE {CUSTOMER_DAILY_TABLE_NAME} (
+            CustomerID INTEGER, day TEXT, value REAL, PRIMARY KEY (CustomerID, day)
+        );
+
+        CREATE TABLE {META_TABLE_NAME} (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE {BATCHES_TABLE_NAME} (name TEXT PRIMARY KEY, fingerprint TEXT, rows INTEGER, ingested_at TEXT);
+    """)
+    _write_meta(conn, 'schema_version', SCHEMA_VERSION)
+    _write_meta(conn, 'data_version', 0)
+
+
+def _apply_delta(conn):
+    """
+    Folds the rows in the delta table into the customer aggregates and sales rollups.
+    Must run before the delta is inserted into the transactions table, in the same
+    transaction (executescript would commit each statement on its own).
+    """
+    conn.execute(f"""
+        INSERT INTO {CUSTOMER_SUMMARY_TABLE_NAME} (CustomerID, first_purchase, last_purchase, revenue, orders)
+        SELECT d.CustomerID, MIN(d.InvoiceDate), MAX(d.InvoiceDate), SUM(d.TotalPrice),
+               COUNT(DISTINCT CASE WHEN NOT EXISTS (
+                   SELECT 1 FROM {TABLE_NAME} t WHERE t.CustomerID = d.CustomerID AND t.InvoiceNo = d.InvoiceNo
+               ) THEN d.InvoiceNo END)
+        FROM {DELTA_TABLE_NAME} d
+        WHERE true
+        GROUP BY d.CustomerID
+        ON CONFLICT(CustomerID) DO UPDATE SET
+            first_purchase = MIN(first_purchase, excluded.first_purchase),
+            last_purchase = MAX(last_purchase, excluded.last_purchase),
+            revenue = revenue + excluded.revenue,
+            orders = orders + excluded.orders
+    """)
+
+    conn.execute(f"""
+        INSERT INTO {CUSTOMER_DAILY_TABLE_NAME} (CustomerID, day, value)
+        SELECT CustomerID, date(InvoiceDate) AS day, SUM(TotalPrice)
+        FROM {DELTA_TABLE_NAME}
+        WHERE true
+        GROUP BY CustomerID, day
+        ON CONFLICT(CustomerID, day) DO UPDATE SET value = value + excluded.value
+    """)
+
+    conn.execute(f"""
+        CREATE TEMP TABLE rollup_delta AS
+            SELECT strftime('%Y-%m', InvoiceDate) AS Month, Country, Description,
+                   SUM(TotalPrice) AS Revenue, SUM(Quantity) AS Quantity
+            FROM {DELTA_TABLE_NAME}
+            GROUP BY Month, Country, Description
+    """)
+
+    # IS compares NULL countries and descriptions as equal
+    conn.execute(f"""
+        UPDATE {ROLLUP_TABLE_NAME}
+        SET Revenue = {ROLLUP_TABLE_NAME}.Revenue + d.Revenue,
+            Quantity = {ROLLUP_TABLE_NAME}.Quantity + d.Quantity
+        FROM rollup_delta d
+        WHERE {ROLLUP_TABLE_NAME}.Month = d.Month
+          AND {ROLLUP_TABLE_NAME}.Country IS d.Country
+          AND {ROLLUP_TABLE_NAME}.Description IS d.Description
+    """)
+
+    conn.execute(f"""
+        INSERT INTO {ROLLUP_TABLE_NAME} (Month, Country, Description, Revenue, Quantity)
+        SELECT d.Month, d.Country, d.Description, d.Revenue, d.Quantity
+        FROM rollup_delta d
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {ROLLUP_TABLE_NAME} r
+            WHERE r.Month = d.Month AND r.Country IS d.Country AND r.Description IS d.Description
+        )
+    """)
+
+    conn.execute(f"""
+        INSERT INTO {PRODUCT_TOTALS_TABLE_NAME} (Description, Quantity)
+        SELECT Description, SUM(Quantity)
+        FROM rollup_delta
+        WHERE Description IS NOT NULL
+        GROUP BY Description
+        ON CONFLICT(Description) DO UPDATE SET Quantity = Quantity + excluded.Quantity
+    """)
+
+    conn.execute("DROP TABLE temp.rollup_delta")
+
+
+def _ingest_staged(conn):
+    """
+    Moves staged rows that are not already stored into the transactions table,
+    updating every aggregate from those rows only. Returns the number of rows added.
+    Call it inside _write_transaction, after staging the rows in the temporary table.
+    """
+    # Same full-row dedupe as preprocess_data, applied across the batch and the stored history
+    conn.execute(f"DROP TABLE IF EXISTS temp.{DELTA_TABLE_NAME}")
+    conn.execute(f"""
+        CREATE TEMP TABLE {DELTA_TABLE_NAME} AS
+            SELECT DISTINCT * FROM temp.{STAGING_TABLE_NAME} s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {TABLE_NAME} t
+                WHERE t.InvoiceNo = s.InvoiceNo
+                  AND t.StockCode IS s.StockCode
+                  AND t.Description IS s.Description
+                  AND t.Quantity = s.Quantity
+                  AND t.InvoiceDate = s.InvoiceDate
+                  AND t.UnitPrice = s.UnitPrice
+                  AND t.CustomerID = s.CustomerID
+                  AND t.Country IS s.Country
+            )
+    """)
+    conn.execute(f"DROP TABLE temp.{STAGING_TABLE_NAME}")
+    added = conn.execute(f"SELECT COUNT(*) FROM {DELTA_TABLE_NAME}").fetchone()[0]
+
+    if added:
+        _apply_delta(conn)
+        conn.execute(f"INSERT INTO {TABLE_NAME} SELECT * FROM {DELTA_TABLE_NAME}")
+        _write_meta(conn, 'data_version', int(_read_meta(conn, 'data_version') or 0) + 1)
+
+    conn.execute(f"DROP TABLE temp.{DELTA_TABLE_NAME}")
+    return added
+
+
+@profiling.timed
+def build_store(file_path, db_path, chunksize=CHUNK_SIZE, force=False):
+    """
+    Loads a transactions CSV into SQLite chunk by chunk, so the full file never
+    has to fit in memory. The database is reused while it is newer than the CSV.
+    """
+    if not os.path.exists(file_path):
+        return None
+
+    if not force and os.path.exists(db_path) and os.path.getmtime(db_path) >= os.path.getmtime(file_path):
+        with closing(sqlite3.connect(db_path)) as conn:
+            if _read_meta(conn, 'schema_version') == SCHEMA_VERSION:
+                return TransactionStore(db_path)
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    with closing(sqlite3.connect(db_path, timeout=LOCK_TIMEOUT_SECONDS)) as conn:
+        create_schema(conn)
+        conn.commit()
+        with _write_transaction(conn):
+            _stage_csv(conn, file_path, chunksize)
+            # Duplicates can span chunk boundaries, so dedupe once everything is staged
+            _ingest_staged(conn)
+
+    return TransactionStore(db_path)
+
+
+def _stage_csv(conn, file_path, chunksize):
+    """
+    Preprocesses a CSV chunk by chunk into the connection's temporary staging table.
+    """
+    _create_transactions_table(conn, STAGING_TABLE_NAME, temporary=True)
+    for chunk in pd.read_csv(file_path, encoding='ISO-8859-1', chunksize=chunksize):
+        chunk = preprocess_data(chunk)
+        if not chunk.empty:
+            _write_transactions(chunk[COLUMNS], conn, STAGING_TABLE_NAME)
+
+
+def _batch_fingerprint(file_path):
+    stat = os.stat(file_path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def ingest_batch_file(store, file_path, chunksize=CHUNK_SIZE):
+    """
+    Appends a CSV batch of new transactions to the store. A batch whose name and
+    fingerprint were already ingested is skipped. Returns the number of rows added.
+
+    The rows, the aggregates and the batch record are committed together, so a batch
+    is either fully ingested and recorded or not at all.
+    """
+    name = os.path.basename(file_path)
+    fingerprint = _batch_fingerprint(file_path)
+    with store.connect() as conn, _write_transaction(conn):
+        # Checked under the write lock, so a batch another process just ingested is skipped
+        row = conn.execute(f"SELECT fingerprint FROM {BATCHES_TABLE_NAME} WHERE name = ?", (name,)).fetchone()
+        if row and row[0] == fingerprint:
+            return 0
+
+        _stage_csv(conn, file_path, chunksize)
+        added = _ingest_staged(conn)
+        conn.execute(f"""
+            INSERT INTO {BATCHES_TABLE_NAME} (name, fingerprint, rows, ingested_at)
+            VALUES (?, ?, ?, datetime('now'))
+            ON CONFLICT(name) DO UPDATE SET
+                fingerprint = excluded.fingerprint, rows = excluded.rows, ingested_at = excluded.ingested_at
+        """, (name, fingerprint, added))
+    return added
+
+
+@profiling.timed
+def ingest_new_batches(store, batch_dir, chunksize=CHUNK_SIZE):
+    """
+    Ingests every CSV in batch_dir that has not been ingested yet, in file name order.
+    Returns the number of rows added.
+
+    Every session's rerun calls this; while one of them is ingesting, the others
+    return straight away and see the new rows on their next rerun.
+    """
+    if store is None or not os.path.isdir(batch_dir):
+        return 0
+    if not _ingest_lock.acquire(blocking=False):
+        return 0
+
+    try:
+        added = 0
+        for name in sorted(os.listdir(batch_dir)):
+            if name.lower().endswith('.csv'):
+                added += ingest_batch_file(store, os.path.join(batch_dir, name), chunksize)
+        return added
+    finally:
+        _ingest_lock.release()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Append transaction batches to the dashboard's SQLite store.")
+    parser.add_argument('batches', nargs='+', help='CSV files with new transactions')
+    parser.add_argument('--db', default='data/sample_ecommerce_data.db', help='path to the SQLite store')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist; open the dashboard with the SQL backend once to create it")
+
+    transaction_store = TransactionStore(args.db)
+    for batch in args.batches:
+        print(f"{batch}: {ingest_batch_file(transaction_store, batch):,} new transactions")
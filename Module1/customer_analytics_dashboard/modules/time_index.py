@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules import data_processing, profiling
+
+
+class TimeIndex:
+    """
+    Preprocessed transactions sorted by InvoiceDate, with a month partition index.
+
+    Sorted once per data version, any date window is a contiguous block of rows found
+    by binary search, and slicing it copies nothing. month_offsets[i] is the first row
+    of month_keys[i], with a final entry one past the last row, so a search only looks
+    at the rows of one month and whole months can be read from pre-aggregated data.
+    """
+
+    def __init__(self, df):
+        self.df = df.sort_values('InvoiceDate', kind='stable', ignore_index=True)
+        self.dates = self.df['InvoiceDate'].to_numpy()
+        months = self.dates.astype('datetime64[M]')
+        # Sorted, so every month is one run of rows and starts where the month changes
+        starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]]) if len(months) else np.array([], dtype=int)
+        self.month_keys = months[starts]
+        self.month_offsets = np.append(starts, len(months))
+
+    def date_bounds(self):
+        """
+        Returns the first and last transaction dates, or None when there are no transactions.
+        """
+        if not len(self.dates):
+            return None
+        return pd.Timestamp(self.dates[0]).date(), pd.Timestamp(self.dates[-1]).date()
+
+    def _position(self, timestamp):
+        """
+        Returns the first row at or after timestamp.
+        """
+        timestamp = pd.Timestamp(timestamp).to_datetime64().astype(self.dates.dtype)
+        month = timestamp.astype('datetime64[M]')
+        i = np.searchsorted(self.month_keys, month)
+        if i == len(self.month_keys) or self.month_keys[i] != month:
+            # No sales that month: the window edge falls on the next month's first row
+            return int(self.month_offsets[i])
+        first, end = self.month_offsets[i], self.month_offsets[i + 1]
+        return int(first + np.searchsorted(self.dates[first:end], timestamp, side='left'))
+
+    def positions(self, start, end):
+        """
+        Returns the row range [lo, hi) of transactions with start <= InvoiceDate < end.
+        """
+        return self._position(start), max(self._position(end), self._position(start))
+
+    def full_months(self, lo, hi):
+        """
+        Returns the month index range [first, last) of months whose rows all lie in [lo, hi).
+        """
+        first = int(np.searchsorted(self.month_offsets, lo, side='left'))
+        last = int(np.searchsorted(self.month_offsets, hi, side='right')) - 1
+        return first, max(first, last)
+
+    def window(self, start, end):
+        """
+        Returns the transactions with start <= InvoiceDate < end.
+        """
+        lo, hi = self.positions(start, end)
+        return self.df.iloc[lo:hi]
+
+
+def window_bounds(first_day, last_day):
+    """
+    Converts an inclusive range of dates to the [start, end) timestamps TimeIndex.window takes.
+    """
+    return pd.Timestamp(first_day), pd.Timestamp(last_day) + pd.Timedelta(days=1)
+
+
+@profiling.timed
+@st.cache_resource(max_entries=2)
+def load_time_index(file_path, data_version):
+    """
+    Loads, preprocesses and sorts the transactions once per data version, so
+    reruns (such as moving the date window) reuse them instead of redoing the work.
+    """
+    df = data_processing.load_data(file_path)
+    if df is None:
+        return None
+    return TimeIndex(data_processing.preprocess_data(df.copy()))
@@ -1,32 +1,113 @@
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
+from modules import profiling
+from modules.sql_backend import TransactionStore
+from modules.rollups import SalesRollup
 
-def create_rfm_scatter(rfm_segmented):
+# Sources that serve the sales aggregations directly instead of raw transactions
+PRE_AGGREGATED_SOURCES = (TransactionStore, SalesRollup)
+
+# Above this many customers the RFM scatter is sampled or binned instead of drawing every point
+MAX_SCATTER_POINTS = 5000
+RFM_BINS = 40
+RFM_LABELS = {'Recency': 'Days Since Last Purchase', 'Frequency': 'Number of Purchases'}
+
+def _plotly():
+    """
+    Returns plotly.express and plotly.graph_objects, imported on first use so pages
+    without charts (and the first paint) do not load them.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    return px, go
+
+def sample_by_segment(rfm_segmented, max_points=MAX_SCATTER_POINTS, random_state=42):
+    """
+    Samples at most max_points customers, using the same fraction in every segment
+    so segment proportions are preserved.
+    """
+    if len(rfm_segmented) <= max_points:
+        return rfm_segmented
+
+    fraction = max_points / len(rfm_segmented)
+    return rfm_segmented.groupby('Customer_Segment', observed=True).sample(frac=fraction, random_state=random_state)
+
+def bin_rfm_segments(rfm_segmented, bins=RFM_BINS):
+    """
+    Aggregates customers into a Recency x Frequency grid per segment, keeping the
+    customer count and average monetary value of every occupied cell.
+    """
+    recency_bins = pd.cut(rfm_segmented['Recency'], bins=bins)
+    frequency_bins = pd.cut(rfm_segmented['Frequency'], bins=bins)
+    binned = rfm_segmented.groupby(['Customer_Segment', recency_bins, frequency_bins], observed=True).agg(
+        Customers=('MonetaryValue', 'size'),
+        MonetaryValue=('MonetaryValue', 'mean')
+    ).reset_index()
+
+    # Plot each cell at its centre
+    binned['Recency'] = binned['Recency'].map(lambda interval: interval.mid).astype(float)
+    binned['Frequency'] = binned['Frequency'].map(lambda interval: interval.mid).astype(float)
+    return binned
+
+@profiling.timed
+def create_rfm_scatter(rfm_segmented, mode='auto', max_points=MAX_SCATTER_POINTS):
     """
     Creates an interactive scatter plot for RFM segments.
+
+    mode is one of 'auto', 'points', 'sample' or 'binned'. 'auto' draws every
+    customer up to max_points and bins the rest, so the browser payload stays bounded.
+    'points' past max_points is drawn with WebGL rather than as SVG markers.
     """
+    px, go = _plotly()
     if rfm_segmented is None:
         return go.Figure()
 
+    total_customers = len(rfm_segmented)
+    if mode == 'auto':
+        mode = 'points' if total_customers <= max_points else 'binned'
+
+    if mode == 'binned':
+        binned = bin_rfm_segments(rfm_segmented)
+        fig = px.scatter(binned,
+                         x='Recency',
+                         y='Frequency',
+                         color='Customer_Segment',
+                         size='Customers',
+                         hover_data={'Customers': True, 'MonetaryValue': ':.2f'},
+                         render_mode='webgl',
+                         title=f'Customer Segments (RFM) - {total_customers:,} customers binned',
+                         labels=RFM_LABELS)
+        return fig
+
+    title = 'Customer Segments (RFM)'
+    if mode == 'sample':
+        rfm_segmented = sample_by_segment(rfm_segmented, max_points)
+        if len(rfm_segmented) < total_customers:
+            title = f'{title} - sample of {len(rfm_segmented):,} of {total_customers:,} customers'
+
     fig = px.scatter(rfm_segmented,
                      x='Recency',
                      y='Frequency',
                      color='Customer_Segment',
                      size='MonetaryValue',
                      hover_name=rfm_segmented.index,
-                     title='Customer Segments (RFM)',
-                     labels={'Recency': 'Days Since Last Purchase', 'Frequency': 'Number of Purchases'})
+                     render_mode='webgl' if len(rfm_segmented) > max_points else 'auto',
+                     title=title,
+                     labels=RFM_LABELS)
     return fig
 
+@profiling.timed
 def create_sales_trend(df):
     """
     Creates a line chart for sales trends over time.
     """
+    px, go = _plotly()
     if df is None:
         return go.Figure()
 
-    sales_by_month = df.set_index('InvoiceDate').groupby(pd.Grouper(freq='M'))['TotalPrice'].sum().reset_index()
+    if isinstance(df, PRE_AGGREGATED_SOURCES):
+        sales_by_month = df.monthly_sales()
+    else:
+        sales_by_month = df.set_index('InvoiceDate').groupby(pd.Grouper(freq='M'))['TotalPrice'].sum().reset_index()
     fig = px.line(sales_by_month,
                   x='InvoiceDate',
                   y='TotalPrice',
@@ -34,14 +115,19 @@ def create_sales_trend(df):
                   labels={'InvoiceDate': 'Month', 'TotalPrice': 'Total Revenue'})
     return fig
 
+@profiling.timed
 def create_top_products_bar(df, top_n=10):
     """
     Creates a bar chart for top-selling products.
     """
+    px, go = _plotly()
     if df is None:
         return go.Figure()
 
-    top_products = df.groupby('Description')['Quantity'].sum().sort_values(ascending=False).head(top_n).reset_index()
+    if isinstance(df, PRE_AGGREGATED_SOURCES):
+        top_products = df.top_products(top_n)
+    else:
+        top_products = df.groupby('Description')['Quantity'].sum().sort_values(ascending=False).head(top_n).reset_index()
     fig = px.bar(top_products,
                  x='Quantity',
                  y='Description',
@@ -51,14 +137,19 @@ def create_top_products_bar(df, top_n=10):
     fig.update_layout(yaxis={'categoryorder': 'total ascending'})
     return fig
 
+@profiling.timed
 def create_country_map(df):
     """
     Creates a choropleth map of sales by country.
     """
+    px, go = _plotly()
     if df is None:
         return go.Figure()
 
-    country_sales = df.groupby('Country')['TotalPrice'].sum().reset_index()
+    if isinstance(df, PRE_AGGREGATED_SOURCES):
+        country_sales = df.country_sales()
+    else:
+        country_sales = df.groupby('Country')['TotalPrice'].sum().reset_index()
     fig = px.choropleth(country_sales,
                         locations='Country',
                         locationmode='country names',
@@ -67,3 +158,20 @@ def create_country_map(df):
                         color_continuous_scale=px.colors.sequential.Plasma,
                         title='Geographic Distribution of Sales')
     return fig
+
+@profiling.timed
+def create_predictive_clv_histogram(predictive_clv):
+    """
+    Creates a histogram of predicted CLV, coloured by country when the models were fitted per country.
+    """
+    px, go = _plotly()
+    if predictive_clv is None:
+        return go.Figure()
+
+    fig = px.histogram(predictive_clv,
+                       x='predicted_clv',
+                       color='Country' if 'Country' in predictive_clv else None,
+                       title='Distribution of Predicted Customer Lifetime Value',
+                       labels={'predicted_clv': 'Predicted CLV ($)'},
+                       nbins=50)
+    return fig
@@ -0,0 +1,56 @@
+import importlib
+import os
+import threading
+import time
+
+# Loaded on first use by the pages that need them; imported in the background after the first paint
+HEAVY_MODULES = ['plotly.express', 'plotly.graph_objects', 'lifetimes', 'lifetimes.utils']
+# Set DASHBOARD_PREWARM=0 to leave every import to first use, e.g. to measure it
+PREWARM_ENABLED = os.getenv('DASHBOARD_PREWARM', '1') != '0'
+
+_lock = threading.Lock()
+_thread = None
+# Seconds each module took to import on the pre-warm thread
+timings = {}
+
+
+def prewarm(modules=HEAVY_MODULES):
+    """
+    Imports modules on a background thread, once per server process, so the first
+    visit to a chart or predictive CLV page does not wait for them.
+
+    Call it after the page is drawn: imports hold the GIL, so starting earlier
+    slows the first paint. A page that needs a module still being imported waits
+    for it on Python's import lock, never importing it twice.
+    """
+    global _thread
+    if not PREWARM_ENABLED:
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_import_all, args=(list(modules),), name='dashboard-prewarm',
+                                       daemon=True)
+            _thread.start()
+    return _thread
+
+
+def wait(timeout=None):
+    """
+    Blocks until the pre-warm thread has finished; returns False if it is still running.
+    """
+    thread = _thread
+    if thread is not None:
+        thread.join(timeout)
+        return not thread.is_alive()
+    return True
+
+
+def _import_all(modules):
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            # The page that needs it reports the missing dependency when it is opened
+            continue
+        timings[name] = time.perf_counter() - start
@@ -1,11 +1,13 @@
 from fastapi import FastAPI
+import gc
+import os
 import pickle
 import numpy as np
 from pydantic import BaseModel
 
 app = FastAPI()
 
-# Load the model and scaler
+# Load the model and scaler; serve.py imports this module once and forks workers that share them
 with open('fraud_model.pkl', 'rb') as f:
     model = pickle.load(f)
 with open('scaler.pkl', 'rb') as f:
@@ -31,4 +33,14 @@ async def predict_fraud(claim: ClaimData):
     return {
         "fraud_predicted": bool(prediction),
         "fraud_probability": float(probability)
-    }
\ No newline at end of file
+    }
+
+# Readiness probe: answers once the model is loaded and this worker accepts requests
+@app.get("/ready")
+async def ready():
+    return {
+        "status": "ready",
+        "worker_pid": os.getpid(),
+        # Objects the serving parent loaded and froze before forking; 0 under plain uvicorn
+        "frozen_objects": gc.get_freeze_count()
+    }
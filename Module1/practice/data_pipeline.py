@@ -2,6 +2,10 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import sqlalchemy
+import argparse
+import hashlib
+import inspect
+import json
 import logging
 import os
 
@@ -11,6 +15,8 @@ OUTPUT_DIR = "output"
 DATABASE_PATH = os.path.join(OUTPUT_DIR, "sales_data.db")
 LOG_FILE_PATH = os.path.join(OUTPUT_DIR, "data_pipeline.log")
 TOP_N_PRODUCTS = 10
+# Stage results and fingerprints; delete it (or run with --force) to rebuild everything
+CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
 
 # --- Setup Logging ---
 logging.basicConfig(
@@ -61,15 +67,81 @@ def store_in_database(df):
     df.to_sql('sales', engine, if_exists='replace', index=False)
     logging.info(f"Data stored in database at {DATABASE_PATH}")
 
-def main():
+# --- Stage Caching ---
+def file_digest(path):
+    """SHA-256 of a file's contents, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def data_digest(data):
+    """SHA-256 of a DataFrame's or Series' values, index, labels and dtypes."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    labels = data.dtypes.to_dict() if isinstance(data, pd.DataFrame) else {data.name: data.dtype}
+    digest.update(repr(sorted((str(k), str(v)) for k, v in labels.items())).encode())
+    return digest.hexdigest()
+
+def stage_fingerprint(stage, inputs, params):
+    """Fingerprint of everything a stage's result depends on: its code, input digests and parameters."""
+    parts = {'stage': stage.__name__, 'code': inspect.getsource(stage), 'inputs': inputs, 'params': params}
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+def run_stage(stage, compute, inputs, params=None, outputs=(), force=False):
+    """Runs compute() unless the stage last ran with the same fingerprint and its outputs are untouched.
+
+    Returns the stage's result and a digest of it (of its output files for stages that only write
+    files) that downstream stages use as their input, so they re-run only when it actually changed.
+    """
+    name = stage.__name__
+    fingerprint = stage_fingerprint(stage, inputs, params or {})
+    manifest_path = os.path.join(CACHE_DIR, f"{name}.json")
+    result_path = os.path.join(CACHE_DIR, f"{name}.pkl")
+
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if (manifest['fingerprint'] == fingerprint
+                and all(file_digest(path) == digest for path, digest in manifest['outputs'].items())
+                and (not manifest['has_result'] or os.path.exists(result_path))):
+            logging.info(f"Skipping {name}: inputs unchanged since the last run")
+            result = pd.read_pickle(result_path) if manifest['has_result'] else None
+            return result, manifest['digest']
+
+    result = compute()
+    output_digests = {path: file_digest(path) for path in outputs}
+    if result is not None:
+        pd.to_pickle(result, result_path)
+        digest = data_digest(result)
+    else:
+        digest = hashlib.sha256(json.dumps(output_digests, sort_keys=True).encode()).hexdigest()
+    with open(manifest_path, 'w') as f:
+        json.dump({'fingerprint': fingerprint, 'digest': digest, 'has_result': result is not None,
+                   'outputs': output_digests}, f, indent=2)
+    return result, digest
+
+def main(force=False):
     """Main function to run the data pipeline."""
     logging.info("Starting data pipeline...")
     try:
-        df = pd.read_csv(INPUT_CSV_PATH)
-        df = clean_data(df)
-        top_products = generate_insights(df)
-        create_visualisations(top_products)
-        store_in_database(df)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # The CSV is only read when the cleaned data is not already cached for its contents
+        csv_digest = file_digest(INPUT_CSV_PATH)
+        if csv_digest is None:
+            raise FileNotFoundError(INPUT_CSV_PATH)
+        df, df_digest = run_stage(clean_data, lambda: clean_data(pd.read_csv(INPUT_CSV_PATH)),
+                                  inputs=[csv_digest], force=force)
+        top_products, top_products_digest = run_stage(
+            generate_insights, lambda: generate_insights(df), inputs=[df_digest],
+            params={'TOP_N_PRODUCTS': TOP_N_PRODUCTS}, force=force)
+        chart_path = os.path.join(OUTPUT_DIR, "top_products_revenue.png")
+        run_stage(create_visualisations, lambda: create_visualisations(top_products), inputs=[top_products_digest],
+                  params={'TOP_N_PRODUCTS': TOP_N_PRODUCTS}, outputs=[chart_path], force=force)
+        run_stage(store_in_database, lambda: store_in_database(df), inputs=[df_digest],
+                  params={'DATABASE_PATH': DATABASE_PATH}, outputs=[DATABASE_PATH], force=force)
     except FileNotFoundError:
         logging.error(f"Error: Input file not found at {INPUT_CSV_PATH}")
     except Exception as e:
@@ -77,4 +149,6 @@ def main():
     logging.info("Data pipeline finished.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Clean, analyse, plot and store the sales data.")
+    parser.add_argument('--force', action='store_true', help="re-run every stage, ignoring cached results")
+    main(force=parser.parse_args().force)
@@ -0,0 +1,180 @@
+"""
+Production server for the fraud API: the model is loaded once and shared by forked workers.
+
+`uvicorn app:app --workers N` starts each worker as a fresh interpreter that unpickles
+its own RandomForest, so memory grows with every worker. Here the parent imports app
+(loading the model and scaler), binds the port and forks the workers, which share the
+parent's pages copy-on-write. The collector is disabled while loading and everything
+loaded is frozen before forking (gc.freeze), so collections in the workers never write
+to the shared objects' headers and the pages stay shared. The parent restarts workers
+that die and passes SIGTERM/SIGINT on for a graceful shutdown. Run from the practice
+directory after fraud_detection.py has written the model:
+
+    python serve.py --workers 4 --port 8000
+    curl localhost:8000/ready
+
+Forking needs a POSIX system; elsewhere a single worker is served in-process.
+"""
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger('serve')
+
+# A worker that exits sooner than this after starting is failing at startup
+MIN_WORKER_SECONDS = 5
+RESTART_DELAY_SECONDS = 1
+SHUTDOWN_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default=os.getenv('FRAUD_API_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('FRAUD_API_PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('FRAUD_API_WORKERS', os.cpu_count() or 1)),
+                        help='worker processes (default: FRAUD_API_WORKERS or the number of CPUs)')
+    parser.add_argument('--backlog', type=int, default=2048, help='pending connections the socket queues')
+    parser.add_argument('--no-preload', dest='preload', action='store_false',
+                        help='load the model in every worker after forking, like uvicorn --workers (for comparison)')
+    parser.add_argument('--no-freeze', dest='freeze', action='store_false',
+                        help='leave the preloaded objects to the collector (for comparison)')
+    parser.add_argument('--access-log', action='store_true', help='log every request')
+    parser.add_argument('--log-level', default='info')
+    return parser.parse_args(argv)
+
+
+def bind_socket(host, port, backlog):
+    """
+    Binds the listening socket in the parent; every worker accepts on the same one.
+    """
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def server_config(args):
+    import uvicorn
+    from app import app
+
+    return uvicorn.Config(app, host=args.host, port=args.port, backlog=args.backlog, log_level=args.log_level,
+                          access_log=args.access_log)
+
+
+def run_worker(sock, args):
+    """
+    Runs in a forked child: serves the app on the inherited socket until uvicorn shuts down.
+    """
+    # Frozen objects are ignored by collections, so re-enabling the collector leaves the shared pages alone
+    gc.enable()
+    # Drop the parent's handlers before unblocking; uvicorn installs its own for a graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, SHUTDOWN_SIGNALS)
+    import uvicorn
+
+    uvicorn.Server(server_config(args)).run(sockets=[sock])
+
+
+def spawn_worker(sock, args):
+    # Blocked across the fork, so a signal cannot reach the child while it still has the parent's handlers
+    signal.pthread_sigmask(signal.SIG_BLOCK, SHUTDOWN_SIGNALS)
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            run_worker(sock, args)
+            status = 0
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+        finally:
+            # Never return into the parent's supervision loop
+            os._exit(status)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, SHUTDOWN_SIGNALS)
+    logger.info("Started worker %d", pid)
+    return pid
+
+
+def preload(freeze=True):
+    """
+    Imports the app in the parent so the model and scaler are in memory before forking.
+    """
+    # No collections while loading: freed objects would leave holes in pages the workers share
+    gc.disable()
+    started = time.perf_counter()
+    # The server's modules too, so the workers share them rather than each importing its own
+    importlib.import_module('uvicorn')
+    importlib.import_module('app')  # unpickles the model and scaler
+    loaded = time.perf_counter() - started
+    if freeze:
+        gc.freeze()
+    logger.info("Loaded the model in %.2fs; %d objects frozen for the workers", loaded, gc.get_freeze_count())
+
+
+def supervise(sock, args):
+    """
+    Keeps args.workers workers running until SIGTERM or SIGINT, then stops them and waits.
+    """
+    stopping = False
+    workers = {}
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(args.workers):
+        workers[spawn_worker(sock, args)] = time.monotonic()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = workers.pop(pid, None)
+        if started is None or stopping:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        logger.warning("Worker %d exited with %d; starting a replacement", pid, code)
+        if time.monotonic() - started < MIN_WORKER_SECONDS:
+            time.sleep(RESTART_DELAY_SECONDS)
+        if not stopping:
+            workers[spawn_worker(sock, args)] = time.monotonic()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s [%(process)d] %(message)s')
+
+    if not hasattr(os, 'fork'):
+        import uvicorn
+        logger.warning("Forking is not available here; serving a single worker")
+        uvicorn.Server(server_config(args)).run()
+        return
+
+    if args.preload:
+        preload(args.freeze)
+    sock = bind_socket(args.host, args.port, args.backlog)
+    logger.info("Serving on %s:%d with %d workers (model %s)", args.host, args.port, args.workers,
+                'shared' if args.preload else 'loaded per worker')
+    supervise(sock, args)
+    sock.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
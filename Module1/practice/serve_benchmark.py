@@ -0,0 +1,160 @@
+"""
+Measures memory per worker and aggregate throughput of serve.py as workers are added.
+
+For every worker count and mode it starts serve.py, waits for /ready, sends /predict
+requests from concurrent keep-alive clients for a fixed time, then reads each
+process's memory from /proc/<pid>/smaps_rollup (Linux only):
+
+- RSS: every resident page the process maps, including pages shared with the others.
+- private: pages only this process uses, i.e. what adding a worker really costs.
+- PSS: shared pages split between the processes that map them. Summed over the parent
+  and the workers, it is the server's total memory.
+
+The "shared" mode preloads the model and freezes it; "per-worker" loads it in every
+worker, as `uvicorn app:app --workers N` would. Run from the practice directory after
+fraud_detection.py has written the model:
+
+    python serve_benchmark.py --workers 1,2,4,8 --seconds 20
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = {'shared': [], 'no-freeze': ['--no-freeze'], 'per-worker': ['--no-preload']}
+CLAIM = json.dumps({'claim_amount': 5200.0, 'policy_age': 3.5, 'customer_history': 2})
+HEADERS = {'Content-Type': 'application/json'}
+
+
+def memory_kb(pid):
+    """Returns the RSS, PSS and private memory of a process in kB"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {'rss': fields['Rss'], 'pss': fields['Pss'],
+            'private': fields['Private_Clean'] + fields['Private_Dirty']}
+
+
+def worker_pids(parent_pid):
+    with open(f'/proc/{parent_pid}/task/{parent_pid}/children') as file:
+        return [int(pid) for pid in file.read().split()]
+
+
+def wait_until_ready(port, parent_pid, workers, timeout=120):
+    """Waits until the server answers /ready and every worker has been forked"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/ready')
+            status = connection.getresponse().status
+            connection.close()
+            if status == 200 and len(worker_pids(parent_pid)) == workers:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"serve.py on port {port} was not ready after {timeout}s")
+
+
+def run_load(port, clients, seconds):
+    """Sends /predict from `clients` threads for `seconds`; returns the request latencies in seconds"""
+    latencies, errors = [], []
+    stop_at = time.monotonic() + seconds
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        own = []
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                connection.request('POST', '/predict', body=CLAIM, headers=HEADERS)
+                response = connection.getresponse()
+                response.read()
+            except OSError as error:
+                errors.append(error)
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            if response.status == 200:
+                own.append(time.perf_counter() - started)
+            else:
+                errors.append(response.status)
+        latencies.extend(own)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        print(f"  {len(errors)} failed requests, e.g. {errors[0]!r}", file=sys.stderr)
+    return latencies
+
+
+def measure(mode, workers, args):
+    command = [sys.executable, 'serve.py', '--workers', str(workers), '--port', str(args.port),
+               '--host', '127.0.0.1', '--log-level', 'warning'] + MODES[mode]
+    server = subprocess.Popen(command, cwd=HERE)
+    try:
+        wait_until_ready(args.port, server.pid, workers)
+        run_load(args.port, args.clients, args.warmup)
+        latencies = run_load(args.port, args.clients, args.seconds)
+        # Read after the load, once the workers have touched everything a request uses
+        parent = memory_kb(server.pid)
+        children = [memory_kb(pid) for pid in worker_pids(server.pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'workers': workers,
+        'requests_per_second': len(latencies) / args.seconds,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else float('nan'),
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float('nan'),
+        'worker_rss_mb': statistics.mean(child['rss'] for child in children) / 1024,
+        'worker_private_mb': statistics.mean(child['private'] for child in children) / 1024,
+        'total_pss_mb': (parent['pss'] + sum(child['pss'] for child in children)) / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts to try')
+    parser.add_argument('--modes', default='shared,per-worker', help=f"comma separated, from {', '.join(MODES)}")
+    parser.add_argument('--clients', type=int, default=16, help='concurrent keep-alive connections')
+    parser.add_argument('--seconds', type=float, default=10, help='measured load per run')
+    parser.add_argument('--warmup', type=float, default=2, help='unmeasured load before each run')
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':<11} {'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'RSS/worker':>11} {'private/worker':>15} {'total PSS':>10}")
+    for mode in args.modes.split(','):
+        for workers in [int(value) for value in args.workers.split(',')]:
+            result = measure(mode, workers, args)
+            results.append(result)
+            print(f"{mode:<11} {workers:>7} {result['requests_per_second']:>9.1f} {result['p50_ms']:>8.1f} "
+                  f"{result['p99_ms']:>8.1f} {result['worker_rss_mb']:>9.1f}MB {result['worker_private_mb']:>13.1f}MB "
+                  f"{result['total_pss_mb']:>8.1f}MB", flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
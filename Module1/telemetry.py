@@ -0,0 +1,274 @@
+"""
+Prometheus metrics and request correlation ids for the meeting API.
+
+Metrics are kept in memory and served in the Prometheus text format at /metrics;
+there is no client library to install. Every request gets a correlation id (the
+caller's X-Request-ID, or a new one) that is logged, returned in the response
+and sent on to n8n, so one slow meeting can be followed through every system.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+
+# Seconds; from a rejected payload to a workflow that runs for minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Bytes; from a few lines of notes to a long transcript with its chunks
+SIZE_BUCKETS = (512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+# Taken from the caller when present, returned on every response and sent on to n8n
+CORRELATION_HEADER = 'X-Request-ID'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return '+Inf' if value == float('inf') else repr(float(value))
+
+
+class _Value:
+    """One counter or gauge time series"""
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = float(value)
+
+
+class _Buckets:
+    """One histogram time series; counts are kept per bucket and made cumulative when exported"""
+    __slots__ = ('_lock', '_bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Metric:
+    """A metric family with one time series per combination of label values.
+
+    Label values are looked up without a lock; only a new combination takes one.
+    Pass them as strings, in labelnames order.
+    """
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_series(self) -> Any:
+        return _Value()
+
+    def labels(self, *values: str) -> Any:
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                series = self._series.setdefault(values, self._new_series())
+        return series
+
+    def _samples(self, values: Tuple[str, ...], series: Any) -> Iterator[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(series.value)}"
+
+    def exposition(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for values, series in list(self._series.items()):
+            yield from self._samples(values, series)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def _samples(self, values: Tuple[str, ...], series: _Buckets) -> Iterator[str]:
+        with series._lock:
+            counts, total = list(series.counts), series.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames + ('le',), values + (_format_value(bound),))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, values)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def exposition(self) -> str:
+        return '\n'.join(line for metric in self.metrics for line in metric.exposition()) + '\n'
+
+
+class ApiMetrics:
+    """The meeting API's metrics"""
+
+    def __init__(self, registry: Optional[Registry] = None):
+        self.registry = registry or Registry()
+        register = self.registry.register
+        self.requests = register(Counter(
+            'meeting_api_requests_total', 'Requests handled, by route and response status',
+            ('method', 'route', 'status')))
+        self.errors = register(Counter(
+            'meeting_api_errors_total', 'Responses with a 4xx or 5xx status, by route and status',
+            ('route', 'status')))
+        self.request_duration = register(Histogram(
+            'meeting_api_request_duration_seconds',
+            'Time from receiving a request to sending the end of its response, by route and meeting type',
+            ('method', 'route', 'meeting_type'), LATENCY_BUCKETS))
+        self.request_size = register(Histogram(
+            'meeting_api_request_size_bytes', 'Size of request bodies, by route', ('route',), SIZE_BUCKETS))
+        self.in_flight = register(Gauge(
+            'meeting_api_requests_in_flight', 'Requests being handled, including open progress streams',
+            ('route',)))
+        self.webhook_duration = register(Histogram(
+            'meeting_api_webhook_duration_seconds',
+            'Round trip to the n8n webhook, by meeting type and its status code (or "error")',
+            ('meeting_type', 'outcome'), LATENCY_BUCKETS))
+        self.webhook_payload_size = register(Histogram(
+            'meeting_api_webhook_payload_bytes', 'Size of the JSON sent to n8n, by meeting type',
+            ('meeting_type',), SIZE_BUCKETS))
+        self.webhook_in_flight = register(Gauge(
+            'meeting_api_webhook_requests_in_flight', 'Requests waiting for n8n to answer'))
+
+    @contextmanager
+    def webhook_call(self, meeting_type: str, payload_bytes: int) -> Iterator[Dict[str, str]]:
+        """Time a round trip to n8n; set call['outcome'] to the status code once it answers"""
+        self.webhook_payload_size.labels(meeting_type).observe(payload_bytes)
+        call = {'outcome': 'error'}
+        waiting = self.webhook_in_flight.labels()
+        waiting.inc()
+        started = time.perf_counter()
+        try:
+            yield call
+        finally:
+            waiting.dec()
+            self.webhook_duration.labels(meeting_type, call['outcome']).observe(time.perf_counter() - started)
+
+
+def correlation_id() -> str:
+    """The current request's correlation id, or "-" outside a request"""
+    return g.get('correlation_id', '-') if has_request_context() else '-'
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Adds the current request's correlation id to log records as %(correlation_id)s"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id()
+        return True
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    logging.basicConfig(level=level, format='%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s')
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(CorrelationIdFilter())
+
+
+def instrument(app: Flask, metrics: Optional[ApiMetrics] = None) -> ApiMetrics:
+    """Record metrics and a correlation id for every request, and serve the metrics at /metrics.
+
+    Routes can set g.meeting_type once they know it; it labels the request duration.
+    """
+    metrics = metrics or ApiMetrics()
+
+    # g and request are proxies that look up the current context on every access, so they are
+    # resolved once, and the WSGI environ is read directly rather than building header objects
+    header_key = 'HTTP_' + CORRELATION_HEADER.upper().replace('-', '_')
+
+    @app.before_request
+    def start_request():
+        state, current = g._get_current_object(), request._get_current_object()
+        state.request_started = time.perf_counter()
+        # Same length and alphabet as a uuid4 hex, without building a UUID
+        state.correlation_id = current.environ.get(header_key) or os.urandom(16).hex()
+        state.meeting_type = 'none'
+        # The rule, not the path, so label values stay few
+        state.route = current.url_rule.rule if current.url_rule else 'unmatched'
+        metrics.in_flight.labels(state.route).inc()
+        content_length = current.environ.get('CONTENT_LENGTH')
+        if content_length and content_length.isdigit():
+            metrics.request_size.labels(state.route).observe(int(content_length))
+
+    @app.after_request
+    def finish_request(response: Response) -> Response:
+        state = g._get_current_object()
+        response.headers[CORRELATION_HEADER] = state.correlation_id
+        method, status = request.method, response.status_code
+
+        # Runs once the body is sent, so progress streams are timed to their last event
+        def record():
+            metrics.in_flight.labels(state.route).dec()
+            metrics.requests.labels(method, state.route, str(status)).inc()
+            if status >= 400:
+                metrics.errors.labels(state.route, str(status)).inc()
+            metrics.request_duration.labels(method, state.route, state.meeting_type).observe(
+                time.perf_counter() - state.request_started)
+
+        response.call_on_close(record)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics_endpoint():
+        """Metrics in the Prometheus text format"""
+        return Response(metrics.registry.exposition(), content_type=CONTENT_TYPE)
+
+    return metrics
@@ -31,5 +31,42 @@ def test_meeting_api():
     except Exception as e:
         print(f"Error: {e}")
 
+def test_meeting_api_stream():
+    """Test the streaming endpoint, printing progress events as they arrive"""
+    
+    payload = {
+        "meeting_notes": """
+        Client call with Acme about the proposal.
+        
+        Customer feedback: the scope is right but the timeline is tight.
+        Sarah to send a revised contract by Friday.
+        """,
+        "attendees": "Sarah Johnson, Acme team"
+    }
+    
+    try:
+        with requests.post("http://localhost:5000/meeting/analyse/stream", json=payload, stream=True) as response:
+            print(f"Status: {response.status_code}")
+            for line in response.iter_lines(chunk_size=1, decode_unicode=True):
+                if line:
+                    print(line)
+        
+    except Exception as e:
+        print(f"Error: {e}")
+
+def test_meeting_search():
+    """Test searching the meetings analysed above by keyword and by action item owner"""
+    
+    try:
+        for params in ({"q": "auth*"}, {"owner": "sarah", "type": "client"}):
+            response = requests.get("http://localhost:5000/meetings/search", params=params)
+            print(f"Status: {response.status_code}")
+            print(f"Response: {json.dumps(response.json(), indent=2)}")
+        
+    except Exception as e:
+        print(f"Error: {e}")
+
 if __name__ == "__main__":
     test_meeting_api()
+    test_meeting_api_stream()
+    test_meeting_search()
@@ -0,0 +1,226 @@
+import io
+import re
+import shutil
+import subprocess
+import wave
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Stay safely below OpenAI's 25MB transcription limit
+MAX_CHUNK_BYTES = 24 * 1024 * 1024
+# How far back from the size limit to look for a quiet place to cut
+SILENCE_SEARCH_SECONDS = 30.0
+# Energy window used to find silence in PCM audio
+ENERGY_WINDOW_SECONDS = 0.05
+
+# MPEG audio Layer III header tables, indexed by version bits ('1' = MPEG-1, '2' = MPEG-2 and 2.5)
+MP3_BITRATES = {
+    '1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    '2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+}
+MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+@dataclass
+class AudioChunk:
+    """A self-contained, playable segment of a longer recording"""
+    index: int
+    data: bytes
+    start_seconds: float
+    end_seconds: float
+    file_name: str
+    mime_type: str
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+def _chunk_name(file_name: str, index: int) -> str:
+    stem, _, extension = file_name.rpartition('.')
+    return f"{stem or file_name}.part{index + 1:03d}.{extension}"
+
+
+def choose_cut_points(boundaries: Sequence[float], sizes: Sequence[int], max_bytes: int,
+                      quietness: Optional[Sequence[float]] = None,
+                      search_seconds: float = SILENCE_SEARCH_SECONDS) -> List[int]:
+    """Pick segment boundaries so every segment stays under max_bytes.
+
+    boundaries[i] is the start time of unit i (a WAV energy window or an MP3
+    frame) and sizes[i] its size in bytes. Within the last search_seconds before
+    a segment would exceed max_bytes, the unit with the lowest quietness score
+    (energy) is chosen as the cut. Returns the indexes of the units that start
+    each segment after the first.
+    """
+    cuts = []
+    start, used = 0, 0
+    for i, size in enumerate(sizes):
+        if used + size <= max_bytes or i == start:
+            used += size
+            continue
+
+        cut = i
+        if quietness is not None:
+            window_start = start + 1
+            while window_start < i and boundaries[window_start] < boundaries[i] - search_seconds:
+                window_start += 1
+            if window_start < i:
+                cut = window_start + int(np.argmin(quietness[window_start:i]))
+
+        cuts.append(cut)
+        start = cut
+        used = sum(sizes[cut:i + 1])
+    return cuts
+
+
+def _pcm_energy(frames: bytes, sample_width: int, channels: int, window_frames: int) -> Optional[np.ndarray]:
+    """RMS energy of consecutive windows of PCM audio, or None for unsupported sample widths"""
+    dtypes = {1: np.uint8, 2: np.int16, 4: np.int32}
+    if sample_width not in dtypes:
+        return None
+
+    samples = np.frombuffer(frames, dtype=dtypes[sample_width]).astype(np.float32)
+    if sample_width == 1:
+        samples -= 128  # 8-bit WAV is unsigned
+    usable = len(samples) - len(samples) % (window_frames * channels)
+    windows = samples[:usable].reshape(-1, window_frames * channels)
+    return np.sqrt(np.mean(windows ** 2, axis=1))
+
+
+def split_wav(data: bytes, file_name: str, max_bytes: int = MAX_CHUNK_BYTES) -> List[AudioChunk]:
+    """Split PCM WAV audio into segments cut in the quietest spot near each size limit"""
+    with wave.open(io.BytesIO(data)) as source:
+        params = source.getparams()
+        frames = source.readframes(params.nframes)
+
+    bytes_per_frame = params.sampwidth * params.nchannels
+    window_frames = max(1, int(params.framerate * ENERGY_WINDOW_SECONDS))
+    window_bytes = window_frames * bytes_per_frame
+    window_count = -(-len(frames) // window_bytes)
+
+    energy = _pcm_energy(frames, params.sampwidth, params.nchannels, window_frames)
+    if energy is not None and len(energy) < window_count:
+        # The trailing partial window is never a better cut than its neighbours
+        energy = np.append(energy, np.inf)
+
+    boundaries = [i * ENERGY_WINDOW_SECONDS for i in range(window_count)]
+    # Leave room for the 44-byte header every segment gets
+    cuts = choose_cut_points(boundaries, [window_bytes] * window_count, max_bytes - 64, energy)
+
+    chunks = []
+    edges = [0] + cuts + [window_count]
+    for index, (first, last) in enumerate(zip(edges, edges[1:])):
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as target:
+            target.setparams(params)
+            target.writeframes(frames[first * window_bytes:last * window_bytes])
+        end_frame = min(last * window_frames, len(frames) // bytes_per_frame)
+        chunks.append(AudioChunk(index, buffer.getvalue(), first * window_frames / params.framerate,
+                                 end_frame / params.framerate, _chunk_name(file_name, index), 'audio/wav'))
+    return chunks
+
+
+def _id3_size(data: bytes) -> int:
+    """Length of a leading ID3v2 tag, which is not part of the audio frames"""
+    if data[:3] != b'ID3' or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+def parse_mp3_frames(data: bytes) -> List[Tuple[int, int, float]]:
+    """Return (offset, length, duration in seconds) for every MPEG Layer III frame"""
+    frames = []
+    offset = _id3_size(data)
+    end = len(data)
+    while offset + 4 <= end:
+        header = int.from_bytes(data[offset:offset + 4], 'big')
+        version_bits = (header >> 19) & 0b11
+        layer_bits = (header >> 17) & 0b11
+        bitrate_index = (header >> 12) & 0b1111
+        sample_rate_index = (header >> 10) & 0b11
+        padding = (header >> 9) & 0b1
+
+        valid = ((header >> 21) & 0x7FF) == 0x7FF and version_bits != 1 and layer_bits == 1 \
+            and 0 < bitrate_index < 15 and sample_rate_index != 3
+        if not valid:
+            # Skip junk such as a trailing ID3v1 tag or corrupt bytes
+            offset += 1
+            continue
+
+        mpeg1 = version_bits == 3
+        bitrate = MP3_BITRATES['1' if mpeg1 else '2'][bitrate_index] * 1000
+        sample_rate = MP3_SAMPLE_RATES[version_bits][sample_rate_index]
+        samples = 1152 if mpeg1 else 576
+        length = (samples // 8) * bitrate // sample_rate + padding
+        frames.append((offset, length, samples / sample_rate))
+        offset += length
+    return frames
+
+
+def detect_silence(data: bytes, noise_db: float = -35.0, min_seconds: float = 0.4) -> List[Tuple[float, float]]:
+    """Find silent intervals with ffmpeg's silencedetect filter; empty if ffmpeg is not installed"""
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return []
+
+    process = subprocess.run(
+        [ffmpeg, '-hide_banner', '-nostats', '-i', 'pipe:0', '-af',
+         f'silencedetect=noise={noise_db}dB:d={min_seconds}', '-f', 'null', '-'],
+        input=data, capture_output=True
+    )
+    log = process.stderr.decode('utf-8', errors='replace')
+    starts = [float(value) for value in re.findall(r'silence_start: ([\d.]+)', log)]
+    ends = [float(value) for value in re.findall(r'silence_end: ([\d.]+)', log)]
+    return list(zip(starts, ends))
+
+
+def split_mp3(data: bytes, file_name: str, max_bytes: int = MAX_CHUNK_BYTES) -> List[AudioChunk]:
+    """Split an MP3 at frame boundaries, preferring cuts inside silences found by ffmpeg"""
+    frames = parse_mp3_frames(data)
+    if not frames:
+        raise ValueError("No MP3 audio frames found")
+
+    boundaries, elapsed = [], 0.0
+    for _, _, duration in frames:
+        boundaries.append(elapsed)
+        elapsed += duration
+
+    quietness = None
+    silences = detect_silence(data)
+    if silences:
+        # Frames closest to the middle of a silence score lowest
+        starts = np.array(boundaries)
+        quietness = np.full(len(frames), np.inf)
+        for silence_start, silence_end in silences:
+            inside = (starts >= silence_start) & (starts <= silence_end)
+            middle = (silence_start + silence_end) / 2
+            quietness[inside] = np.abs(starts[inside] - middle)
+
+    cuts = choose_cut_points(boundaries, [length for _, length, _ in frames], max_bytes, quietness)
+
+    chunks = []
+    edges = [0] + cuts + [len(frames)]
+    for index, (first, last) in enumerate(zip(edges, edges[1:])):
+        start = frames[first][0]
+        end = frames[last - 1][0] + frames[last - 1][1]
+        end_seconds = boundaries[last] if last < len(frames) else elapsed
+        chunks.append(AudioChunk(index, data[start:end], boundaries[first], end_seconds,
+                                 _chunk_name(file_name, index), 'audio/mpeg'))
+    return chunks
+
+
+def split_audio(file, max_bytes: int = MAX_CHUNK_BYTES) -> List[AudioChunk]:
+    """Split an uploaded .mp3 or .wav file into segments no larger than max_bytes"""
+    file.seek(0)
+    data = file.read()
+    file.seek(0)
+
+    name = file.name.lower()
+    if name.endswith('.wav'):
+        return split_wav(data, file.name, max_bytes)
+    if name.endswith('.mp3'):
+        return split_mp3(data, file.name, max_bytes)
+    raise ValueError(f"Unsupported audio format: {file.name}")
@@ -0,0 +1,94 @@
+"""
+Compares the weighted meeting classifier with the keyword scan it replaced.
+
+Transcripts of growing size are generated from a realistic mix of filler words
+and meeting vocabulary. Run from the module2 directory:
+
+    python -m benchmarks.classifier_benchmark --sizes 10000,100000,1000000,5000000
+"""
+import argparse
+import random
+import re
+import time
+
+from meeting_classifier import MEETING_PATTERNS, MeetingClassifier
+
+FILLER = ("so the and we that is was it for on with as our this they be at have from or had by not but "
+          "what all were when can there think just okay yeah right next week team update let me share").split()
+VOCABULARY = [phrase.replace('.?', '-') for weighted in MEETING_PATTERNS.values()
+              for pattern, _ in weighted for phrase in pattern.split('|')]
+
+
+def legacy_predict_meeting_type(content):
+    """The substring scan predict_meeting_type used before the weighted classifier"""
+    if not content or len(content.strip()) < 10:
+        return {'predicted_type': 'general', 'confidence': 0.1}
+    content_lower = content.lower()
+    scores = {'standup': 0, 'strategy': 0, 'client': 0, 'general': 0}
+    keywords = {
+        'standup': ['standup', 'daily', 'scrum', 'yesterday', 'today', 'blocker', 'blocked', 'sprint'],
+        'strategy': ['strategy', 'roadmap', 'planning', 'goal', 'objective', 'quarterly', 'vision', 'initiative'],
+        'client': ['client', 'customer', 'proposal', 'contract', 'delivery', 'external', 'requirement', 'feedback']
+    }
+    for meeting_type, words in keywords.items():
+        for word in words:
+            if word in content_lower:
+                scores[meeting_type] += 2
+    max_score = max(scores.values())
+    predicted_type = 'general' if max_score < 2 else max(scores, key=scores.get)
+    return {'predicted_type': predicted_type, 'confidence': min(max_score / 10, 1.0), 'scores': scores}
+
+
+def separate_regex_scores(content):
+    """Reference scoring the way the n8n node does it: one regex scan per pattern"""
+    content = content.lower()
+    scores = dict.fromkeys(list(MEETING_PATTERNS) + ['general'], 0)
+    for meeting_type, weighted in MEETING_PATTERNS.items():
+        for pattern, weight in weighted:
+            scores[meeting_type] += len(re.findall(pattern, content)) * weight
+    return scores
+
+
+def generate_transcript(size, keyword_rate=0.03, seed=0):
+    """Random speech-like text of about size characters"""
+    rng = random.Random(seed)
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(VOCABULARY) if rng.random() < keyword_rate else rng.choice(FILLER)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def best_of(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000,5000000', help='comma separated transcript sizes')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'chars':>10} {'legacy scan':>12} {'n8n regexes':>12} {'classifier':>11} {'cached':>9}  same scores")
+    for size in [int(value) for value in args.sizes.split(',')]:
+        transcript = generate_transcript(size)
+        legacy = best_of(lambda: legacy_predict_meeting_type(transcript), args.repeats)
+        reference = best_of(lambda: separate_regex_scores(transcript), args.repeats)
+        # A fresh classifier per repeat so every run misses the cache
+        cold = best_of(lambda: MeetingClassifier().classify(transcript), args.repeats)
+        classifier = MeetingClassifier()
+        classifier.classify(transcript)
+        cached = best_of(lambda: classifier.classify(transcript), args.repeats)
+        same = classifier.score(transcript) == separate_regex_scores(transcript)
+        print(f"{len(transcript):>10,} {legacy * 1000:>10.2f}ms {reference * 1000:>10.2f}ms "
+              f"{cold * 1000:>9.2f}ms {cached * 1000:>7.2f}ms  {same}")
+
+
+if __name__ == '__main__':
+    main()
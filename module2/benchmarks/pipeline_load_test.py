@@ -0,0 +1,103 @@
+"""
+Load-tests the meeting pipeline offline against the local workflow simulator.
+
+By default a simulator is started in-process and meetings are posted straight to its
+webhook, the way the uploaders send text. Point --url at Module1/app.py (with --api,
+and N8N_WEBHOOK_URL set to a running simulator) to measure the API in front of it.
+With --sheet-writer the Sheets nodes go through a batching sheet_writer.py in front of a
+fake Sheets API instead of paying --sheets-latency per row. Run from the module2 directory:
+
+    python -m benchmarks.pipeline_load_test --requests 40 --concurrency 8 --ai-latency 0.5
+    python -m benchmarks.pipeline_load_test --requests 40 --concurrency 8 --ai-latency 0.5 --sheet-writer
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from benchmarks.classifier_benchmark import generate_transcript
+import fake_sheets
+import sheet_writer
+from workflow_simulator import StubLatency, WorkflowSimulator, serve
+
+
+def webhook_payload(transcript: str, index: int) -> dict:
+    """The JSON body send_text_to_n8n posts"""
+    return {'transcript': transcript, 'text': transcript, 'meetingTitle': f'Load test {index}',
+            'attendees': 'Load Test', 'fileName': f'load-{index}.txt', 'timestamp': datetime.now().isoformat(),
+            'source': 'load_test', 'uploadType': 'text', '_structureVersion': '2.0'}
+
+
+def api_payload(transcript: str, index: int) -> dict:
+    return {'meeting_notes': transcript, 'attendees': 'Load Test'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='endpoint to load; defaults to an in-process simulator')
+    parser.add_argument('--api', action='store_true', help='send Module1/app.py payloads instead of webhook ones')
+    parser.add_argument('--stats-url', help="a running simulator's /stats, to report per-node timings")
+    parser.add_argument('--requests', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--size', type=int, default=5000, help='characters per transcript')
+    parser.add_argument('--ai-latency', type=float, default=0.5)
+    parser.add_argument('--sheets-latency', type=float, default=0.1, help='seconds per Sheets append call')
+    parser.add_argument('--sheet-writer', action='store_true', help='batch Sheets rows through sheet_writer.py')
+    args = parser.parse_args()
+
+    stats = None
+    writer = sheets = None
+    url = args.url
+    if url is None:
+        writer_url = None
+        if args.sheet_writer:
+            sheets = fake_sheets.FakeSheets(latency=args.sheets_latency)
+            sheets_server = fake_sheets.serve(sheets)
+            writer = sheet_writer.BatchedSheetWriter(
+                sheet_writer.SheetsClient(f"http://127.0.0.1:{sheets_server.server_address[1]}"),
+                sheet_writer.BlobStore(tempfile.mkdtemp(prefix='transcript_blobs_')))
+            writer_url = f"http://127.0.0.1:{sheet_writer.serve(writer, port=0).server_address[1]}"
+        simulator = WorkflowSimulator(latency=StubLatency(ai=args.ai_latency, sheets=args.sheets_latency),
+                                      sheet_writer_url=writer_url)
+        server, stats = serve(simulator, port=0)
+        url = f"http://127.0.0.1:{server.server_address[1]}/webhook/meeting-intelligence-webhook"
+
+    build = api_payload if args.api else webhook_payload
+    payloads = [build(generate_transcript(args.size, seed=index), index) for index in range(args.requests)]
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+
+    def post(payload: dict):
+        start = time.perf_counter()
+        response = session.post(url, json=payload, timeout=300)
+        return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(post, payloads))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(seconds for _, seconds in results)
+    errors = sum(status != 200 for status, _ in results)
+    print(f"{args.requests} requests, {args.concurrency} concurrent, to {url}")
+    print(f"throughput {args.requests / wall:.2f} req/s  latency p50 {latencies[len(latencies) // 2] * 1000:.0f}ms "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}ms max {latencies[-1] * 1000:.0f}ms  "
+          f"mean {statistics.mean(latencies) * 1000:.0f}ms  errors {errors}")
+    if writer:
+        writer.close()
+        print(f"sheet writer: {writer.stats['rows_written']} rows in {sheets.append_calls} append calls, "
+              f"{writer.stats['blob_references']} transcripts stored as blobs")
+
+    summary = stats.summary() if stats else requests.get(args.stats_url).json() if args.stats_url else None
+    if summary:
+        print(f"\n{'node':<40} {'runs':>5} {'mean':>9} {'p95':>9}")
+        for node, timing in sorted(summary['nodes'].items(), key=lambda entry: -entry[1]['mean_ms']):
+            print(f"{node:<40} {timing['count']:>5} {timing['mean_ms']:>7.1f}ms {timing['p95_ms']:>7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Local fake of the Google Sheets values:append endpoint, for testing the sheet writer offline.
+
+Keeps appended rows in memory, can add latency per call and answer 429 past a request
+rate, like the real quota, or fail every append with a fixed status:
+
+    python fake_sheets.py --port 8091 --latency 0.3 --max-per-minute 60
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+from urllib.parse import unquote
+
+APPEND_PATH = re.compile(r'^/v4/spreadsheets/([^/]+)/values/([^:?]+):append')
+
+
+class FakeSheets:
+    """Appended rows by (spreadsheet id, sheet name), plus call counts"""
+
+    def __init__(self, latency: float = 0.0, max_per_minute: int = 0):
+        self.latency = latency
+        self.max_per_minute = max_per_minute
+        # Answer every append with this status (e.g. 400) instead of writing; 0 writes normally
+        self.error_status = 0
+        self.rows: Dict[Tuple[str, str], List[List[Any]]] = defaultdict(list)
+        self.append_calls = 0
+        self.rejected_calls = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def append(self, spreadsheet_id: str, sheet_range: str, values: List[List[Any]]) -> Tuple[int, Dict[str, Any]]:
+        sheet = sheet_range.split('!')[0].strip("'")
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if self.error_status:
+                self.rejected_calls += 1
+                return self.error_status, {'error': {'code': self.error_status, 'message': 'Append rejected'}}
+            if self.max_per_minute and len(self._recent) >= self.max_per_minute:
+                self.rejected_calls += 1
+                return 429, {'error': {'code': 429, 'status': 'RESOURCE_EXHAUSTED',
+                                       'message': 'Quota exceeded for quota metric Write requests'}}
+            self._recent.append(now)
+        time.sleep(self.latency)
+        with self._lock:
+            self.append_calls += 1
+            existing = self.rows[(spreadsheet_id, sheet)]
+            first_row = len(existing) + 1
+            existing.extend(values)
+        return 200, {'spreadsheetId': spreadsheet_id, 'updates': {
+            'updatedRange': f"'{sheet}'!A{first_row}:Z{first_row + len(values) - 1}",
+            'updatedRows': len(values)}}
+
+
+def serve(sheets: FakeSheets, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake on a background thread; port 0 picks a free one (see server.server_address)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status: int, payload: Any) -> None:
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            match = APPEND_PATH.match(self.path)
+            if not match:
+                self._send(404, {'error': {'code': 404, 'message': 'Not found'}})
+                return
+            self._send(*sheets.append(match.group(1), unquote(match.group(2)), json.loads(body).get('values', [])))
+
+        def do_GET(self):
+            self._send(200, {'appendCalls': sheets.append_calls, 'rejectedCalls': sheets.rejected_calls,
+                             'rows': {f'{spreadsheet}/{sheet}': len(rows) for (spreadsheet, sheet), rows in sheets.rows.items()}})
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8091)
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds per append call')
+    parser.add_argument('--max-per-minute', type=int, default=60, help='append calls per minute before 429s (0 = no limit)')
+    args = parser.parse_args()
+
+    sheets = FakeSheets(args.latency, args.max_per_minute)
+    server = serve(sheets, args.host, args.port)
+    print(f"Fake Sheets API on http://{args.host}:{args.port}; GET / for counts, Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+
+# The workflow is the source of truth for the patterns; both workflow files carry the same node
+CLASSIFIER_NODE = '🧠 Intelligent Meeting Classifier'
+DEFAULT_WORKFLOW_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hook_meeting_workflow.json')
+
+# Pieces of the node's JavaScript: "const standupPatterns = [{ pattern: /a|b/g, weight: 10 }, ...];",
+# "const minThreshold = 5;" and "Math.min(maxScore / 20, 1)"
+_PATTERN_LIST = re.compile(r'const (\w+)Patterns = \[(.*?)\];', re.S)
+_PATTERN_ENTRY = re.compile(r'\{\s*pattern:\s*/(.+?)/g,\s*weight:\s*(\d+)\s*\}')
+_MIN_THRESHOLD = re.compile(r'const minThreshold = (\d+)')
+_CONFIDENCE_SCALE = re.compile(r'maxScore / (\d+)')
+
+
+def load_workflow_patterns(workflow_path: str = DEFAULT_WORKFLOW_PATH) -> Tuple[Dict[str, List[Tuple[str, int]]], int, int]:
+    """Read the weighted patterns, minimum threshold and confidence scale from the classifier node.
+
+    Each pattern is an alternation; every match adds its weight to the meeting type.
+    Raises ValueError if the workflow has no classifier node or its code has changed shape.
+    """
+    with open(workflow_path, encoding='utf-8') as f:
+        workflow = json.load(f)
+    node = next((node for node in workflow.get('nodes', []) if node.get('name') == CLASSIFIER_NODE), None)
+    if node is None:
+        raise ValueError(f"No '{CLASSIFIER_NODE}' node in {workflow_path}")
+    code = node['parameters']['jsCode']
+
+    patterns = {
+        meeting_type: [(pattern, int(weight)) for pattern, weight in _PATTERN_ENTRY.findall(entries)]
+        for meeting_type, entries in _PATTERN_LIST.findall(code)
+    }
+    min_threshold = _MIN_THRESHOLD.search(code)
+    confidence_scale = _CONFIDENCE_SCALE.search(code)
+    if not patterns or not all(patterns.values()) or min_threshold is None or confidence_scale is None:
+        raise ValueError(f"Could not read the weighted patterns of '{CLASSIFIER_NODE}' in {workflow_path}")
+    return patterns, int(min_threshold.group(1)), int(confidence_scale.group(1))
+
+
+# Scores below MIN_THRESHOLD are classified as 'general', as in the n8n node
+MEETING_PATTERNS, MIN_THRESHOLD, CONFIDENCE_SCALE = load_workflow_patterns()
+CACHE_SIZE = 256
+
+
+class MeetingClassifier:
+    """Scores meeting types with the n8n node's weighted patterns.
+
+    Patterns are compiled once into a counting plan: plain phrases are counted
+    with str.count, which runs a C substring search over the lowercased text,
+    and only phrases with regex syntax (such as "long.?term") go through re.
+    A phrase shared by several patterns ("budget") is counted once per call.
+    Summing per-phrase counts equals counting matches of the alternation with a
+    JavaScript /g regex unless two phrases of one pattern overlap in the text
+    (as in "todayesterday"); patterns where one phrase contains another, where
+    that would happen in ordinary text, are counted with the full regex instead.
+    """
+
+    def __init__(self, patterns: Dict[str, Sequence[Tuple[str, int]]] = MEETING_PATTERNS,
+                 min_threshold: int = MIN_THRESHOLD, confidence_scale: int = CONFIDENCE_SCALE):
+        self.types = list(patterns) + ['general']
+        self.min_threshold = min_threshold
+        self.confidence_scale = confidence_scale
+
+        # (meeting type, weight, literal phrases, compiled regex for the rest or None)
+        self.plan: List[Tuple[str, int, List[str], Any]] = []
+        for meeting_type, weighted in patterns.items():
+            for pattern, weight in weighted:
+                phrases = pattern.split('|')
+                literals = [phrase for phrase in phrases if re.escape(phrase) == phrase]
+                expressions = [phrase for phrase in phrases if re.escape(phrase) != phrase]
+                if any(a != b and a in b for a in literals for b in literals):
+                    literals, expressions = [], phrases
+                regex = re.compile('|'.join(expressions)) if expressions else None
+                self.plan.append((meeting_type, weight, literals, regex))
+        self._cache: 'OrderedDict[bytes, Dict[str, Any]]' = OrderedDict()
+
+    @classmethod
+    def from_workflow(cls, workflow_path: str) -> 'MeetingClassifier':
+        """Classifier using the patterns of another workflow export"""
+        patterns, min_threshold, confidence_scale = load_workflow_patterns(workflow_path)
+        return cls(patterns, min_threshold, confidence_scale)
+
+    def score_lowercase(self, content: str) -> Dict[str, int]:
+        """Score text that is already lowercased"""
+        scores = dict.fromkeys(self.types, 0)
+        phrase_counts: Dict[str, int] = {}
+        for meeting_type, weight, literals, regex in self.plan:
+            count = 0
+            for phrase in literals:
+                if phrase not in phrase_counts:
+                    phrase_counts[phrase] = content.count(phrase)
+                count += phrase_counts[phrase]
+            if regex is not None:
+                count += sum(1 for _ in regex.finditer(content))
+            scores[meeting_type] += count * weight
+        return scores
+
+    def score(self, content: str) -> Dict[str, int]:
+        return self.score_lowercase(content.lower())
+
+    def classify(self, content: str) -> Dict[str, Any]:
+        """Predict the meeting type; results are cached by a hash of the content"""
+        digest = hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+        cached = self._cache.get(digest)
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            return cached
+
+        scores = self.score(content)
+        max_score = max(scores.values())
+        # Ties go to the first type, as with Object.keys(...).find in the node
+        predicted_type = next(t for t in self.types if scores[t] == max_score) \
+            if max_score >= self.min_threshold else 'general'
+        result = {
+            'predicted_type': predicted_type,
+            'confidence': min(max_score / self.confidence_scale, 1.0),
+            'scores': scores
+        }
+
+        self._cache[digest] = result
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return result
+
+
+_default_classifier = MeetingClassifier()
+
+
+def classify_meeting(content: str) -> Dict[str, Any]:
+    """Classify a transcript with the n8n workflow's weighted patterns"""
+    return _default_classifier.classify(content)
+
+
+def to_workflow_classification(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a classify() result like the node's output, so the workflow can use it instead of classifying again"""
+    scores = result.get('scores', {})
+    max_score = max(scores.values(), default=0)
+    return {
+        'detectedType': result['predicted_type'],
+        'confidence': result['confidence'],
+        'scores': scores,
+        'reasoning': f"Classified as {result['predicted_type']} with {round(max_score)} points"
+    }
@@ -0,0 +1,355 @@
+"""
+Local full-text index of processed meetings and their action items.
+
+Meetings are added as n8n answers them (by the uploaders and by Module1/app.py), so
+past transcripts, decisions and action items can be searched by keyword, owner,
+meeting type and date without downloading the Google Sheets. Search from the
+command line, or import the results already saved in the upload ledger:
+
+    python meeting_index.py budget --owner alice --type strategy --from 2025-01-01
+    python meeting_index.py --import-ledger upload_history.db
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Shared by the Streamlit uploaders and the Flask API unless MEETING_INDEX_PATH says otherwise
+DEFAULT_INDEX_PATH = os.getenv('MEETING_INDEX_PATH') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'meeting_index.db')
+# Result fields as the workflow's JSON (camelCase) and as its Google Sheets columns name them
+ACTION_ITEM_FIELDS = {
+    'action_item': ('actionItem', 'Action Item'),
+    'owner': ('owner', 'Owner'),
+    'due_date': ('dueDate', 'Due Date'),
+    'priority': ('priority', 'Priority'),
+    'status': ('status', 'Status'),
+}
+SUMMARY_FIELDS = {
+    'meeting_type': ('meetingType', 'Meeting Type'),
+    'meeting_date': ('meetingDate', 'Meeting Date'),
+    'key_decisions': ('keyDecisions', 'Key Decisions'),
+    'executive_summary': ('executiveSummary', 'Executive Summary'),
+    'next_steps': ('nextSteps', 'Next Steps'),
+    'attendees': ('attendees', 'Attendees'),
+}
+MEETING_TEXT_COLUMNS = ('title', 'attendees', 'executive_summary', 'key_decisions', 'next_steps', 'transcript')
+ACTION_ITEM_TEXT_COLUMNS = ('action_item', 'owner')
+MAX_RESULTS = 100
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY,
+    meeting_key TEXT UNIQUE,
+    title TEXT, meeting_type TEXT, meeting_date TEXT, attendees TEXT, file_name TEXT,
+    executive_summary TEXT, key_decisions TEXT, next_steps TEXT, transcript TEXT,
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_meetings_type_date ON meetings (meeting_type, meeting_date);
+CREATE INDEX IF NOT EXISTS idx_meetings_date ON meetings (meeting_date);
+CREATE TABLE IF NOT EXISTS action_items (
+    id INTEGER PRIMARY KEY,
+    meeting_id INTEGER REFERENCES meetings (id),
+    action_item TEXT, owner TEXT, due_date TEXT, priority TEXT, status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_action_items_meeting ON action_items (meeting_id);
+
+-- The text lives in the tables above; the FTS tables only hold the inverted index
+CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5(
+    {', '.join(MEETING_TEXT_COLUMNS)}, content='meetings', content_rowid='id', tokenize='porter unicode61');
+CREATE VIRTUAL TABLE IF NOT EXISTS action_items_fts USING fts5(
+    {', '.join(ACTION_ITEM_TEXT_COLUMNS)}, content='action_items', content_rowid='id', tokenize='porter unicode61');
+
+CREATE TRIGGER IF NOT EXISTS meetings_fts_insert AFTER INSERT ON meetings BEGIN
+    INSERT INTO meetings_fts (rowid, {', '.join(MEETING_TEXT_COLUMNS)})
+    VALUES (new.id, {', '.join('new.' + column for column in MEETING_TEXT_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS meetings_fts_delete AFTER DELETE ON meetings BEGIN
+    INSERT INTO meetings_fts (meetings_fts, rowid, {', '.join(MEETING_TEXT_COLUMNS)})
+    VALUES ('delete', old.id, {', '.join('old.' + column for column in MEETING_TEXT_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS action_items_fts_insert AFTER INSERT ON action_items BEGIN
+    INSERT INTO action_items_fts (rowid, {', '.join(ACTION_ITEM_TEXT_COLUMNS)})
+    VALUES (new.id, {', '.join('new.' + column for column in ACTION_ITEM_TEXT_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS action_items_fts_delete AFTER DELETE ON action_items BEGIN
+    INSERT INTO action_items_fts (action_items_fts, rowid, {', '.join(ACTION_ITEM_TEXT_COLUMNS)})
+    VALUES ('delete', old.id, {', '.join('old.' + column for column in ACTION_ITEM_TEXT_COLUMNS)});
+END;
+"""
+
+
+def _field(record: Dict[str, Any], names: Tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ''):
+            return str(value)
+    return None
+
+
+def _normalise(record: Dict[str, Any], fields: Dict[str, Tuple[str, ...]]) -> Dict[str, Optional[str]]:
+    return {column: _field(record, names) for column, names in fields.items()}
+
+
+def extract_records(response: Any, events: Iterable[Tuple[str, Any]] = ()) -> Tuple[Dict[str, Optional[str]],
+                                                                                     List[Dict[str, Optional[str]]]]:
+    """The summary and action items in a workflow response and its progress events.
+
+    Accepts the {"actionItems": [...], "summaryRecord": {...}} body the uploaders
+    display, single Google Sheets rows (what n8n's Respond node returns), lists of
+    either, and ("action_item" | "summary", row) events. Repeated action items are
+    dropped, since streamed results usually reappear in the final response.
+    """
+    if isinstance(response, str):
+        try:
+            response = json.loads(response)
+        except ValueError:
+            response = None
+    summaries, items = [], []
+
+    def collect(record: Any) -> None:
+        if isinstance(record, list):
+            for entry in record:
+                collect(entry)
+        elif isinstance(record, dict):
+            if 'actionItems' in record or 'summaryRecord' in record:
+                items.extend(item for item in record.get('actionItems') or [] if isinstance(item, dict))
+                if isinstance(record.get('summaryRecord'), dict):
+                    summaries.append(record['summaryRecord'])
+            elif _field(record, ACTION_ITEM_FIELDS['action_item']):
+                items.append(record)
+            elif _field(record, SUMMARY_FIELDS['executive_summary']) or _field(record, SUMMARY_FIELDS['key_decisions']):
+                summaries.append(record)
+
+    for event, data in events:
+        if event == 'action_item':
+            items.append(data)
+        elif event == 'summary':
+            summaries.append(data)
+    collect(response)
+
+    summary = {column: None for column in SUMMARY_FIELDS}
+    # Action item rows also carry the meeting's type and date
+    for record in summaries + items:
+        for column, value in _normalise(record, SUMMARY_FIELDS).items():
+            summary[column] = summary[column] or value
+    action_items, seen = [], set()
+    for record in items:
+        item = _normalise(record, ACTION_ITEM_FIELDS)
+        key = (item['action_item'], item['owner'], item['due_date'])
+        if item['action_item'] and key not in seen:
+            seen.add(key)
+            action_items.append(item)
+    return summary, action_items
+
+
+def fts_query(text: Optional[str]) -> Optional[str]:
+    """An FTS5 query matching every word of free text, so user input is never parsed as FTS syntax.
+
+    A trailing * keeps its meaning as a prefix search, e.g. "budg*".
+    """
+    terms = re.findall(r'\w+\*?', text or '')
+    if not terms:
+        return None
+    return ' '.join('"' + term.rstrip('*') + '"' + ('*' if term.endswith('*') else '') for term in terms)
+
+
+class MeetingIndex:
+    """SQLite FTS5 index of meetings (summary fields and transcript) and their action items.
+
+    Meetings are keyed by the caller's id for them (the upload's content key or the
+    API's correlation id); adding a meeting again replaces it, so reprocessing does
+    not leave duplicates. Each add is one small transaction, so the index grows with
+    every meeting instead of being rebuilt.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            # Searches keep reading while a meeting is being added
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Used from Streamlit sessions, upload workers and Flask threads, so connections are opened per call
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def add_meeting(self, meeting_key: str, response: Any, events: Iterable[Tuple[str, Any]] = (),
+                    transcript: str = '', title: str = '', attendees: str = '', file_name: str = '',
+                    meeting_type: Optional[str] = None, meeting_date: Optional[str] = None) -> int:
+        """Index one processed meeting and return the number of action items stored for it.
+
+        response and events are what n8n returned (see extract_records); the other
+        arguments fill in what the response does not say, except meeting_type, which
+        wins over the workflow's when the caller chose or classified it.
+        """
+        summary, action_items = extract_records(response, events)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT id FROM meetings WHERE meeting_key = ?", (meeting_key,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM action_items WHERE meeting_id = ?", (row['id'],))
+                conn.execute("DELETE FROM meetings WHERE id = ?", (row['id'],))
+            meeting_id = conn.execute("""
+                INSERT INTO meetings (meeting_key, title, meeting_type, meeting_date, attendees, file_name,
+                                      executive_summary, key_decisions, next_steps, transcript, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (meeting_key, title, (meeting_type or summary['meeting_type'] or 'general').lower(),
+                  (summary['meeting_date'] or meeting_date or date.today().isoformat())[:10],
+                  attendees or summary['attendees'] or '', file_name, summary['executive_summary'],
+                  summary['key_decisions'], summary['next_steps'], transcript, time.time())).lastrowid
+            conn.executemany("""
+                INSERT INTO action_items (meeting_id, action_item, owner, due_date, priority, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(meeting_id, item['action_item'], item['owner'], item['due_date'], item['priority'],
+                   item['status']) for item in action_items])
+        return len(action_items)
+
+    def search(self, query: Optional[str] = None, owner: Optional[str] = None, meeting_type: Optional[str] = None,
+               date_from: Optional[str] = None, date_to: Optional[str] = None,
+               limit: int = 20) -> Dict[str, List[Dict[str, Any]]]:
+        """Meetings and action items matching every given filter, best matches first.
+
+        query matches words in titles, attendees, summaries, decisions, next steps and
+        transcripts (and in action items and their owners); owner matches words of an
+        action item's owner. Dates are inclusive YYYY-MM-DD strings. Without a query,
+        the most recent meetings come first.
+        """
+        limit = max(1, min(int(limit), MAX_RESULTS))
+        text = fts_query(query)
+        owner_match = fts_query(owner)
+        filters, params = [], []
+        if meeting_type:
+            filters.append("m.meeting_type = ?")
+            params.append(meeting_type.lower())
+        if date_from:
+            filters.append("m.meeting_date >= ?")
+            params.append(date_from)
+        if date_to:
+            filters.append("m.meeting_date <= ?")
+            params.append(date_to)
+
+        meeting_filters, meeting_params = list(filters), list(params)
+        if owner_match:
+            meeting_filters.append("""m.id IN (SELECT meeting_id FROM action_items WHERE id IN (
+                SELECT rowid FROM action_items_fts WHERE action_items_fts MATCH ?))""")
+            meeting_params.append(f"owner : ({owner_match})")
+        if text:
+            meeting_sql = f"""
+                SELECT m.*, snippet(meetings_fts, -1, '**', '**', '…', 12) AS snippet
+                FROM meetings_fts JOIN meetings m ON m.id = meetings_fts.rowid
+                WHERE meetings_fts MATCH ? {''.join(' AND ' + f for f in meeting_filters)}
+                ORDER BY bm25(meetings_fts) LIMIT ?
+            """
+            meeting_params = [text] + meeting_params
+        else:
+            meeting_sql = f"""
+                SELECT m.*, '' AS snippet FROM meetings m
+                {'WHERE ' + ' AND '.join(meeting_filters) if meeting_filters else ''}
+                ORDER BY m.meeting_date DESC, m.id DESC LIMIT ?
+            """
+
+        item_match = ' AND '.join(part for part in (text and f"({text})",
+                                                     owner_match and f"owner : ({owner_match})") if part)
+        if item_match:
+            item_sql = f"""
+                SELECT a.*, m.meeting_key, m.title, m.meeting_type, m.meeting_date
+                FROM action_items_fts JOIN action_items a ON a.id = action_items_fts.rowid
+                JOIN meetings m ON m.id = a.meeting_id
+                WHERE action_items_fts MATCH ? {''.join(' AND ' + f for f in filters)}
+                ORDER BY bm25(action_items_fts) LIMIT ?
+            """
+            item_params = [item_match] + params
+        else:
+            item_sql = f"""
+                SELECT a.*, m.meeting_key, m.title, m.meeting_type, m.meeting_date
+                FROM action_items a JOIN meetings m ON m.id = a.meeting_id
+                {'WHERE ' + ' AND '.join(filters) if filters else ''}
+                ORDER BY m.meeting_date DESC, a.id LIMIT ?
+            """
+            item_params = list(params)
+
+        with closing(self._connect()) as conn:
+            meetings = conn.execute(meeting_sql, meeting_params + [limit]).fetchall()
+            items = conn.execute(item_sql, item_params + [limit]).fetchall()
+            counts = dict(conn.execute(
+                f"SELECT meeting_id, COUNT(*) FROM action_items WHERE meeting_id IN "
+                f"({', '.join('?' * len(meetings))}) GROUP BY meeting_id", [row['id'] for row in meetings]
+            ).fetchall()) if meetings else {}
+        return {
+            'meetings': [{
+                'meeting_key': row['meeting_key'], 'title': row['title'], 'meeting_type': row['meeting_type'],
+                'meeting_date': row['meeting_date'], 'attendees': row['attendees'], 'file_name': row['file_name'],
+                'executive_summary': row['executive_summary'], 'key_decisions': row['key_decisions'],
+                'next_steps': row['next_steps'], 'snippet': row['snippet'],
+                'action_item_count': counts.get(row['id'], 0)
+            } for row in meetings],
+            'action_items': [{
+                'meeting_key': row['meeting_key'], 'title': row['title'], 'meeting_type': row['meeting_type'],
+                'meeting_date': row['meeting_date'], 'action_item': row['action_item'], 'owner': row['owner'],
+                'due_date': row['due_date'], 'priority': row['priority'], 'status': row['status']
+            } for row in items],
+        }
+
+    def meeting_count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+
+    def import_ledger(self, ledger_path: str) -> int:
+        """Index the results saved in an upload ledger (upload_ledger.py); returns the meetings added.
+
+        The ledger keeps n8n's responses, and transcripts only for recordings split into segments, so
+        other meetings are searchable by their results alone.
+        """
+        with closing(sqlite3.connect(ledger_path)) as conn:
+            rows = conn.execute("SELECT key, file_name, completed_at, result FROM completed_uploads").fetchall()
+        for key, file_name, completed_at, result in rows:
+            result = json.loads(result)
+            self.add_meeting(key, result.get('response'), transcript=result.get('transcript', ''),
+                             file_name=file_name or '',
+                             meeting_date=date.fromtimestamp(completed_at).isoformat())
+        return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('query', nargs='?', help='words to find; end one with * to match its prefix')
+    parser.add_argument('--owner', help='only action items (and meetings with action items) for this owner')
+    parser.add_argument('--type', dest='meeting_type', help='standup, strategy, client or general')
+    parser.add_argument('--from', dest='date_from', help='earliest meeting date, YYYY-MM-DD')
+    parser.add_argument('--to', dest='date_to', help='latest meeting date, YYYY-MM-DD')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--db', default=DEFAULT_INDEX_PATH, help='path to the index')
+    parser.add_argument('--import-ledger', metavar='LEDGER', help='index the results saved in an upload ledger')
+    args = parser.parse_args()
+
+    index = MeetingIndex(args.db)
+    if args.import_ledger:
+        print(f"Indexed {index.import_ledger(args.import_ledger)} meetings from {args.import_ledger}")
+        return
+
+    started = time.perf_counter()
+    results = index.search(args.query, owner=args.owner, meeting_type=args.meeting_type,
+                           date_from=args.date_from, date_to=args.date_to, limit=args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{len(results['meetings'])} meetings and {len(results['action_items'])} action items "
+          f"of {index.meeting_count()} meetings indexed, in {elapsed:.1f}ms\n")
+    for meeting in results['meetings']:
+        print(f"{meeting['meeting_date']}  {meeting['meeting_type']:<9} {meeting['title'] or meeting['meeting_key']}")
+        if meeting['snippet']:
+            print(f"    {meeting['snippet']}")
+    if results['action_items']:
+        print()
+    for item in results['action_items']:
+        print(f"{item['meeting_date']}  {item['owner'] or 'Not specified':<16} {item['action_item']} "
+              f"(due {item['due_date'] or 'not set'}, {item['priority'] or 'no'} priority)")
+
+
+if __name__ == '__main__':
+    main()
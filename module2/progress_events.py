@@ -0,0 +1,130 @@
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+
+# Stages a meeting analysis goes through, in order; not every run passes every stage
+STAGES = ('queued', 'preparing', 'transcribing', 'classifying', 'analysing', 'saving', 'done')
+# Seconds between "waiting" events while nothing else happens, well inside the 30-60s
+# idle timeouts of proxies and load balancers
+HEARTBEAT_SECONDS = 5.0
+
+Event = Tuple[str, Any]
+EventCallback = Callable[[str, Any], None]
+
+
+def format_event(event: str, data: Any) -> str:
+    """One server-sent event; data is sent as a single line of JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def iter_events(lines: Iterable[str]) -> Iterator[Event]:
+    """Parse a text/event-stream into (event, data) pairs, decoding JSON data where possible"""
+    event, data = 'message', []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line:
+            if data:
+                text = '\n'.join(data)
+                try:
+                    yield event, json.loads(text)
+                except ValueError:
+                    yield event, text
+            event, data = 'message', []
+        elif line.startswith(':'):
+            continue
+        else:
+            name, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            if name == 'event':
+                event = value
+            elif name == 'data':
+                data.append(value)
+
+
+def result_events(body: Any) -> Iterator[Event]:
+    """Partial results found in a finished workflow response: each action item, then the summary"""
+    if not isinstance(body, dict):
+        return
+    for item in body.get('actionItems') or []:
+        yield 'action_item', item
+    if body.get('summaryRecord'):
+        yield 'summary', body['summaryRecord']
+
+
+def _response_body(response: requests.Response) -> Any:
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def stream_webhook(url: str, session: Optional[requests.Session] = None,
+                   heartbeat_seconds: float = HEARTBEAT_SECONDS,
+                   before_start: Optional[Callable[[threading.Thread], Any]] = None,
+                   **request_kwargs) -> Iterator[Event]:
+    """POST to a webhook and yield its progress as it happens.
+
+    Webhooks that answer with text/event-stream (the workflow simulator, or
+    Module1/app.py's /meeting/analyse/stream) have their events relayed as they
+    arrive. Anything else yields a single "response" event once it answers.
+    Every heartbeat_seconds without news a ("waiting", {"seconds": ...}) event
+    is yielded, so callers can keep their own clients' connections alive. The
+    last event is always ("response", {"status_code": ..., "body": ...});
+    request exceptions are raised from the generator.
+
+    The request is sent from a separate thread, which is passed to before_start
+    first; Streamlit callers attach their script context there so upload
+    progress callbacks can still draw.
+    """
+    session = session or requests.Session()
+    headers = dict(request_kwargs.pop('headers', None) or {})
+    headers.setdefault('Accept', 'text/event-stream, application/json;q=0.9, */*;q=0.8')
+    events: 'queue.Queue[Tuple[Optional[Event], Optional[BaseException]]]' = queue.Queue()
+
+    def post() -> None:
+        try:
+            with session.post(url, headers=headers, stream=True, **request_kwargs) as response:
+                if response.headers.get('Content-Type', '').startswith('text/event-stream'):
+                    finished = False
+                    # One byte at a time, so each event is relayed as soon as its blank line arrives
+                    for event in iter_events(response.iter_lines(chunk_size=1, decode_unicode=True)):
+                        finished = finished or event[0] == 'response'
+                        events.put((event, None))
+                    if not finished:
+                        events.put((('response', {'status_code': response.status_code, 'body': None}), None))
+                else:
+                    events.put((('response', {'status_code': response.status_code,
+                                              'body': _response_body(response)}), None))
+        except BaseException as e:
+            events.put((None, e))
+
+    thread = threading.Thread(target=post, daemon=True)
+    if before_start:
+        before_start(thread)
+    thread.start()
+    started = time.monotonic()
+    while True:
+        try:
+            event, error = events.get(timeout=heartbeat_seconds)
+        except queue.Empty:
+            yield 'waiting', {'seconds': round(time.monotonic() - started)}
+            continue
+        if error is not None:
+            raise error
+        yield event
+        if event[0] == 'response':
+            return
+
+
+def collect_response(events: Iterable[Event], on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+    """Pass progress events to on_event and return the final response's status_code and body"""
+    for event, data in events:
+        if event == 'response':
+            return data
+        if on_event:
+            on_event(event, data)
+    raise ValueError("The event stream ended without a response")
@@ -0,0 +1,345 @@
+"""
+Buffered Google Sheets writer for the meeting workflow.
+
+The workflow posts rows here instead of calling Google Sheets once per node execution.
+Rows are buffered per sheet and written with one values:append call per sheet when a
+batch fills up or its oldest row has waited long enough. Full transcripts are stored in a
+local compressed blob store and only a reference is written to the sheet. Batches that Sheets
+rejects for good (4xx other than 429) are logged to failed_rows.jsonl in the blob directory.
+
+    python sheet_writer.py --spreadsheet-id <id> --token "$(gcloud auth print-access-token)"
+    python sheet_writer.py --sheets-url http://127.0.0.1:8091   # against fake_sheets.py
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from meeting_classifier import DEFAULT_WORKFLOW_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8090
+SHEETS_API_URL = 'https://sheets.googleapis.com'
+DEFAULT_BLOB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transcript_blobs')
+# A batch is written when it has this many rows or its oldest row is this old
+MAX_BATCH_ROWS = 50
+MAX_BATCH_SECONDS = 2.0
+# Columns whose text always goes to the blob store, and the length above which any text does
+FULL_TEXT_FIELDS = ('fullTranscript',)
+MAX_INLINE_CHARS = 2000
+# Attempts per append when Sheets answers 429 or 5xx, with exponential backoff between them
+APPEND_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 1.0
+# Batches that can never be written, one JSON line each, kept next to the blobs
+DEAD_LETTER_FILE = 'failed_rows.jsonl'
+
+
+def load_sheet_layouts(workflow_path: str = DEFAULT_WORKFLOW_PATH) -> Dict[str, Tuple[str, List[str]]]:
+    """Spreadsheet id and column order of every Google Sheets node in the workflow, by sheet name"""
+    with open(workflow_path, encoding='utf-8') as f:
+        workflow = json.load(f)
+    layouts = {}
+    for node in workflow['nodes']:
+        if node['type'] != 'n8n-nodes-base.googleSheets':
+            continue
+        parameters = node['parameters']
+        sheet = parameters.get('sheetName', {})
+        columns = [field['fieldId'] for field in parameters.get('fieldsUi', {}).get('fieldValues', [])]
+        layouts[sheet.get('cachedResultName') or str(sheet.get('value'))] = \
+            (parameters.get('documentId', {}).get('value', ''), columns)
+    return layouts
+
+
+class BlobStore:
+    """Content-addressed, gzip-compressed text files; identical transcripts are stored once"""
+
+    PREFIX = 'blob:sha256:'
+
+    def __init__(self, root: str = DEFAULT_BLOB_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.txt.gz")
+
+    def put(self, text: str) -> str:
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so a reader never sees half a blob
+            temporary = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(temporary, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(temporary, path)
+        return self.PREFIX + digest
+
+    def get(self, reference: str) -> Optional[str]:
+        digest = reference[len(self.PREFIX):] if reference.startswith(self.PREFIX) else reference
+        if not digest.isalnum():
+            return None
+        try:
+            with gzip.open(self._path(digest), 'rb') as f:
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
+            return None
+
+
+class SheetsClient:
+    """values:append calls to the Google Sheets API (or a fake of it) over one keep-alive session"""
+
+    def __init__(self, base_url: str = SHEETS_API_URL, token: Optional[str] = None):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=8))
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=8))
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+
+    def append(self, spreadsheet_id: str, sheet: str, values: List[List[Any]]) -> None:
+        """Append rows, retrying rate limits and server errors; raises requests.HTTPError when out of attempts"""
+        sheet_range = quote("'" + sheet.replace("'", "''") + "'", safe='')
+        url = (f"{self.base_url}/v4/spreadsheets/{spreadsheet_id}/values/{sheet_range}:append"
+               "?valueInputOption=USER_ENTERED&insertDataOption=INSERT_ROWS")
+        for attempt in range(APPEND_ATTEMPTS):
+            response = self.session.post(url, json={'values': values}, timeout=60)
+            if response.status_code != 429 and response.status_code < 500 or attempt == APPEND_ATTEMPTS - 1:
+                response.raise_for_status()
+                return
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+
+def is_retryable(error: requests.RequestException) -> bool:
+    """Rate limits, server errors and connection problems may pass later; other 4xx answers never will"""
+    response = error.response if isinstance(error, requests.HTTPError) else None
+    if response is not None:
+        return response.status_code == 429 or response.status_code >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+class BatchedSheetWriter:
+    """Buffers rows per sheet and appends them in batches from a background thread"""
+
+    def __init__(self, client: SheetsClient, blobs: BlobStore, layouts: Optional[Dict[str, Tuple[str, List[str]]]] = None,
+                 spreadsheet_id: str = '', max_rows: int = MAX_BATCH_ROWS, max_seconds: float = MAX_BATCH_SECONDS,
+                 dead_letter_path: Optional[str] = None):
+        self.client = client
+        self.blobs = blobs
+        self.layouts = layouts if layouts is not None else load_sheet_layouts()
+        self.spreadsheet_id = spreadsheet_id
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.dead_letter_path = dead_letter_path or os.path.join(blobs.root, DEAD_LETTER_FILE)
+        self.stats = {'rows_received': 0, 'rows_written': 0, 'append_calls': 0, 'failed_appends': 0,
+                      'dead_lettered_rows': 0, 'blob_references': 0}
+        self._dead_letter_lock = threading.Lock()
+        self._buffers: Dict[str, List[List[Any]]] = defaultdict(list)
+        self._oldest: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._run, name='sheet-writer', daemon=True)
+        self._flusher.start()
+
+    def _columns(self, sheet: str, row: Dict[str, Any]) -> List[str]:
+        if sheet not in self.layouts:
+            # A sheet the workflow does not know: keep the first row's key order for it
+            self.layouts[sheet] = (self.spreadsheet_id, list(row))
+        return self.layouts[sheet][1]
+
+    def _offload(self, column: str, value: Any) -> Any:
+        if isinstance(value, str) and value and (column in FULL_TEXT_FIELDS or len(value) > MAX_INLINE_CHARS):
+            return self.blobs.put(value)
+        return value
+
+    def add(self, sheet: str, rows: List[Dict[str, Any]]) -> List[List[Any]]:
+        """Queue rows (dicts keyed by column name) for a sheet; returns the values that will be written"""
+        prepared = []
+        for row in rows:
+            columns = self._columns(sheet, row)
+            prepared.append([self._offload(column, row.get(column, '')) for column in columns])
+        blobs = sum(isinstance(value, str) and value.startswith(BlobStore.PREFIX) for values in prepared for value in values)
+        with self._condition:
+            self.stats['blob_references'] += blobs
+            if not self._buffers[sheet]:
+                self._oldest[sheet] = time.monotonic()
+            self._buffers[sheet].extend(prepared)
+            self.stats['rows_received'] += len(prepared)
+            if len(self._buffers[sheet]) >= self.max_rows:
+                self._condition.notify()
+        return prepared
+
+    def _take_ready(self, everything: bool = False) -> List[Tuple[str, List[List[Any]]]]:
+        """Remove and return the batches that are full or old enough; call with the condition held"""
+        now = time.monotonic()
+        ready = [sheet for sheet, rows in self._buffers.items() if rows and (
+            everything or len(rows) >= self.max_rows or now - self._oldest[sheet] >= self.max_seconds)]
+        batches = []
+        for sheet in ready:
+            rows = self._buffers.pop(sheet)
+            self._oldest.pop(sheet, None)
+            batches.append((sheet, rows))
+        return batches
+
+    def _write(self, batches: List[Tuple[str, List[List[Any]]]]) -> None:
+        for sheet, rows in batches:
+            spreadsheet_id = self.layouts.get(sheet, (self.spreadsheet_id,))[0] or self.spreadsheet_id
+            for start in range(0, len(rows), self.max_rows):
+                batch = rows[start:start + self.max_rows]
+                try:
+                    self.client.append(spreadsheet_id, sheet, batch)
+                    with self._condition:
+                        self.stats['append_calls'] += 1
+                        self.stats['rows_written'] += len(batch)
+                except requests.RequestException as e:
+                    logger.error(f"Append of {len(batch)} rows to '{sheet}' failed: {e}")
+                    if not is_retryable(e):
+                        self._dead_letter(spreadsheet_id, sheet, batch, e)
+                        continue
+                    # Put the rows back so the next flush tries again
+                    with self._condition:
+                        self.stats['failed_appends'] += 1
+                        self._buffers[sheet][:0] = batch
+                        self._oldest.setdefault(sheet, time.monotonic())
+
+    def _dead_letter(self, spreadsheet_id: str, sheet: str, rows: List[List[Any]], error: requests.RequestException) -> None:
+        """Set aside rows Sheets refused, so they do not block the rows behind them"""
+        status = error.response.status_code if error.response is not None else None
+        entry = {'time': time.time(), 'spreadsheetId': spreadsheet_id, 'sheet': sheet, 'status': status,
+                 'error': str(error), 'rows': rows}
+        with self._dead_letter_lock:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+        logger.error(f"Dropped {len(rows)} rows for '{sheet}' (HTTP {status}); saved to {self.dead_letter_path}")
+        with self._condition:
+            self.stats['failed_appends'] += 1
+            self.stats['dead_lettered_rows'] += len(rows)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                self._condition.wait(timeout=min(self.max_seconds, 0.5))
+                batches = self._take_ready()
+            self._write(batches)
+
+    def flush(self) -> None:
+        """Write everything buffered now"""
+        with self._condition:
+            batches = self._take_ready(everything=True)
+        self._write(batches)
+
+    @property
+    def buffered(self) -> int:
+        with self._condition:
+            return sum(len(rows) for rows in self._buffers.values())
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._flusher.join()
+        self.flush()
+
+
+def make_handler(writer: BatchedSheetWriter):
+    class SheetWriterHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status: int, payload: Any, content_type: str = 'application/json') -> None:
+            data = payload.encode('utf-8') if isinstance(payload, str) else json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self.path == '/flush':
+                writer.flush()
+                self._send(200, {'buffered': writer.buffered, **writer.stats})
+                return
+            if not self.path.startswith('/rows/'):
+                self._send(404, {'error': 'Not found'})
+                return
+            try:
+                payload = json.loads(body or b'null')
+            except ValueError as e:
+                self._send(400, {'error': f'Invalid JSON: {e}'})
+                return
+            # A row, a list of rows, or {"rows": [...]}
+            rows = payload.get('rows', [payload]) if isinstance(payload, dict) else payload
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                self._send(400, {'error': 'Expected a row object or a list of them'})
+                return
+            values = writer.add(unquote(self.path[len('/rows/'):]), rows)
+            self._send(202, {'queued': len(values), 'buffered': writer.buffered})
+
+        def do_GET(self):
+            if self.path.startswith('/blobs/'):
+                text = writer.blobs.get(self.path[len('/blobs/'):])
+                if text is None:
+                    self._send(404, {'error': 'No such blob'})
+                else:
+                    self._send(200, text, 'text/plain; charset=utf-8')
+            elif self.path in ('/health', '/stats'):
+                self._send(200, {'status': 'ok', 'buffered': writer.buffered, **writer.stats})
+            else:
+                self._send(404, {'error': 'Not found'})
+
+        def log_message(self, format, *args):
+            pass
+
+    return SheetWriterHandler
+
+
+def serve(writer: BatchedSheetWriter, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Start the writer's HTTP endpoint on a background thread"""
+    server = ThreadingHTTPServer((host, port), make_handler(writer))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--sheets-url', default=SHEETS_API_URL, help='Sheets API base URL, e.g. a fake_sheets.py server')
+    parser.add_argument('--token', default=os.getenv('GOOGLE_SHEETS_TOKEN'), help='OAuth access token for the Sheets API')
+    parser.add_argument('--spreadsheet-id', default='', help='spreadsheet for sheets the workflow does not name')
+    parser.add_argument('--workflow', default=DEFAULT_WORKFLOW_PATH, help='workflow to read sheet columns from')
+    parser.add_argument('--blob-dir', default=DEFAULT_BLOB_DIR)
+    parser.add_argument('--max-rows', type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument('--max-seconds', type=float, default=MAX_BATCH_SECONDS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    writer = BatchedSheetWriter(SheetsClient(args.sheets_url, args.token), BlobStore(args.blob_dir),
+                                load_sheet_layouts(args.workflow), args.spreadsheet_id, args.max_rows, args.max_seconds)
+    server = serve(writer, args.host, args.port)
+    print(f"Sheet writer on http://{args.host}:{args.port}: POST /rows/<sheet name>, GET /blobs/<ref>, GET /stats")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        writer.close()
+        print(json.dumps(writer.stats))
+
+
+if __name__ == '__main__':
+    main()
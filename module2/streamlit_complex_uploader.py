@@ -1,10 +1,41 @@
 import streamlit as st
 import requests
 import json
-import time
 from typing import Optional, Dict, Any
 from datetime import datetime
 import base64
+import functools
+import io
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from meeting_classifier import classify_meeting, to_workflow_classification
+from meeting_index import MeetingIndex
+from transcript_prep import prepare_transcript
+from audio_chunking import MAX_CHUNK_BYTES, AudioChunk, split_audio
+from upload_ledger import UploadLedger, content_key, with_retries
+from upload_queue import UploadQueue, shared_session
+from transcode import can_transcode, estimate_transcoded_size, ffmpeg_available, transcode_audio, transcode_bytes
+from upload_stream import MultipartStream, ProgressCallback, progress_bar_callback
+from progress_events import EventCallback, collect_response, stream_webhook
+
+# Segments transcribed at the same time when a long recording is split
+CHUNK_UPLOAD_WORKERS = 4
+# How often the bulk upload status table refreshes while files are in flight
+QUEUE_REFRESH_SECONDS = 1.0
+# How each progress stage is shown while a meeting is processed
+STAGE_LABELS = {
+    'queued': '⏳ Queued',
+    'preparing': '🧹 Cleaning the transcript',
+    'transcribing': '🎤 Transcribing audio',
+    'classifying': '🧠 Classifying the meeting',
+    'analysing': '🤖 Analysing with AI',
+    'saving': '💾 Saving to Google Sheets',
+    'done': '✅ Finished'
+}
 
 # Page configuration
 st.set_page_config(
@@ -20,6 +51,22 @@ def validate_file_size(file) -> bool:
     file_size_mb = file.size / (1024 * 1024)
     return file_size_mb < 25
 
+def upload_size(file, transcode: bool = False) -> int:
+    """Bytes that will be uploaded for a file, estimated when it is transcoded first"""
+    if transcode:
+        estimate = estimate_transcoded_size(file)
+        if estimate is not None:
+            return estimate
+    return file.size
+
+# Split recordings go to the transcription webhook; the analysis workflow would log every segment as a meeting
+TRANSCRIPTION_URL_REQUIRED = ("Recordings over 24MB are split into segments, which need a Transcription Webhook URL. "
+                              "Set it in the sidebar to process this file.")
+
+def needs_chunking(file, transcode: bool = False) -> bool:
+    """Audio files over the transcription limit are split into segments instead of rejected"""
+    return file.name.lower().endswith(('.mp3', '.wav')) and upload_size(file, transcode) > MAX_CHUNK_BYTES
+
 def validate_file_type(file) -> bool:
     """Validate file type - only allow mp3, wav, txt"""
     if file is None:
@@ -30,72 +77,78 @@ def validate_file_type(file) -> bool:
     return any(file_extension.endswith(ext) for ext in allowed_extensions)
 
 def predict_meeting_type(content: str) -> Dict[str, Any]:
-    """Predict meeting type from content"""
+    """Predict meeting type from content with the N8N classifier's weighted patterns"""
     if not content or len(content.strip()) < 10:
         return {'predicted_type': 'general', 'confidence': 0.1}
     
-    content_lower = content.lower()
-    
-    # Scoring system
-    scores = {
-        'standup': 0,
-        'strategy': 0, 
-        'client': 0,
-        'general': 0
-    }
-    
-    # Keyword matching with weights
-    keywords = {
-        'standup': ['standup', 'daily', 'scrum', 'yesterday', 'today', 'blocker', 'blocked', 'sprint'],
-        'strategy': ['strategy', 'roadmap', 'planning', 'goal', 'objective', 'quarterly', 'vision', 'initiative'],
-        'client': ['client', 'customer', 'proposal', 'contract', 'delivery', 'external', 'requirement', 'feedback']
-    }
-    
-    for meeting_type, words in keywords.items():
-        for word in words:
-            if word in content_lower:
-                scores[meeting_type] += 2
-    
-    # Determine predicted type
-    max_score = max(scores.values())
-    predicted_type = 'general' if max_score < 2 else max(scores, key=scores.get)
-    confidence = min(max_score / 10, 1.0)
-    
-    return {
-        'predicted_type': predicted_type,
-        'confidence': confidence,
-        'scores': scores
-    }
+    # Cached by content hash, so reruns with the same transcript cost a hash, not a rescan
+    return classify_meeting(content)
 
-def send_text_to_n8n(content: str, file_name: str, meeting_title: str, attendees: str, n8n_url: str) -> Dict[str, Any]:
-    """Send text content to N8N webhook"""
+@st.cache_data(show_spinner=False)
+def get_prepared_transcript(content: str) -> Dict[str, Any]:
+    """Cleaned transcript with token estimates, cached across reruns"""
+    return prepare_transcript(content)
+
+def show_token_metric(content: str):
+    """Estimated LLM tokens after clean-up, compared with the raw text"""
+    prepared = get_prepared_transcript(content)
+    st.metric("Tokens (est.)", f"{prepared['transcriptTokens']:,}",
+              delta=f"{prepared['transcriptTokens'] - prepared['originalTokens']:,} after clean-up",
+              delta_color="inverse")
+
+@st.cache_resource
+def get_upload_ledger() -> UploadLedger:
+    """Shared record of completed uploads"""
+    return UploadLedger()
+
+@st.cache_resource
+def get_meeting_index() -> MeetingIndex:
+    """Shared search index of processed meetings"""
+    return MeetingIndex()
+
+def send_text_to_n8n(content: str, file_name: str, meeting_title: str, attendees: str, n8n_url: str,
+                     idempotency_key: Optional[str] = None, on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+    """Send text content to N8N webhook, cleaned, chunked and classified locally"""
+    # Filler, repeated lines and split speaker turns only cost LLM tokens in the workflow
+    if on_event:
+        on_event('stage', {'stage': 'preparing'})
+    prepared = prepare_transcript(content)
+    transcript = prepared['transcript'] or content
+    if on_event:
+        on_event('stage', {'stage': 'classifying'})
+    classification = to_workflow_classification(predict_meeting_type(transcript))
     payload = {
-        'transcript': content,
-        'text': content,
+        'transcript': transcript,
+        'text': transcript,
         'meetingTitle': meeting_title or f"Uploaded: {file_name}",
         'attendees': attendees or 'Manual Upload',
         'fileName': file_name,
         'timestamp': datetime.now().isoformat(),
         'source': 'streamlit_upload',
         'uploadType': 'text',
+        'meetingType': classification['detectedType'],
+        'classification': classification,
+        'originalTokens': prepared['originalTokens'],
+        'transcriptTokens': prepared['transcriptTokens'],
+        'chunkCount': prepared['chunkCount'],
+        'chunks': prepared['chunks'],
         'meetingUrl': '',
         'startTime': datetime.now().isoformat(),
+        'idempotencyKey': idempotency_key or '',
         '_structureVersion': '2.0'
     }
     
-    return make_request(n8n_url, json_payload=payload)
+    if on_event:
+        on_event('stage', {'stage': 'analysing'})
+    return with_retries(lambda: make_request(n8n_url, json_payload=payload, idempotency_key=idempotency_key,
+                                             on_event=on_event))
 
-def send_audio_to_n8n(file, meeting_title: str, attendees: str, n8n_url: str) -> Dict[str, Any]:
-    """Send audio file to N8N webhook"""
+def send_audio_to_n8n(file, meeting_title: str, attendees: str, n8n_url: str,
+                      progress_callback: Optional[ProgressCallback] = None,
+                      transcode: bool = False, idempotency_key: Optional[str] = None,
+                      on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+    """Send audio file to N8N webhook, optionally transcoded to 16 kHz mono on the way"""
     try:
-        # Read file content
-        file_content = file.getvalue()
-        
-        # Prepare multipart form data
-        files = {
-            'file': (file.name, file_content, file.type or 'audio/mpeg')
-        }
-        
         # Additional form data
         form_data = {
             'meetingTitle': meeting_title or f"Audio: {file.name}",
@@ -104,37 +157,259 @@ def send_audio_to_n8n(file, meeting_title: str, attendees: str, n8n_url: str) ->
             'timestamp': datetime.now().isoformat(),
             'source': 'streamlit_upload',
             'uploadType': 'audio',
+            'idempotencyKey': idempotency_key or '',
             '_structureVersion': '2.0'
         }
+        uploaded = {}
         
-        return make_request(n8n_url, files=files, form_data=form_data)
+        def attempt() -> Dict[str, Any]:
+            # Stream the multipart body in chunks instead of copying the whole file into memory
+            file.seek(0)
+            if transcode:
+                # The encoder reads the file as the body is sent; progress follows the source bytes
+                audio = transcode_audio(file, progress_callback=progress_callback)
+                body = MultipartStream(form_data, 'file', audio.name, audio, audio.type)
+            else:
+                audio = file
+                body = MultipartStream(form_data, 'file', file.name, file, file.type or 'audio/mpeg',
+                                       progress_callback=progress_callback)
+            uploaded['audio'] = audio
+            return make_request(n8n_url, body=body, idempotency_key=idempotency_key, on_event=on_event)
+        
+        # A streamed body cannot be replayed, so every retry re-reads the file from the start
+        result = with_retries(attempt)
+        if transcode:
+            result["transcode"] = {"original_bytes": file.size, "uploaded_bytes": uploaded['audio'].bytes_out}
+        return result
         
     except Exception as e:
         return {"success": False, "error": f"Audio file processing error: {str(e)}"}
 
-def make_request(url: str, json_payload=None, files=None, form_data=None) -> Dict[str, Any]:
-    """Make HTTP request to N8N webhook"""
+def extract_transcript(response: Any) -> str:
+    """Pull the transcript text out of a webhook response"""
+    if isinstance(response, list) and response:
+        response = response[0]
+    if isinstance(response, dict):
+        for key in ('transcript', 'text', 'fullTranscript', 'meetingNotes'):
+            if isinstance(response.get(key), str):
+                return response[key]
+        return ''
+    return response if isinstance(response, str) else ''
+
+def send_chunk_to_n8n(chunk: AudioChunk, chunk_count: int, recording_id: str, file_name: str,
+                      transcription_url: str, progress_callback: Optional[ProgressCallback] = None,
+                      transcode: bool = False) -> Dict[str, Any]:
+    """Send one audio segment for transcription, tagged with its place in the recording"""
+    form_data = {
+        'fileName': file_name,
+        'timestamp': datetime.now().isoformat(),
+        'source': 'streamlit_upload',
+        'uploadType': 'audio_chunk',
+        'recordingId': recording_id,
+        'chunkIndex': str(chunk.index),
+        'chunkCount': str(chunk_count),
+        'chunkStartSeconds': f"{chunk.start_seconds:.3f}",
+        'chunkEndSeconds': f"{chunk.end_seconds:.3f}",
+        'idempotencyKey': f"{recording_id}:{chunk.index}",
+        '_structureVersion': '2.0'
+    }
+    try:
+        if transcode:
+            audio = transcode_bytes(chunk.data, chunk.file_name, progress_callback=progress_callback)
+            body = MultipartStream(form_data, 'file', audio.name, audio, audio.type)
+        else:
+            audio = io.BytesIO(chunk.data)
+            body = MultipartStream(form_data, 'file', chunk.file_name, audio, chunk.mime_type,
+                                   progress_callback=progress_callback)
+    except Exception as e:
+        return {"success": False, "error": f"Audio segment processing error: {str(e)}", "uploaded_bytes": 0}
+    
+    result = make_request(transcription_url, body=body, idempotency_key=form_data['idempotencyKey'])
+    result["uploaded_bytes"] = audio.tell()
+    return result
+
+def send_chunked_audio_to_n8n(file, meeting_title: str, attendees: str, n8n_url: str, transcription_url: str,
+                              max_workers: int = CHUNK_UPLOAD_WORKERS,
+                              progress_callback: Optional[ProgressCallback] = None,
+                              transcode: bool = False, idempotency_key: Optional[str] = None,
+                              ledger: Optional[UploadLedger] = None,
+                              on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+    """Split a long recording, transcribe the segments in parallel and analyse the joined transcript.
+
+    With an idempotency key and a ledger, every acknowledged segment is recorded, and
+    a later attempt for the same content only sends the segments still missing.
+    """
+    if not transcription_url:
+        return {"success": False, "error": TRANSCRIPTION_URL_REQUIRED}
+    
+    # Transcoded segments shrink, so cut the source into pieces that land just under the limit
+    max_bytes = MAX_CHUNK_BYTES
+    if transcode:
+        max_bytes = max(MAX_CHUNK_BYTES, MAX_CHUNK_BYTES * file.size // max(upload_size(file, transcode), 1))
+    try:
+        chunks = split_audio(file, max_bytes)
+    except Exception as e:
+        return {"success": False, "error": f"Could not split audio file: {str(e)}"}
+    
+    recording_id = idempotency_key or uuid.uuid4().hex
+    acknowledged = ledger.acknowledged_parts(recording_id, len(chunks)) if ledger and idempotency_key else {}
+    pending = [chunk for chunk in chunks if chunk.index not in acknowledged]
+    lock = threading.Lock()
+    sent = [chunk.size if chunk.index in acknowledged else 0 for chunk in chunks]
+    total = sum(chunk.size for chunk in chunks)
+    
+    def chunk_progress(index: int) -> Optional[ProgressCallback]:
+        if progress_callback is None:
+            return None
+        
+        # Segments upload concurrently, so report their combined progress
+        def update(bytes_sent: int, total_bytes: int):
+            with lock:
+                sent[index] = min(bytes_sent, chunks[index].size)
+                progress_callback(sum(sent), total)
+        
+        return update
+    
+    def upload_segment(chunk: AudioChunk) -> Dict[str, Any]:
+        result = with_retries(lambda: send_chunk_to_n8n(chunk, len(chunks), recording_id, file.name, transcription_url,
+                                                        chunk_progress(chunk.index), transcode))
+        if result.get("success") and ledger and idempotency_key:
+            ledger.record_part(recording_id, len(chunks), chunk.index, result)
+        return result
+    
+    # Worker threads need the script context to redraw the progress bar
+    ctx = get_script_run_ctx()
+    uploaded = {}
+    if on_event:
+        on_event('stage', {'stage': 'transcribing', 'segments': len(chunks), 'resumed': len(acknowledged)})
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending)),
+                                initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as executor:
+            futures = {chunk.index: executor.submit(upload_segment, chunk) for chunk in pending}
+            uploaded = {index: future.result() for index, future in futures.items()}
+    results = [acknowledged.get(chunk.index) or uploaded[chunk.index] for chunk in chunks]
+    
+    # Responses arrive in any order; results are kept in recording order
+    fragments = []
+    for chunk, result in zip(chunks, results):
+        if not result.get("success"):
+            return {"success": False, "error": f"Segment {chunk.index + 1} of {len(chunks)} failed: {result.get('error')}"}
+        fragments.append(extract_transcript(result.get("response")).strip())
+    
+    transcript = "\n".join(fragment for fragment in fragments if fragment)
+    if not transcript:
+        return {"success": False, "error": "Transcription webhook returned no text for the audio segments"}
+    
+    result = send_text_to_n8n(transcript, file.name, meeting_title or f"Audio: {file.name}", attendees, n8n_url,
+                              idempotency_key=idempotency_key, on_event=on_event)
+    result["chunks"] = len(chunks)
+    result["resumed_chunks"] = len(acknowledged)
+    # Kept with the result so the meeting's words can be searched later
+    result["transcript"] = transcript
+    if transcode:
+        result["transcode"] = {"original_bytes": file.size,
+                               "uploaded_bytes": sum(chunk_result["uploaded_bytes"] for chunk_result in results)}
+    return result
+
+def process_meeting(content: str, uploaded_file, file_name: str, meeting_title: str, attendees: str, n8n_url: str,
+                    transcription_url: str, transcode: bool, ledger: UploadLedger, reprocess: bool = False,
+                    progress_callback: Optional[ProgressCallback] = None,
+                    on_event: Optional[EventCallback] = None,
+                    index: Optional[MeetingIndex] = None) -> Dict[str, Any]:
+    """Send one meeting to N8N, or return the saved result if identical content was processed before"""
+    is_audio = uploaded_file is not None and uploaded_file.name.lower().endswith(('.mp3', '.wav'))
+    # The same content sent with the same settings always gets the same key
+    if is_audio:
+        upload_key = content_key(uploaded_file, 'audio', n8n_url, transcription_url, meeting_title, attendees, transcode)
+    else:
+        upload_key = content_key(content, 'text', n8n_url, file_name, meeting_title, attendees)
+    
+    result = None if reprocess else ledger.completed(upload_key)
+    if result is not None:
+        return result
+    
+    # Results streamed back before the final response are indexed with it
+    streamed_results = []
+    
+    def record_event(event: str, data: Any):
+        if event in ('action_item', 'summary'):
+            streamed_results.append((event, data))
+        if on_event:
+            on_event(event, data)
+    
+    # Determine processing type
+    if is_audio and needs_chunking(uploaded_file, transcode):
+        result = send_chunked_audio_to_n8n(uploaded_file, meeting_title, attendees, n8n_url, transcription_url,
+                                           progress_callback=progress_callback, transcode=transcode,
+                                           idempotency_key=upload_key, ledger=ledger, on_event=record_event)
+    elif is_audio:
+        result = send_audio_to_n8n(uploaded_file, meeting_title, attendees, n8n_url,
+                                   progress_callback=progress_callback, transcode=transcode,
+                                   idempotency_key=upload_key, on_event=record_event)
+    else:
+        result = send_text_to_n8n(content, file_name, meeting_title, attendees, n8n_url, idempotency_key=upload_key,
+                                  on_event=record_event)
+    
+    if result["success"]:
+        ledger.record_completed(upload_key, file_name, result)
+        if index:
+            # Audio content is only a marker; the transcript comes back with the result
+            index_meeting(index, upload_key, result, '' if is_audio else content, file_name, meeting_title,
+                          attendees, streamed_results)
+    return result
+
+def index_meeting(index: MeetingIndex, key: str, result: Dict[str, Any], content: str, file_name: str,
+                  meeting_title: str, attendees: str, streamed_results) -> None:
+    """Add a processed meeting to the search index; a failure there never fails the upload"""
+    response = result.get("response")
+    transcript = content or result.get("transcript") or (
+        extract_transcript(response) if isinstance(response, (dict, list)) else '')
+    try:
+        index.add_meeting(key, response, streamed_results, transcript=transcript,
+                          title=meeting_title or file_name, attendees=attendees, file_name=file_name)
+    except sqlite3.Error as e:
+        result["index_error"] = str(e)
+
+def make_request(url: str, json_payload=None, files=None, form_data=None,
+                 body: Optional[MultipartStream] = None, idempotency_key: Optional[str] = None,
+                 on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+    """Make HTTP request to N8N webhook.
+
+    Webhooks that stream server-sent events have their stages and partial results
+    passed to on_event as they arrive; otherwise it gets a "waiting" event every few
+    seconds until the response comes.
+    """
     try:
         headers = {'User-Agent': 'StreamlitProcessor/1.0'}
+        if idempotency_key:
+            # Lets the workflow recognise a resent upload it has already handled
+            headers['Idempotency-Key'] = idempotency_key
         
         if json_payload:
             headers['Content-Type'] = 'application/json'
-            response = requests.post(url, json=json_payload, headers=headers, timeout=180)
+            request_kwargs = {'json': json_payload}
+        elif body is not None:
+            headers['Content-Type'] = body.content_type
+            request_kwargs = {'data': body.request_data}
         else:
             # For file uploads, don't set Content-Type - let requests handle it
-            response = requests.post(url, files=files, data=form_data, headers={'User-Agent': 'StreamlitProcessor/1.0'}, timeout=180)
+            request_kwargs = {'files': files, 'data': form_data}
         
-        response.raise_for_status()
+        # The request runs on its own thread; it needs the script context to redraw the progress bar
+        ctx = get_script_run_ctx()
+        response = collect_response(stream_webhook(url, session=shared_session(), headers=headers, timeout=180,
+                                                   before_start=lambda thread: add_script_run_ctx(thread, ctx),
+                                                   **request_kwargs), on_event)
+        response_data = response['body']
         
-        # Try to parse JSON response
-        try:
-            response_data = response.json()
-        except:
-            response_data = response.text
+        if response['status_code'] >= 400:
+            error_text = response_data if isinstance(response_data, str) else json.dumps(response_data)
+            return {"success": False, "error": f"HTTP {response['status_code']}: {error_text[:500]}",
+                    "retryable": response['status_code'] in (502, 503, 504)}
         
         return {
             "success": True,
-            "status_code": response.status_code,
+            "status_code": response['status_code'],
             "message": "Processing completed successfully",
             "response": response_data
         }
@@ -142,27 +417,68 @@ def make_request(url: str, json_payload=None, files=None, form_data=None) -> Dic
     except requests.exceptions.Timeout:
         return {"success": False, "error": "Request timed out - N8N processing may take longer than expected"}
     except requests.exceptions.ConnectionError:
-        return {"success": False, "error": "Connection error - please check your N8N URL"}
-    except requests.exceptions.HTTPError as e:
-        error_text = ""
-        try:
-            error_text = e.response.text[:500]
-        except:
-            pass
-        return {"success": False, "error": f"HTTP {e.response.status_code}: {error_text}"}
+        return {"success": False, "error": "Connection error - please check your N8N URL", "retryable": True}
     except Exception as e:
         return {"success": False, "error": f"Unexpected error: {str(e)}"}
 
-def display_results(result: Dict[str, Any]):
+def progress_display(status, partial_results) -> EventCallback:
+    """Show progress events in a st.status box, and action items and the summary as soon as they arrive"""
+    current = {'label': 'Processing meeting content...'}
+    shown = set()
+    
+    def show(event: str, data: Any):
+        # The workflow repeats stages already done locally (queued, classifying); only saving and analysing recur
+        if event == 'stage' and data['stage'] in shown and data['stage'] not in ('analysing', 'saving'):
+            return
+        if event == 'stage':
+            shown.add(data['stage'])
+            current['label'] = STAGE_LABELS.get(data['stage'], data['stage'].title())
+            status.update(label=current['label'])
+            status.write(current['label'])
+        elif event == 'waiting':
+            # n8n holds the request open until the workflow answers; show that it is still running
+            status.update(label=f"{current['label']} ({data['seconds']}s)")
+        elif event == 'action_item':
+            partial_results.markdown(f"📋 **{data.get('Action Item') or data.get('actionItem', 'N/A')}** - "
+                                     f"{data.get('Owner') or data.get('owner', 'N/A')}, "
+                                     f"due {data.get('Due Date') or data.get('dueDate', 'N/A')}, "
+                                     f"{data.get('Priority') or data.get('priority', 'N/A')} priority")
+        elif event == 'summary':
+            partial_results.markdown(f"📊 **Executive Summary:** "
+                                     f"{data.get('Executive Summary') or data.get('executiveSummary', 'N/A')}")
+    
+    return show
+
+def display_results(result: Dict[str, Any], celebrate: bool = True):
     """Display processing results"""
     if result["success"]:
         st.success("✅ Processing completed successfully!")
+        if result.get("index_error"):
+            st.warning(f"⚠️ The meeting could not be added to the search index: {result['index_error']}")
+        if result.get("cached"):
+            st.info(f"♻️ This content was already processed at {result['processed_at']} - "
+                    f"showing the saved result instead of uploading it again")
+        elif result.get("resumed_chunks"):
+            st.info(f"⏯️ Resumed upload: {result['resumed_chunks']} of {result['chunks']} segments "
+                    f"were already transcribed and were not sent again")
         
-        col1, col2 = st.columns(2)
-        with col1:
+        columns = st.columns(3 if result.get("chunks") else 2)
+        with columns[0]:
             st.metric("Status Code", result['status_code'])
-        with col2:
+        with columns[1]:
             st.metric("Processed At", datetime.now().strftime('%H:%M:%S'))
+        if result.get("chunks"):
+            with columns[2]:
+                st.metric("Audio Segments", result["chunks"])
+        if result.get("transcode"):
+            sizes = result["transcode"]
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Original Size", f"{sizes['original_bytes'] / (1024 * 1024):.1f} MB")
+            with col2:
+                st.metric("Uploaded Size", f"{sizes['uploaded_bytes'] / (1024 * 1024):.1f} MB",
+                          delta=f"{sizes['uploaded_bytes'] / max(sizes['original_bytes'], 1):.0%} of original",
+                          delta_color="off")
         
         if result.get("response"):
             with st.expander("🔍 Processing Results", expanded=True):
@@ -200,7 +516,8 @@ def display_results(result: Dict[str, Any]):
                 else:
                     st.code(str(response_data))
         
-        st.balloons()
+        if celebrate:
+            st.balloons()
         
     else:
         st.error(f"❌ Processing failed: {result['error']}")
@@ -211,13 +528,142 @@ def display_results(result: Dict[str, Any]):
             - **Connection Error**: Verify your N8N webhook URL is correct and accessible
             - **Timeout**: Large files or complex processing may take longer - try smaller files
             - **HTTP 4xx/5xx**: Check N8N workflow is active and properly configured
-            - **File Issues**: Ensure file is under 25MB and in supported format (txt, mp3, wav)
+            - **File Issues**: Ensure text files are under 25MB and in supported format (txt, mp3, wav)
+            - **Long Recordings**: The transcription webhook must return each segment's text as `text` or `transcript`
             """)
 
+def show_meeting_search(index: MeetingIndex):
+    """Search past meetings and action items in the local index"""
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+    with col1:
+        query = st.text_input("Keywords", placeholder="e.g. budget, login bug, pric*", key="search_query")
+    with col2:
+        owner = st.text_input("Action Item Owner", placeholder="e.g. Alice", key="search_owner")
+    with col3:
+        meeting_type = st.selectbox("Meeting Type", ["Any", "standup", "strategy", "client", "general"],
+                                    key="search_type")
+    with col4:
+        dates = st.date_input("Meeting Dates", value=(), key="search_dates", help="Pick a start and an end date")
+    
+    started = time.perf_counter()
+    results = index.search(query, owner=owner, meeting_type=None if meeting_type == "Any" else meeting_type,
+                           date_from=dates[0].isoformat() if dates else None,
+                           date_to=dates[-1].isoformat() if dates else None)
+    st.caption(f"{len(results['meetings'])} meetings and {len(results['action_items'])} action items "
+               f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    
+    if results['action_items']:
+        st.markdown("**📋 Action Items**")
+        st.dataframe([{
+            'Action Item': item['action_item'], 'Owner': item['owner'], 'Due': item['due_date'],
+            'Priority': item['priority'], 'Meeting': item['title'], 'Date': item['meeting_date']
+        } for item in results['action_items']], use_container_width=True, hide_index=True)
+    for meeting in results['meetings']:
+        st.markdown(f"**{meeting['title'] or meeting['file_name'] or 'Untitled meeting'}** · "
+                    f"{meeting['meeting_type'].title()} · {meeting['meeting_date']} · "
+                    f"{meeting['action_item_count']} action items")
+        if meeting['snippet'] or meeting['executive_summary']:
+            st.caption(meeting['snippet'] or meeting['executive_summary'])
+
+def get_upload_queue() -> UploadQueue:
+    """Bulk upload queue of this browser session; its workers keep running across reruns"""
+    if 'upload_queue' not in st.session_state:
+        st.session_state.upload_queue = UploadQueue()
+    return st.session_state.upload_queue
+
+def queue_files(queue: UploadQueue, files, meeting_title: str, attendees: str, n8n_url: str,
+                transcription_url: str, transcode_enabled: bool, ledger: UploadLedger,
+                index: Optional[MeetingIndex] = None):
+    """Validate files on the script thread and hand their uploads to the background workers"""
+    for file in files:
+        is_audio = file.name.lower().endswith(('.mp3', '.wav'))
+        content = ""
+        if not validate_file_type(file):
+            queue.add_failed(file.name, file.size, "File type not supported")
+            continue
+        if not is_audio:
+            if not validate_file_size(file):
+                queue.add_failed(file.name, file.size, "File size must be less than 25MB")
+                continue
+            try:
+                content = file.getvalue().decode('utf-8')
+            except UnicodeDecodeError:
+                queue.add_failed(file.name, file.size, "Cannot read file - not a valid UTF-8 text file")
+                continue
+            if not content.strip():
+                queue.add_failed(file.name, file.size, "The text file appears to be empty")
+                continue
+        
+        transcode = is_audio and transcode_enabled and can_transcode(file.name)
+        if is_audio and not transcription_url and needs_chunking(file, transcode):
+            queue.add_failed(file.name, file.size, TRANSCRIPTION_URL_REQUIRED)
+            continue
+        task = functools.partial(process_meeting, content, file, file.name, meeting_title, attendees, n8n_url,
+                                 transcription_url, transcode, ledger, index=index)
+        queue.submit(file.name, file.size, lambda progress, task=task: task(progress_callback=progress))
+
+def show_queue_status(queue: UploadQueue):
+    """Per-file status table that refreshes itself while uploads run, without rerunning the page"""
+    refreshing = queue.pending
+    
+    @st.fragment(run_every=QUEUE_REFRESH_SECONDS if refreshing else None)
+    def status_table():
+        st.dataframe(
+            queue.status_rows(),
+            use_container_width=True,
+            hide_index=True,
+            column_config={'Progress': st.column_config.ProgressColumn('Progress', min_value=0.0, max_value=1.0)}
+        )
+        if refreshing and not queue.pending:
+            # Everything finished: rerun the page once to show the aggregated results
+            st.rerun()
+    
+    status_table()
+
+def show_bulk_results(queue: UploadQueue):
+    """Aggregated results of a finished bulk upload"""
+    summary = queue.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Files", summary['files'])
+    with col2:
+        st.metric("Processed", summary['Done'])
+    with col3:
+        st.metric("Already Processed", summary['Cached'])
+    with col4:
+        st.metric("Failed", summary['Failed'])
+    st.caption(f"Finished in {summary['wall_seconds']:.1f}s; one file at a time would have taken about "
+               f"{summary['sequential_seconds']:.1f}s")
+    
+    rows, export = [], []
+    for job in queue.jobs:
+        response = (job.result or {}).get("response")
+        response = response if isinstance(response, dict) else {}
+        rows.append({
+            'File': job.file_name,
+            'Status': job.status,
+            'Meeting Type': response.get('summaryRecord', {}).get('meetingType', ''),
+            'Action Items': len(response.get('actionItems', [])),
+            'Error': (job.result or {}).get('error', '')
+        })
+        export.append({'fileName': job.file_name, 'status': job.status, 'result': job.result})
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    
+    st.download_button("💾 Download All Results (JSON)", json.dumps(export, indent=2, default=str),
+                       file_name="meeting_results.json", mime="application/json")
+    
+    selected = st.selectbox("Show details for", [job.file_name for job in queue.jobs])
+    job = next(job for job in queue.jobs if job.file_name == selected)
+    display_results(job.result, celebrate=False)
+
 def main():
     st.title("🧠 Smart Meeting Processor")
     st.markdown("Upload meeting content for intelligent analysis and action item extraction")
     
+    # Past meetings are searched locally, without the webhook or Google Sheets
+    with st.expander("🔎 Search Past Meetings"):
+        show_meeting_search(get_meeting_index())
+    
     # Sidebar configuration
     with st.sidebar:
         st.header("⚙️ Configuration")
@@ -238,6 +684,21 @@ def main():
             placeholder="e.g., Alice, Bob, Charlie"
         )
         
+        transcription_url = st.text_input(
+            "Transcription Webhook URL",
+            placeholder="Required for recordings over 24MB",
+            help="Endpoint that transcribes audio segments and returns the text; used for recordings over 24MB",
+            type="password"
+        )
+        
+        transcode_enabled = st.checkbox(
+            "Transcode audio before upload",
+            value=True,
+            help=f"Convert recordings locally to 16 kHz mono speech encoding "
+                 f"({'MP3 via ffmpeg' if ffmpeg_available() else 'WAV only; install ffmpeg for MP3'}) "
+                 f"so far fewer bytes are uploaded and transcribed"
+        )
+        
         if not n8n_url:
             st.warning("⚠️ N8N webhook URL is required")
     
@@ -249,13 +710,14 @@ def main():
     st.subheader("📤 Upload Method")
     upload_method = st.radio(
         "Choose how you'd like to provide meeting content:",
-        ["Direct Text Input", "File Upload"],
+        ["Direct Text Input", "File Upload", "Bulk Upload"],
         horizontal=True
     )
     
     content = ""
     file_name = "direct_input.txt"
     uploaded_file = None
+    transcode = False
     
     if upload_method == "Direct Text Input":
         st.subheader("✍️ Text Input")
@@ -268,13 +730,43 @@ def main():
         
         if content:
             # Show content analysis
-            col1, col2 = st.columns(2)
+            col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("Character Count", f"{len(content):,}")
             with col2:
                 prediction = predict_meeting_type(content)
                 st.metric("Predicted Type", prediction['predicted_type'].title())
+            with col3:
+                show_token_metric(content)
         
+    elif upload_method == "Bulk Upload":
+        st.subheader("📚 Bulk Upload")
+        st.info("Queue many meetings at once; they are sent to N8N in the background, "
+                f"{get_upload_queue().max_workers} at a time")
+        
+        files = st.file_uploader(
+            "Choose files",
+            type=["txt", "mp3", "wav"],
+            accept_multiple_files=True,
+            help="Text files and audio recordings; each file is processed as a separate meeting"
+        )
+        queue = get_upload_queue()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button(f"📥 Queue {len(files)} File(s)", type="primary", disabled=not files, use_container_width=True):
+                queue_files(queue, files, meeting_title, attendees, n8n_url, transcription_url, transcode_enabled,
+                            get_upload_ledger(), get_meeting_index())
+        with col2:
+            if st.button("🧹 Clear Finished", disabled=not queue.jobs, use_container_width=True):
+                queue.clear_finished()
+        
+        if queue.jobs:
+            st.subheader("📊 Queue Status")
+            show_queue_status(queue)
+            if not queue.pending:
+                show_bulk_results(queue)
+    
     else:  # File Upload
         st.subheader("📁 File Upload")
         st.info("Supported formats: Text files (.txt), Audio files (.mp3, .wav)")
@@ -287,7 +779,9 @@ def main():
         
         if uploaded_file:
             # Validate file
-            if not validate_file_size(uploaded_file):
+            # Audio is never rejected for size: it is transcoded and/or split into segments
+            is_audio = uploaded_file.name.lower().endswith(('.mp3', '.wav'))
+            if not validate_file_size(uploaded_file) and not is_audio:
                 st.error("❌ File size must be less than 25MB")
                 st.stop()
             
@@ -296,6 +790,7 @@ def main():
                 st.stop()
             
             file_name = uploaded_file.name
+            transcode = is_audio and transcode_enabled and can_transcode(file_name)
             file_size_mb = uploaded_file.size / (1024 * 1024)
             
             st.success(f"✅ File ready: {file_name} ({file_size_mb:.1f} MB)")
@@ -312,12 +807,14 @@ def main():
                         st.warning("⚠️ The text file appears to be empty")
                         st.stop()
                     
-                    col1, col2 = st.columns(2)
+                    col1, col2, col3 = st.columns(3)
                     with col1:
                         st.metric("Words", f"{len(content.split()):,}")
                     with col2:
                         prediction = predict_meeting_type(content)
                         st.metric("Predicted Type", prediction['predicted_type'].title())
+                    with col3:
+                        show_token_metric(content)
                     
                     with st.expander("📄 Content Preview"):
                         preview = content[:800] + "..." if len(content) > 800 else content
@@ -332,28 +829,52 @@ def main():
             
             # Handle audio files
             elif uploaded_file.name.lower().endswith(('.mp3', '.wav')):
-                st.info("🎵 Audio file will be transcribed automatically by the N8N workflow")
+                if transcode:
+                    estimate = upload_size(uploaded_file, transcode)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.metric("Original Size", f"{file_size_mb:.1f} MB")
+                    with col2:
+                        st.metric("Upload Size (est.)", f"{estimate / (1024 * 1024):.1f} MB",
+                                  delta=f"{estimate / uploaded_file.size:.0%} of original", delta_color="off")
+                elif transcode_enabled:
+                    st.caption("Install ffmpeg to transcode .mp3 files before upload")
+                
+                if needs_chunking(uploaded_file, transcode):
+                    if not transcription_url:
+                        st.error(f"❌ {TRANSCRIPTION_URL_REQUIRED}")
+                        st.stop()
+                    segments = -(-upload_size(uploaded_file, transcode) // MAX_CHUNK_BYTES)
+                    st.info(f"✂️ Long recording: it will be split on silences into about {segments} segments "
+                            f"that are transcribed in parallel")
+                else:
+                    st.info("🎵 Audio file will be transcribed automatically by the N8N workflow")
                 content = "AUDIO_FILE"  # Marker for audio processing
     
     # Processing section
     if content or uploaded_file:
         st.subheader("🚀 Process Meeting Content")
         
+        reprocess = st.checkbox(
+            "Process again even if this exact content was already processed",
+            help="Identical uploads normally return the saved result instantly instead of re-running the workflow"
+        )
+        
         if st.button("🔄 Start Processing", type="primary", use_container_width=True):
-            with st.spinner("Processing meeting content..."):
-                # Add progress bar
-                progress_bar = st.progress(0)
-                
-                # Determine processing type
-                if content == "AUDIO_FILE" or (uploaded_file and uploaded_file.name.lower().endswith(('.mp3', '.wav'))):
-                    progress_bar.progress(25)
-                    result = send_audio_to_n8n(uploaded_file, meeting_title, attendees, n8n_url)
-                else:
-                    progress_bar.progress(25)
-                    result = send_text_to_n8n(content, file_name, meeting_title, attendees, n8n_url)
+            with st.status("Processing meeting content...", expanded=True) as status:
+                # Upload progress follows the bytes actually written to the socket
+                progress_callback = None
+                if uploaded_file and not uploaded_file.name.lower().endswith('.txt'):
+                    progress_callback = progress_bar_callback(st.progress(0))
                 
-                progress_bar.progress(100)
-                time.sleep(0.5)  # Brief pause for UX
+                # Stages, and results the workflow streams back, are shown as they arrive
+                result = process_meeting(content, uploaded_file, file_name, meeting_title, attendees, n8n_url,
+                                         transcription_url, transcode, get_upload_ledger(), reprocess=reprocess,
+                                         progress_callback=progress_callback,
+                                         on_event=progress_display(status, st.container()),
+                                         index=get_meeting_index())
+                status.update(label=STAGE_LABELS['done'] if result["success"] else "❌ Processing failed",
+                              state="complete" if result["success"] else "error", expanded=False)
             
             # Display results
             display_results(result)
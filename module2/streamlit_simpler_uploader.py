@@ -1,7 +1,13 @@
 import streamlit as st
 import requests
+import io
+import json
 import os
 from typing import Optional
+from meeting_classifier import classify_meeting, to_workflow_classification
+from transcript_prep import prepare_transcript
+from upload_ledger import UploadLedger, content_key, with_retries
+from upload_stream import MultipartStream, ProgressCallback, progress_bar_callback
 
 st.set_page_config(
     page_title="File Upload to N8N",
@@ -17,17 +23,33 @@ def validate_file_size(file) -> bool:
     file_size_mb = file.size / (1024 * 1024)
     return file_size_mb < 25
 
-def send_to_n8n(file, n8n_url: str, file_type: str) -> dict:
+@st.cache_resource
+def get_upload_ledger() -> UploadLedger:
+    """Shared record of completed uploads"""
+    return UploadLedger()
+
+def send_to_n8n(file, n8n_url: str, file_type: str, progress_callback: Optional[ProgressCallback] = None,
+                idempotency_key: Optional[str] = None) -> dict:
     """Send file to N8N webhook URL"""
     try:
+        # Text and audio files are both sent as multipart form data, streamed in chunks
+        file.seek(0)
+        fields = {"idempotencyKey": idempotency_key} if idempotency_key else {}
+        content = file
         if file_type == "text":
-            # For text files, send as multipart form data
-            files = {"file": (file.name, file.getvalue(), file.type)}
-            response = requests.post(n8n_url, files=files, timeout=60)
-        else:
-            # For audio files, send as binary data
-            files = {"file": (file.name, file.getvalue(), file.type)}
-            response = requests.post(n8n_url, files=files, timeout=60)
+            # Send the cleaned transcript with its chunks, classified locally so the
+            # workflow's classifier node can pass the result straight through
+            prepared = prepare_transcript(file.read().decode('utf-8', errors='replace'))
+            file.seek(0)
+            classification = to_workflow_classification(classify_meeting(prepared["transcript"]))
+            fields.update(meetingType=classification["detectedType"], classification=json.dumps(classification),
+                          transcriptTokens=str(prepared["transcriptTokens"]), chunks=json.dumps(prepared["chunks"]))
+            content = io.BytesIO(prepared["transcript"].encode('utf-8'))
+        body = MultipartStream(fields, "file", file.name, content, file.type, progress_callback=progress_callback)
+        headers = {"Content-Type": body.content_type}
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        response = requests.post(n8n_url, data=body, headers=headers, timeout=60)
         
         response.raise_for_status()
         
@@ -41,9 +63,10 @@ def send_to_n8n(file, n8n_url: str, file_type: str) -> dict:
     except requests.exceptions.Timeout:
         return {"success": False, "error": "Request timed out"}
     except requests.exceptions.ConnectionError:
-        return {"success": False, "error": "Connection error - check N8N URL"}
+        return {"success": False, "error": "Connection error - check N8N URL", "retryable": True}
     except requests.exceptions.HTTPError as e:
-        return {"success": False, "error": f"HTTP error: {e.response.status_code}"}
+        return {"success": False, "error": f"HTTP error: {e.response.status_code}",
+                "retryable": e.response.status_code in (502, 503, 504)}
     except Exception as e:
         return {"success": False, "error": f"Unexpected error: {str(e)}"}
 
@@ -115,11 +138,23 @@ def main():
         
         # Upload button
         if st.button("🚀 Upload to N8N", type="primary"):
-            with st.spinner("Uploading file..."):
-                result = send_to_n8n(uploaded_file, n8n_url, file_type)
+            # Re-uploading the same file to the same webhook returns the saved response
+            ledger = get_upload_ledger()
+            upload_key = content_key(uploaded_file, file_type, n8n_url)
+            result = ledger.completed(upload_key)
+            if result is None:
+                progress_bar = st.progress(0, text="Uploading file...")
+                result = with_retries(lambda: send_to_n8n(uploaded_file, n8n_url, file_type,
+                                                          progress_callback=progress_bar_callback(progress_bar),
+                                                          idempotency_key=upload_key))
+                progress_bar.empty()
+                if result["success"]:
+                    ledger.record_completed(upload_key, uploaded_file.name, result)
             
             if result["success"]:
                 st.success(f"✅ {result['message']}")
+                if result.get("cached"):
+                    st.info(f"♻️ Already uploaded at {result['processed_at']} - showing the saved response")
                 st.info(f"Status Code: {result['status_code']}")
                 if result["response"]:
                     with st.expander("Server Response"):
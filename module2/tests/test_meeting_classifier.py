@@ -0,0 +1,120 @@
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from meeting_classifier import (CLASSIFIER_NODE, MeetingClassifier, load_workflow_patterns,
+                                to_workflow_classification)
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKFLOWS = [os.path.join(MODULE_DIR, name) for name in ('hook_meeting_workflow.json', 'form_trigger_workflow.json')]
+
+# The weights of the JS node, pinned so a change to the workflow is a deliberate one
+JS_WEIGHTS = {
+    'standup': [10, 8, 3, 2],
+    'strategy': [8, 6, 4, 3],
+    'client': [8, 6, 4, 3]
+}
+
+TRANSCRIPTS = [
+    """Daily standup for Sprint 23.
+    John: Completed user auth feature, now working on API integration.
+    Sarah: Finished database updates, starting frontend components today.
+    Mike: Blocked on third-party integration - waiting for API keys. Any blockers? Next standup tomorrow.""",
+    """Quarterly planning: we reviewed the product roadmap and long-term vision, agreed the Q3 objectives
+    and a budget for the new initiative, and discussed our competitive position in the market.""",
+    """Client call with Acme. The customer sent feedback on the proposal; scope and timeline need sign-off
+    before the contract is signed. Delivery of the first requirement is due after the stakeholder presentation.""",
+    "Lunch order for Friday: pizza or sushi?",
+    "Budget review",
+    "",
+]
+
+
+def random_transcript(seed: int, size: int = 5000) -> str:
+    rng = random.Random(seed)
+    vocabulary = [phrase.replace('.?', rng.choice(['', '-', ' ']))
+                  for patterns in load_workflow_patterns()[0].values()
+                  for pattern, _ in patterns for phrase in pattern.split('|')]
+    filler = "so the and we that is was it for on with as our this they next week team update".split()
+    words = [rng.choice(vocabulary) if rng.random() < 0.05 else rng.choice(filler) for _ in range(size // 5)]
+    return ' '.join(word.upper() if rng.random() < 0.1 else word for word in words)
+
+
+def node_scores(content: str):
+    """Scores the way the JS node computes them: one /g regex per pattern"""
+    patterns, _, _ = load_workflow_patterns()
+    scores = dict.fromkeys(list(patterns) + ['general'], 0)
+    for meeting_type, weighted in patterns.items():
+        for pattern, weight in weighted:
+            scores[meeting_type] += len(re.findall(pattern, content.lower())) * weight
+    return scores
+
+
+def run_node(workflow_path: str, input_json: dict) -> dict:
+    """Run the classifier node's JavaScript with node.js on one input item"""
+    with open(workflow_path, encoding='utf-8') as f:
+        code = next(node for node in json.load(f)['nodes'] if node['name'] == CLASSIFIER_NODE)['parameters']['jsCode']
+    script = (f"const $input = {{ first: () => ({{ json: {json.dumps(input_json)} }}) }};\n"
+              f"console.log(JSON.stringify((() => {{\n{code}\n}})()));")
+    output = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize('workflow_path', WORKFLOWS)
+def test_loaded_weights_match_the_js_node(workflow_path):
+    patterns, min_threshold, confidence_scale = load_workflow_patterns(workflow_path)
+    assert {meeting_type: [weight for _, weight in weighted] for meeting_type, weighted in patterns.items()} == JS_WEIGHTS
+    assert patterns['standup'][0][0] == 'what did you do yesterday|what are you working on today|any blockers'
+    assert patterns['strategy'][1][0] == 'quarterly|annual|long.?term|strategic|planning'
+    assert (min_threshold, confidence_scale) == (5, 20)
+
+
+def test_both_workflows_classify_the_same_way():
+    assert load_workflow_patterns(WORKFLOWS[0]) == load_workflow_patterns(WORKFLOWS[1])
+
+
+def test_missing_classifier_node_is_an_error(tmp_path):
+    workflow = tmp_path / 'workflow.json'
+    workflow.write_text(json.dumps({'nodes': [{'name': 'Something else', 'parameters': {}}]}))
+    with pytest.raises(ValueError):
+        load_workflow_patterns(str(workflow))
+
+
+@pytest.mark.parametrize('content', TRANSCRIPTS + [random_transcript(seed) for seed in range(20)])
+def test_scores_match_the_node_regexes(content):
+    assert MeetingClassifier().score(content) == node_scores(content)
+
+
+def test_classification():
+    classifier = MeetingClassifier()
+    assert [classifier.classify(content)['predicted_type'] for content in TRANSCRIPTS] == \
+        ['standup', 'strategy', 'client', 'general', 'client', 'general']
+    # 'budget' scores 4 for strategy and 6 for client
+    assert classifier.classify('budget budget')['scores'] == {'standup': 0, 'strategy': 8, 'client': 12, 'general': 0}
+    # Ties go to the first type
+    assert classifier.classify('sprint roadmap')['predicted_type'] == 'standup'
+    assert classifier.classify('scrum ' * 10)['confidence'] == 1.0
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node.js is not installed')
+@pytest.mark.parametrize('workflow_path', WORKFLOWS)
+def test_matches_the_js_node(workflow_path):
+    classifier = MeetingClassifier.from_workflow(workflow_path)
+    for content in TRANSCRIPTS + [random_transcript(seed) for seed in range(5)]:
+        expected = run_node(workflow_path, {'meetingNotes': content})['classification']
+        assert to_workflow_classification(classifier.classify(content)) == expected
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node.js is not installed')
+def test_node_uses_a_local_classification():
+    classification = to_workflow_classification(MeetingClassifier().classify(TRANSCRIPTS[2]))
+    # JSON bodies carry an object, multipart form fields a string
+    for sent in (classification, json.dumps(classification)):
+        output = run_node(WORKFLOWS[0], {'meetingNotes': 'Daily standup, any blockers?', 'classification': sent})
+        assert output['meetingType'] == 'client'
+        assert output['classification'] == classification
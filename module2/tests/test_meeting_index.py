@@ -0,0 +1,118 @@
+import io
+import json
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+import streamlit_complex_uploader as uploader
+from meeting_index import MeetingIndex, extract_records, fts_query
+from upload_ledger import UploadLedger
+
+UPLOADER_RESPONSE = {
+    'actionItems': [
+        {'actionItem': 'Draft the Q3 budget proposal', 'owner': 'Alice Smith', 'dueDate': '2025-07-01',
+         'priority': 'High'},
+        {'actionItem': 'Book the offsite venue', 'owner': 'Bob', 'dueDate': 'Not specified', 'priority': 'Low'},
+    ],
+    'summaryRecord': {'meetingType': 'strategy', 'keyDecisions': 'Hiring freeze until October',
+                      'executiveSummary': 'Reviewed the budget and the roadmap', 'nextSteps': 'Share the proposal'},
+}
+SHEET_ROW = {'Meeting Date': '2025-06-03', 'Meeting Type': 'standup', 'Action Item': 'Fix the login timeout',
+             'Owner': 'Carol', 'Due Date': 'Friday', 'Priority': 'Medium', 'Status': 'Not Started'}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MeetingIndex(str(tmp_path / 'index.db'))
+    index.add_meeting('strategy-1', UPLOADER_RESPONSE, transcript='We talked about runway and the new pricing model.',
+                      title='Strategy review', attendees='Alice, Bob', meeting_date='2025-06-01')
+    index.add_meeting('standup-1', json.dumps(SHEET_ROW), events=[('action_item', SHEET_ROW)],
+                      transcript='Carol is blocked on the login timeout bug.', title='Daily standup')
+    return index
+
+
+def test_extract_records_reads_both_result_shapes():
+    summary, items = extract_records(UPLOADER_RESPONSE)
+    assert summary['meeting_type'] == 'strategy' and summary['key_decisions'] == 'Hiring freeze until October'
+    assert [item['owner'] for item in items] == ['Alice Smith', 'Bob']
+
+    # Streamed rows usually reappear in the final response
+    summary, items = extract_records(json.dumps(SHEET_ROW), [('action_item', SHEET_ROW)])
+    assert summary['meeting_type'] == 'standup' and summary['meeting_date'] == '2025-06-03'
+    assert items == [{'action_item': 'Fix the login timeout', 'owner': 'Carol', 'due_date': 'Friday',
+                      'priority': 'Medium', 'status': 'Not Started'}]
+    assert extract_records('not json') == ({key: None for key in extract_records({})[0]}, [])
+
+
+def test_fts_query_quotes_user_input():
+    assert fts_query('budget "AND" OR (') == '"budget" "AND" "OR"'
+    assert fts_query('budg*') == '"budg"*'
+    assert fts_query('  ') is None
+
+
+def test_search_by_keyword_owner_type_and_date(index):
+    results = index.search('pricing')
+    assert [meeting['meeting_key'] for meeting in results['meetings']] == ['strategy-1']
+    assert '**pricing**' in results['meetings'][0]['snippet']
+    assert results['meetings'][0]['action_item_count'] == 2
+
+    # Porter stemming and prefixes
+    assert index.search('budgets')['action_items'][0]['owner'] == 'Alice Smith'
+    assert index.search('tim*')['meetings'][0]['meeting_key'] == 'standup-1'
+
+    by_owner = index.search(owner='alice')
+    assert [item['action_item'] for item in by_owner['action_items']] == ['Draft the Q3 budget proposal']
+    assert [meeting['meeting_key'] for meeting in by_owner['meetings']] == ['strategy-1']
+
+    assert [m['meeting_key'] for m in index.search(meeting_type='STANDUP')['meetings']] == ['standup-1']
+    assert [m['meeting_key'] for m in index.search(date_to='2025-06-02')['meetings']] == ['strategy-1']
+    assert index.search('budget', meeting_type='standup') == {'meetings': [], 'action_items': []}
+    # Without a query the most recent meetings come first
+    assert [m['meeting_key'] for m in index.search()['meetings']] == ['standup-1', 'strategy-1']
+
+
+def test_adding_a_meeting_again_replaces_it(index):
+    index.add_meeting('strategy-1', {'actionItems': [{'actionItem': 'Cancel the offsite', 'owner': 'Bob'}]},
+                      transcript='Short follow-up.', meeting_date='2025-06-01')
+    assert index.meeting_count() == 2
+    assert index.search('pricing')['meetings'] == []
+    assert index.search('venue')['action_items'] == []
+    assert [item['action_item'] for item in index.search(owner='bob')['action_items']] == ['Cancel the offsite']
+
+
+def test_import_ledger(tmp_path):
+    ledger = UploadLedger(str(tmp_path / 'ledger.db'))
+    ledger.record_completed('key-1', 'call.mp3', {'success': True, 'response': SHEET_ROW,
+                                                  'transcript': 'Carol will patch the session store.'})
+    index = MeetingIndex(str(tmp_path / 'index.db'))
+    assert index.import_ledger(str(tmp_path / 'ledger.db')) == 1
+    meeting = index.search('session')['meetings'][0]
+    assert (meeting['file_name'], meeting['meeting_type'], meeting['meeting_date']) == ('call.mp3', 'standup',
+                                                                                        '2025-06-03')
+
+
+class FakeUpload(io.BytesIO):
+    def __init__(self, name, data=b'RIFF audio'):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+@pytest.mark.parametrize('split', [False, True])
+def test_audio_meetings_are_indexed_with_their_transcript(tmp_path, monkeypatch, split):
+    transcript = 'Alice: we agreed to extend the runway.'
+    if split:
+        # Split recordings return the joined segment transcripts with the result
+        result = {'success': True, 'response': UPLOADER_RESPONSE, 'transcript': transcript}
+    else:
+        result = {'success': True, 'response': {**UPLOADER_RESPONSE, 'transcript': transcript}}
+    monkeypatch.setattr(uploader, 'needs_chunking', lambda file, transcode=False: split)
+    monkeypatch.setattr(uploader, 'send_chunked_audio_to_n8n', lambda *args, **kwargs: dict(result))
+    monkeypatch.setattr(uploader, 'send_audio_to_n8n', lambda *args, **kwargs: dict(result))
+    index = MeetingIndex(str(tmp_path / 'index.db'))
+
+    uploader.process_meeting('AUDIO_FILE', FakeUpload('standup.wav'), 'standup.wav', '', '', 'http://n8n',
+                             'http://transcribe', False, UploadLedger(str(tmp_path / 'ledger.db')), index=index)
+    with closing(sqlite3.connect(index.db_path)) as conn:
+        assert conn.execute("SELECT transcript FROM meetings").fetchall() == [(transcript,)]
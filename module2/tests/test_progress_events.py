@@ -0,0 +1,79 @@
+import json
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from progress_events import collect_response, format_event, iter_events, result_events, stream_webhook
+from workflow_simulator import StubLatency, WorkflowSimulator, serve
+
+MEETING = {'transcript': "John: Yesterday I finished the auth feature. Today I'm on the API. Blocked on the database."}
+
+
+def test_events_round_trip():
+    stream = format_event('stage', {'stage': 'analysing'}) + ': keep-alive\n\n' + format_event('waiting', 'plain')
+    assert list(iter_events(stream.splitlines(keepends=True))) == [('stage', {'stage': 'analysing'}),
+                                                                   ('waiting', 'plain')]
+    assert list(iter_events(['data: {"a": 1}', '', 'event: x', 'data: not json', ''])) == [('message', {'a': 1}),
+                                                                                          ('x', 'not json')]
+
+
+def test_partial_results_from_a_finished_response():
+    body = {'actionItems': [{'actionItem': 'Ship it'}], 'summaryRecord': {'executiveSummary': 'Done'}}
+    assert list(result_events(body)) == [('action_item', {'actionItem': 'Ship it'}),
+                                         ('summary', {'executiveSummary': 'Done'})]
+    assert list(result_events('plain text')) == []
+
+
+@pytest.fixture
+def slow_json_webhook():
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            time.sleep(0.5)
+            data = json.dumps({'ok': True}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_waiting_events_until_a_plain_webhook_answers(slow_json_webhook):
+    events = list(stream_webhook(slow_json_webhook, json={}, heartbeat_seconds=0.1, timeout=5))
+    assert events[0][0] == 'waiting' and len(events) > 2
+    assert events[-1] == ('response', {'status_code': 200, 'body': {'ok': True}})
+
+
+def test_connection_errors_are_raised():
+    with pytest.raises(Exception):
+        collect_response(stream_webhook('http://127.0.0.1:1/', json={}, timeout=1))
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node.js is not installed')
+def test_simulator_streams_stages_and_action_items():
+    simulator = WorkflowSimulator(latency=StubLatency(transcribe=0, ai=0.2, sheets=0, jitter=0))
+    server, stats = serve(simulator, port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/webhook/meeting-intelligence-webhook"
+    received = []
+    response = collect_response(stream_webhook(url, json=MEETING, timeout=30),
+                                lambda event, data: received.append((event, data)))
+    server.shutdown()
+    simulator.js.close()
+
+    stages = [data['stage'] for event, data in received if event == 'stage']
+    assert stages == ['queued', 'classifying', 'saving', 'analysing', 'saving', 'done']
+    events = [event for event, _ in received]
+    assert events.count('action_item') == 2 and events.index('action_item') < events.index('summary')
+    assert response['status_code'] == 200 and response['body']['Action Item'] == 'Follow up on the open questions'
+    assert stats.executions == 1
@@ -0,0 +1,127 @@
+import json
+import time
+
+import pytest
+import requests
+
+import fake_sheets
+import sheet_writer
+from sheet_writer import BatchedSheetWriter, BlobStore, SheetsClient, load_sheet_layouts
+
+LAYOUTS = {'Log': ('sheet-id', ['meetingId', 'fullTranscript', 'meetingNotes'])}
+
+
+@pytest.fixture
+def fake():
+    sheets = fake_sheets.FakeSheets()
+    server = fake_sheets.serve(sheets)
+    yield sheets, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def make_writer(url, tmp_path, **options):
+    return BatchedSheetWriter(SheetsClient(url), BlobStore(str(tmp_path)), dict(LAYOUTS), **options)
+
+
+def test_blob_store_round_trip(tmp_path):
+    blobs = BlobStore(str(tmp_path))
+    reference = blobs.put('John: finished the auth feature.' * 100)
+    assert reference.startswith(BlobStore.PREFIX)
+    assert blobs.put('John: finished the auth feature.' * 100) == reference
+    assert blobs.get(reference) == 'John: finished the auth feature.' * 100
+    assert blobs.get(BlobStore.PREFIX + '0' * 64) is None
+    assert blobs.get('../../etc/passwd') is None
+
+
+def test_layouts_come_from_the_workflow():
+    layouts = load_sheet_layouts()
+    assert set(layouts) == {'Meeting Input Log', 'Action Items', 'Executive Summary'}
+    assert 'fullTranscript' in layouts['Meeting Input Log'][1]
+    assert layouts['Action Items'][1][:3] == ['Meeting Date', 'Meeting Type', 'Action Item']
+
+
+def test_full_batches_are_appended_in_one_call(fake, tmp_path):
+    sheets, url = fake
+    writer = make_writer(url, tmp_path, max_rows=5, max_seconds=60)
+    writer.add('Log', [{'meetingId': f'm{index}', 'fullTranscript': f'transcript {index}'} for index in range(12)])
+    deadline = time.time() + 5
+    while writer.stats['rows_written'] < 10 and time.time() < deadline:
+        time.sleep(0.05)
+    writer.close()
+
+    rows = sheets.rows[('sheet-id', 'Log')]
+    assert [row[0] for row in rows] == [f'm{index}' for index in range(12)]
+    # 10 rows in two full batches from the background thread, the last 2 flushed on close
+    assert sheets.append_calls == 3
+    assert writer.stats == {'rows_received': 12, 'rows_written': 12, 'append_calls': 3,
+                            'failed_appends': 0, 'dead_lettered_rows': 0, 'blob_references': 12}
+
+
+def test_rows_are_written_after_max_seconds(fake, tmp_path):
+    sheets, url = fake
+    writer = make_writer(url, tmp_path, max_rows=100, max_seconds=0.2)
+    writer.add('Log', [{'meetingId': 'm1'}])
+    time.sleep(1.0)
+    assert sheets.append_calls == 1
+    writer.close()
+
+
+def test_transcripts_are_replaced_by_blob_references(fake, tmp_path):
+    sheets, url = fake
+    writer = make_writer(url, tmp_path)
+    values = writer.add('Log', [{'meetingId': 'm1', 'fullTranscript': 'Full text', 'meetingNotes': 'x' * 5000}])
+    writer.close()
+    meeting_id, transcript, notes = sheets.rows[('sheet-id', 'Log')][0]
+    assert values[0] == [meeting_id, transcript, notes]
+    assert writer.blobs.get(transcript) == 'Full text'
+    assert writer.blobs.get(notes) == 'x' * 5000
+
+
+def test_rate_limited_rows_are_kept_for_the_next_flush(fake, tmp_path, monkeypatch):
+    sheets, url = fake
+    monkeypatch.setattr(sheet_writer, 'RETRY_BACKOFF_SECONDS', 0)
+    sheets.max_per_minute = 1
+    writer = make_writer(url, tmp_path, max_seconds=60)
+    writer.add('Log', [{'meetingId': 'm1'}])
+    writer.flush()
+    writer.add('Log', [{'meetingId': 'm2'}])
+    writer.flush()
+    assert writer.stats['failed_appends'] == 1 and writer.buffered == 1
+    sheets.max_per_minute = 0
+    writer.close()
+    assert [row[0] for row in sheets.rows[('sheet-id', 'Log')]] == ['m1', 'm2']
+
+
+def test_rejected_rows_are_dead_lettered(fake, tmp_path):
+    sheets, url = fake
+    sheets.error_status = 400
+    writer = make_writer(url, tmp_path, max_seconds=60)
+    writer.add('Log', [{'meetingId': 'm1'}, {'meetingId': 'm2'}])
+    writer.flush()
+    # Not requeued: a bad request fails the same way every time
+    assert writer.buffered == 0 and sheets.rejected_calls == 1
+    assert writer.stats['failed_appends'] == 1 and writer.stats['dead_lettered_rows'] == 2
+    with open(writer.dead_letter_path, encoding='utf-8') as f:
+        entry = json.loads(f.readline())
+    assert entry['sheet'] == 'Log' and entry['status'] == 400
+    assert [row[0] for row in entry['rows']] == ['m1', 'm2']
+
+    sheets.error_status = 0
+    writer.add('Log', [{'meetingId': 'm3'}])
+    writer.close()
+    assert [row[0] for row in sheets.rows[('sheet-id', 'Log')]] == ['m3']
+
+
+def test_http_endpoint(fake, tmp_path):
+    sheets, url = fake
+    writer = make_writer(url, tmp_path, max_seconds=60)
+    server = sheet_writer.serve(writer, port=0)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    assert requests.post(f"{base}/rows/Log", json={'meetingId': 'm1', 'fullTranscript': 'Text'}).status_code == 202
+    assert requests.post(f"{base}/rows/Log", json={'rows': [{'meetingId': 'm2'}]}).json()['buffered'] == 2
+    assert requests.post(f"{base}/rows/Log", json=['not a row']).status_code == 400
+    assert requests.post(f"{base}/flush").json()['rows_written'] == 2
+    reference = sheets.rows[('sheet-id', 'Log')][0][1]
+    assert requests.get(f"{base}/blobs/{reference}").text == 'Text'
+    server.shutdown()
+    writer.close()
@@ -0,0 +1,72 @@
+import random
+
+from transcript_prep import chunk_transcript, estimate_tokens, normalize_transcript, prepare_transcript
+
+
+def test_strips_timestamps_and_filler():
+    assert normalize_transcript("[00:00:01] John: Um, so yesterday I, uh, finished the auth feature.") == \
+        "John: so yesterday I finished the auth feature."
+    assert normalize_transcript("We should escalate, you know. Hmm. Next item.") == "We should escalate. Next item."
+    assert normalize_transcript("I mean, it's, you know, late. You know, I mean, fine.") == "it's late. fine."
+    # Words that merely contain a filler are kept
+    assert normalize_transcript("Umbrella summary for the mummy project") == "Umbrella summary for the mummy project"
+
+
+def test_keeps_tics_that_are_part_of_the_sentence():
+    text = "Sarah: Do you know when the budget is due?\nMike: I mean the Q3 budget. You know what I mean?"
+    assert normalize_transcript(text) == text
+
+
+def test_collapses_speaker_turns():
+    text = "Sarah: Finished the database updates.\nSarah: Starting on the frontend.\nMike: Blocked on keys.\nSarah: Um."
+    assert normalize_transcript(text) == \
+        "Sarah: Finished the database updates. Starting on the frontend.\nMike: Blocked on keys."
+
+
+def test_dedupes_repeated_lines():
+    loop = "Mike: I'm blocked on the third-party keys, waiting for the vendor."
+    text = "\n".join([loop, loop, "Sarah: Yes.", loop, "John: Yes.", "Sarah: Yes."])
+    # Long lines are dropped wherever they repeat, short ones only when they follow each other
+    assert normalize_transcript(text) == f"{loop}\nSarah: Yes.\nJohn: Yes.\nSarah: Yes."
+
+
+def long_transcript(turns: int = 400) -> str:
+    rng = random.Random(0)
+    return "\n".join(f"{rng.choice(['Ann', 'Bob', 'Cy'])}: " +
+                     " ".join(rng.choice(['alpha', 'beta', 'gamma', 'delta']) for _ in range(rng.randint(5, 200))) + "."
+                     for _ in range(turns))
+
+
+def test_chunks_cover_the_transcript_within_budget():
+    transcript = normalize_transcript(long_transcript())
+    chunks = chunk_transcript(transcript, max_tokens=1000, overlap_tokens=100)
+    assert len(chunks) > 1
+    assert chunks[0].start_char == 0 and chunks[-1].end_char == len(transcript)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # Consecutive chunks touch or overlap by whole turns
+        assert chunk.start_char <= previous.end_char + 1
+        assert chunk.overlap_tokens <= 100
+    for chunk in chunks:
+        assert chunk.tokens <= 1000
+        assert transcript[chunk.start_char:chunk.end_char] == chunk.text
+        assert set(chunk.speakers) <= {'Ann', 'Bob', 'Cy'}
+
+
+def test_splits_a_single_long_turn():
+    transcript = "Ann: " + "word " * 5000
+    chunks = chunk_transcript(transcript.strip(), max_tokens=500, overlap_tokens=50)
+    assert all(chunk.tokens <= 500 for chunk in chunks)
+    assert sum(len(chunk.text.split()) for chunk in chunks) >= 5000
+
+
+def test_prepare_transcript():
+    text = "John: Um, daily standup.\nJohn: Uh, yesterday I finished the auth feature for the portal.\n" * 3
+    prepared = prepare_transcript(text)
+    assert prepared['transcript'] == \
+        "John: daily standup. yesterday I finished the auth feature for the portal. daily standup."
+    assert prepared['transcriptTokens'] == estimate_tokens(prepared['transcript']) < prepared['originalTokens']
+    assert prepared['chunkCount'] == 1
+    chunk = prepared['chunks'][0]
+    assert 'text' not in chunk
+    assert prepared['transcript'][chunk['startChar']:chunk['endChar']] == prepared['transcript']
+    assert prepare_transcript("")['chunks'] == []
@@ -0,0 +1,54 @@
+import base64
+import shutil
+
+import pytest
+
+from workflow_simulator import StubLatency, WorkflowSimulator, parse_request
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason='node.js is not installed')
+
+
+@pytest.fixture(scope='module')
+def simulator():
+    simulator = WorkflowSimulator(latency=StubLatency(transcribe=0, ai=0, sheets=0, jitter=0))
+    yield simulator
+    simulator.js.close()
+
+
+def executed(run):
+    return [timing.node for timing in run.timings]
+
+
+def test_text_meeting_is_routed_and_saved(simulator):
+    run = simulator.execute([{'json': {'meetingNotes': 'Client call: customer feedback on the proposal scope.'}}])
+    assert run.status_code == 200 and run.error is None
+    assert run.response['Action Item'] == 'Follow up on the open questions'
+    nodes = executed(run)
+    assert '🤝 AI Client Analysis' in nodes and '🤖 AI Standup Analysis' not in nodes
+    assert '🎤 Transcribe Audio File' not in nodes
+    assert nodes.index('🔀 Merge Audio/Text') < nodes.index('🧠 Intelligent Meeting Classifier')
+    assert all(timing.seconds >= 0 for timing in run.timings)
+
+
+def test_local_classification_decides_the_route(simulator):
+    classification = {'detectedType': 'strategy', 'confidence': 1.0, 'scores': {}, 'reasoning': 'local'}
+    run = simulator.execute([{'json': {'transcript': 'Daily standup, any blockers?', 'classification': classification}}])
+    assert '🎯 AI Strategy Analysis' in executed(run)
+
+
+def test_audio_is_transcribed(simulator):
+    body = (b'--x\r\nContent-Disposition: form-data; name="attendees"\r\n\r\nAnn\r\n'
+            b'--x\r\nContent-Disposition: form-data; name="file"; filename="m.mp3"\r\nContent-Type: audio/mpeg\r\n\r\n'
+            b'\xff\xfb\x90\x00\r\n--x--\r\n')
+    item = parse_request('multipart/form-data; boundary=x', body)
+    assert item['json'] == {'attendees': 'Ann'}
+    assert base64.b64decode(item['binary']['file']['data']) == b'\xff\xfb\x90\x00'
+    run = simulator.execute([item])
+    assert run.status_code == 200
+    assert '🎤 Transcribe Audio File' in executed(run)
+
+
+def test_empty_meeting_gets_no_response(simulator):
+    run = simulator.execute([{'json': {}}])
+    assert run.status_code == 500
+    assert '🔧 Prepare Sheet Data' not in executed(run)
@@ -0,0 +1,228 @@
+import io
+import shutil
+import struct
+import subprocess
+import threading
+import wave
+from typing import BinaryIO, Optional
+
+import numpy as np
+
+from audio_chunking import parse_mp3_frames
+from upload_stream import CHUNK_SIZE, ProgressCallback, _file_size
+
+# Speech-to-text models work at 16 kHz mono; more only adds upload bytes
+SPEECH_SAMPLE_RATE = 16000
+SPEECH_BITRATE_KBPS = 32
+# Bytes per second of the 16-bit PCM WAV written when ffmpeg is not installed
+PCM_BYTES_PER_SECOND = SPEECH_SAMPLE_RATE * 2
+
+PCM_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which('ffmpeg') is not None
+
+
+def can_transcode(file_name: str) -> bool:
+    """ffmpeg handles both formats; without it only PCM WAV can be downsampled"""
+    return ffmpeg_available() or file_name.lower().endswith('.wav')
+
+
+def estimate_duration(file: BinaryIO) -> Optional[float]:
+    """Estimate the length of an uploaded recording in seconds without decoding it"""
+    position = file.tell()
+    try:
+        file.seek(0)
+        if file.name.lower().endswith('.wav'):
+            with wave.open(file) as source:
+                return source.getnframes() / source.getframerate()
+
+        # Assume a constant bitrate and read it from the first frame
+        size = _file_size(file)
+        frames = parse_mp3_frames(file.read(64 * 1024))
+        if not frames:
+            return None
+        _, length, duration = frames[0]
+        return size / length * duration
+    except (wave.Error, EOFError):
+        return None
+    finally:
+        file.seek(position)
+
+
+def estimate_transcoded_size(file: BinaryIO) -> Optional[int]:
+    """Expected upload size after transcoding, or None if the duration is unknown"""
+    duration = estimate_duration(file)
+    if duration is None:
+        return None
+    bytes_per_second = SPEECH_BITRATE_KBPS * 1000 / 8 if ffmpeg_available() else PCM_BYTES_PER_SECOND
+    return int(duration * bytes_per_second)
+
+
+class TranscodedAudio:
+    """Read-only file object yielding the speech-optimised encoding of an audio file.
+
+    Audio is encoded while it is read, one chunk at a time, so neither the source
+    nor the encoded output is held in memory as a whole. With ffmpeg the output
+    is mono 16 kHz MP3 and its size is only known at the end (size is None);
+    otherwise PCM WAV is downsampled to mono 16 kHz 16-bit WAV of known size.
+    Progress is reported against the bytes consumed from the source file.
+    """
+
+    def __init__(self, file: BinaryIO, chunk_size: int = CHUNK_SIZE,
+                 progress_callback: Optional[ProgressCallback] = None):
+        self.source = file
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.original_bytes = _file_size(file)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+        stem = file.name.rpartition('.')[0] or file.name
+        if ffmpeg_available():
+            self.name, self.type = f"{stem}.mp3", 'audio/mpeg'
+            self.size = None
+            self._chunks = self._encode_ffmpeg()
+        else:
+            self.name, self.type = f"{stem}.wav", 'audio/wav'
+            self._chunks = self._downsample_wav()
+        self._buffer = b''
+        self._offset = 0
+
+    def _consumed(self, size: int) -> None:
+        self.bytes_in += size
+        if self.progress_callback:
+            self.progress_callback(self.bytes_in, self.original_bytes)
+
+    def _encode_ffmpeg(self):
+        process = subprocess.Popen(
+            [shutil.which('ffmpeg'), '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0',
+             '-vn', '-ac', '1', '-ar', str(SPEECH_SAMPLE_RATE), '-b:a', f'{SPEECH_BITRATE_KBPS}k',
+             '-f', 'mp3', 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+        # Feed the encoder from a thread so reading its output never deadlocks on a full pipe
+        def feed():
+            try:
+                while True:
+                    chunk = self.source.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    process.stdin.write(chunk)
+                    self.bytes_in += len(chunk)
+            except BrokenPipeError:
+                pass
+            finally:
+                process.stdin.close()
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        try:
+            while True:
+                chunk = process.stdout.read(self.chunk_size)
+                if self.progress_callback:
+                    self.progress_callback(self.bytes_in, self.original_bytes)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            feeder.join()
+            error = process.stderr.read().decode('utf-8', errors='replace').strip()
+            if process.wait() != 0:
+                raise IOError(f"ffmpeg could not transcode the audio: {error[-300:]}")
+
+    def _downsample_wav(self):
+        """Set up block-wise WAV downsampling and return its chunk generator"""
+        source = wave.open(self.source)
+        channels, sample_width, rate = source.getnchannels(), source.getsampwidth(), source.getframerate()
+        if sample_width not in PCM_DTYPES:
+            raise ValueError(f"Cannot downsample {sample_width * 8}-bit WAV without ffmpeg")
+
+        # Each output sample averages the input samples it covers, which also filters aliasing
+        step = rate / SPEECH_SAMPLE_RATE if rate > SPEECH_SAMPLE_RATE else 1.0
+        output_frames = int(source.getnframes() / step)
+        data_bytes = output_frames * 2
+        self.size = 44 + data_bytes
+        header = b'RIFF' + struct.pack('<I', 36 + data_bytes) + b'WAVE' + \
+            b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, round(rate / step), round(rate / step) * 2, 2, 16) + \
+            b'data' + struct.pack('<I', data_bytes)
+        frames_per_block = max(1, self.chunk_size // (channels * sample_width))
+
+        def blocks():
+            yield header
+            start = 0           # index of the first input frame in the current block
+            total = 0           # running sum of all input frames before start
+            next_output = 0
+            previous_end, previous_total = 0, 0
+            while next_output < output_frames:
+                raw = source.readframes(frames_per_block)
+                if not raw:
+                    break
+                self._consumed(len(raw))
+                samples = np.frombuffer(raw, dtype=PCM_DTYPES[sample_width]).astype(np.int64)
+                if sample_width == 1:
+                    samples = (samples - 128) << 8
+                elif sample_width == 4:
+                    samples >>= 16
+                mono = samples.reshape(-1, channels).sum(axis=1)
+                count = len(mono)
+
+                # Prefix sums let every output average be computed from two lookups
+                prefix = total + np.concatenate(([0], np.cumsum(mono)))
+                last = min(int((start + count) / step), output_frames)
+                ends = (np.arange(next_output, last) + 1) * step
+                ends = np.minimum(ends.astype(np.int64), start + count)
+                if len(ends):
+                    end_totals = prefix[ends - start]
+                    starts = np.concatenate(([previous_end], ends[:-1]))
+                    start_totals = np.concatenate(([previous_total], end_totals[:-1]))
+                    averages = (end_totals - start_totals) / (np.maximum(ends - starts, 1) * channels)
+                    output = np.clip(np.round(averages), -32768, 32767).astype('<i2').tobytes()
+                    previous_end, previous_total = int(ends[-1]), int(end_totals[-1])
+                    next_output = last
+                    if next_output == output_frames:
+                        # Readers stop at the known size, so wrap up before the last block.
+                        # The source header is not counted per block; finish progress at 100%
+                        source.close()
+                        self._consumed(self.original_bytes - self.bytes_in)
+                    yield output
+
+                start += count
+                total = int(prefix[-1])
+            if next_output < output_frames:
+                source.close()
+                raise IOError("WAV file ended before its reported length")
+
+        return blocks()
+
+    def tell(self) -> int:
+        return self.bytes_out
+
+    def read(self, size: int = -1) -> bytes:
+        """Return up to size bytes of encoded audio; reads stop at chunk boundaries"""
+        if size is None or size < 0:
+            data = self._buffer[self._offset:] + b''.join(self._chunks)
+            self._buffer, self._offset = b'', 0
+        else:
+            if self._offset >= len(self._buffer):
+                self._buffer, self._offset = next(self._chunks, b''), 0
+            data = self._buffer[self._offset:self._offset + size]
+            self._offset += len(data)
+        self.bytes_out += len(data)
+        return data
+
+
+def transcode_audio(file: BinaryIO, progress_callback: Optional[ProgressCallback] = None) -> TranscodedAudio:
+    """Wrap an uploaded .mp3 or .wav in a streaming mono 16 kHz encoder"""
+    file.seek(0)
+    return TranscodedAudio(file, progress_callback=progress_callback)
+
+
+def transcode_bytes(data: bytes, file_name: str,
+                    progress_callback: Optional[ProgressCallback] = None) -> TranscodedAudio:
+    """Transcode an in-memory audio segment, such as one produced by audio_chunking"""
+    source = io.BytesIO(data)
+    source.name = file_name
+    return TranscodedAudio(source, progress_callback=progress_callback)
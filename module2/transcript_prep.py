@@ -0,0 +1,176 @@
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rough size of an OpenAI token in English text; close enough to budget prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+# Transcripts above this are split for map-reduce analysis; each chunk stays under it
+CHUNK_TOKENS = 3000
+# Text repeated at the start of each chunk, so a point made across a boundary is seen whole
+OVERLAP_TOKENS = 200
+# Repeats of shorter lines ("Yes.", "Thanks") are kept unless they follow each other
+DEDUPE_MIN_CHARS = 40
+
+# Hesitations that carry no meaning for the analysis, with the commas around them
+FILLER = re.compile(r"(?:,\s*)?(?<![\w'])(?:u+m+|u+h+|uhm|erm|hmm+|mm+)(?![\w']),?", re.IGNORECASE)
+# Verbal tics, only when set off like an aside ("It's, you know, late"); "Do you know when" is kept
+PARENTHETICAL = re.compile(r"(?:,\s*|^\s*|(?<=[.!?,])\s+)(?:you know|i mean)(?=\s*(?:[,.!?]|$)),?", re.IGNORECASE)
+# "[00:12:03]", "(12:03)" or "12:03 -" at the start of a line
+TIMESTAMP = re.compile(r"^\s*[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?[\])]?\s*-?\s*")
+# "Sarah:" or "Speaker 2:" at the start of a line
+SPEAKER = re.compile(r"^([A-Z][\w.'-]*(?: [\w.'-]+){0,3}):\s*(.*)$")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class TranscriptChunk:
+    """A slice of the cleaned transcript, sized for one LLM call"""
+    index: int
+    text: str
+    start_char: int
+    end_char: int
+    tokens: int
+    overlap_tokens: int
+    speakers: List[str] = field(default_factory=list)
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _clean_utterance(line: str) -> str:
+    line = FILLER.sub('', line)
+    line = PARENTHETICAL.sub('', line)
+    line = re.sub(r'\s+', ' ', line)
+    line = re.sub(r'\s+([,.!?;:])', r'\1', line)
+    # Punctuation left behind by a removed filler ("Um. So" -> ". So")
+    line = re.sub(r'([.!?])[.,]+', r'\1', line)
+    return re.sub(r'^[\s,.!?]+', '', line).rstrip()
+
+
+def normalize_transcript(text: str) -> str:
+    """Clean a transcript for analysis without changing what was said.
+
+    Strips timestamps and filler words, drops repeated lines (transcription
+    loops and pasted duplicates) and merges consecutive lines by the same
+    speaker into one turn.
+    """
+    text = unicodedata.normalize('NFKC', text).replace('\r\n', '\n').replace('\r', '\n')
+    turns: List[Tuple[Optional[str], str]] = []
+    seen = set()
+    previous = None
+    for raw_line in text.split('\n'):
+        line = TIMESTAMP.sub('', raw_line).strip()
+        match = SPEAKER.match(line)
+        speaker, utterance = (match.group(1), match.group(2)) if match else (None, line)
+        utterance = _clean_utterance(utterance)
+        if not utterance:
+            continue
+
+        key = (speaker, utterance.lower())
+        if key == previous or (len(utterance) >= DEDUPE_MIN_CHARS and key in seen):
+            continue
+        previous = key
+        seen.add(key)
+
+        if speaker is not None and turns and turns[-1][0] == speaker:
+            turns[-1] = (speaker, f"{turns[-1][1]} {utterance}")
+        else:
+            turns.append((speaker, utterance))
+    return '\n'.join(f"{speaker}: {utterance}" if speaker else utterance for speaker, utterance in turns)
+
+
+def _units(text: str, max_tokens: int) -> List[Tuple[int, int]]:
+    """(start, end) spans of turns, falling back to sentences and then words for turns over max_tokens"""
+    units = []
+    for match in re.finditer(r'[^\n]+', text):
+        spans = [match.span()]
+        if estimate_tokens(match.group()) > max_tokens:
+            spans = _split_span(text, match.start(), match.end(), SENTENCE_END, max_tokens)
+        units.extend(spans)
+    return units
+
+
+def _split_span(text: str, start: int, end: int, separator: 're.Pattern', max_tokens: int) -> List[Tuple[int, int]]:
+    spans = []
+    position = start
+    for match in separator.finditer(text, start, end):
+        spans.append((position, match.start()))
+        position = match.end()
+    spans.append((position, end))
+    if separator is SENTENCE_END:
+        words = re.compile(r'\s+')
+        spans = [piece for span in spans for piece in
+                 (_split_span(text, *span, words, max_tokens) if estimate_tokens(text[span[0]:span[1]]) > max_tokens
+                  else [span])]
+    else:
+        # Regroup single words into pieces of up to max_tokens
+        grouped = []
+        for span in spans:
+            if grouped and estimate_tokens(text[grouped[-1][0]:span[1]]) <= max_tokens:
+                grouped[-1] = (grouped[-1][0], span[1])
+            else:
+                grouped.append(span)
+        spans = grouped
+    return spans
+
+
+def chunk_transcript(text: str, max_tokens: int = CHUNK_TOKENS,
+                     overlap_tokens: int = OVERLAP_TOKENS) -> List[TranscriptChunk]:
+    """Split text into chunks of up to max_tokens on turn (or sentence) boundaries.
+
+    Each chunk after the first starts with up to overlap_tokens of whole turns
+    from the end of the previous one.
+    """
+    units = _units(text, max_tokens)
+    unit_tokens = [estimate_tokens(text[start:end]) + 1 for start, end in units]
+    chunks: List[TranscriptChunk] = []
+    first, overlap = 0, 0
+    while first < len(units):
+        last, tokens = first, unit_tokens[first]
+        while last + 1 < len(units) and tokens + unit_tokens[last + 1] <= max_tokens:
+            last += 1
+            tokens += unit_tokens[last]
+        start_char, end_char = units[first][0], units[last][1]
+        chunk_text = text[start_char:end_char]
+        speakers = list(dict.fromkeys(match.group(1) for line in chunk_text.split('\n')
+                                      for match in [SPEAKER.match(line)] if match))
+        chunks.append(TranscriptChunk(len(chunks), chunk_text, start_char, end_char,
+                                      estimate_tokens(chunk_text), overlap, speakers))
+        if last + 1 >= len(units):
+            break
+
+        # Step back over whole units for the overlap, always moving forward by at least one
+        next_first, overlap = last + 1, 0
+        while next_first - 1 > first and overlap + unit_tokens[next_first - 1] <= overlap_tokens:
+            next_first -= 1
+            overlap += unit_tokens[next_first]
+        first = next_first
+    return chunks
+
+
+def prepare_transcript(text: str, max_tokens: int = CHUNK_TOKENS,
+                       overlap_tokens: int = OVERLAP_TOKENS) -> Dict[str, Any]:
+    """Clean a transcript and add token estimates and map-reduce chunks, ready for an N8N payload.
+
+    Chunks are character ranges of the transcript, not copies of it, so the payload
+    carries the text once; the workflow slices each chunk out with startChar/endChar.
+    """
+    transcript = normalize_transcript(text)
+    chunks = chunk_transcript(transcript, max_tokens, overlap_tokens)
+    return {
+        'transcript': transcript,
+        'originalTokens': estimate_tokens(text),
+        'transcriptTokens': estimate_tokens(transcript),
+        'chunkCount': len(chunks),
+        'chunks': [{
+            'chunkIndex': chunk.index,
+            'chunkCount': len(chunks),
+            'startChar': chunk.start_char,
+            'endChar': chunk.end_char,
+            'tokens': chunk.tokens,
+            'overlapTokens': chunk.overlap_tokens,
+            'speakers': chunk.speakers
+        } for chunk in chunks]
+    }
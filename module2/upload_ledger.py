@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from upload_stream import CHUNK_SIZE
+
+# Local record of finished uploads, kept next to the uploaders
+DEFAULT_LEDGER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'upload_history.db')
+# Attempts per request when the connection drops, with exponential backoff between them
+UPLOAD_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 2
+
+
+def content_key(content, *options: str) -> str:
+    """SHA-256 of an upload plus the options that change how n8n processes it.
+
+    content may be text, bytes or a file object; files are hashed in chunks
+    and rewound afterwards.
+    """
+    digest = hashlib.sha256()
+    if isinstance(content, str):
+        digest.update(content.encode('utf-8'))
+    elif isinstance(content, bytes):
+        digest.update(content)
+    else:
+        content.seek(0)
+        for chunk in iter(lambda: content.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+        content.seek(0)
+    for option in options:
+        digest.update(b'\0' + str(option).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def with_retries(send: Callable[[], Dict[str, Any]], attempts: int = UPLOAD_ATTEMPTS) -> Dict[str, Any]:
+    """Call send until it succeeds or fails for a reason other than a dropped connection.
+
+    send must build a fresh request body on every call, since a streamed body
+    cannot be replayed.
+    """
+    for attempt in range(attempts):
+        result = send()
+        if result.get("success") or not result.get("retryable") or attempt == attempts - 1:
+            return result
+        time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+
+class UploadLedger:
+    """SQLite record of completed uploads and of acknowledged parts of unfinished ones.
+
+    Completed results are keyed by content hash, so sending the same meeting
+    again returns the stored n8n response without re-uploading. Parts (audio
+    segments) are recorded as soon as n8n acknowledges them, so a retry after
+    a dropped connection only sends the parts that are still missing.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_LEDGER_PATH):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS completed_uploads (
+                    key TEXT PRIMARY KEY,
+                    file_name TEXT,
+                    completed_at REAL,
+                    result TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS acknowledged_parts (
+                    key TEXT,
+                    part_count INTEGER,
+                    part_index INTEGER,
+                    result TEXT,
+                    PRIMARY KEY (key, part_count, part_index)
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Segment uploads finish on worker threads, so connections are opened per call
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def completed(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result of a finished upload, marked as cached, if there is one"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT completed_at, result FROM completed_uploads WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[1])
+        result["cached"] = True
+        result["processed_at"] = datetime.fromtimestamp(row[0]).isoformat(timespec='seconds')
+        return result
+
+    def record_completed(self, key: str, file_name: str, result: Dict[str, Any]) -> None:
+        """Store a successful result and drop the parts it was assembled from"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO completed_uploads VALUES (?, ?, ?, ?)",
+                         (key, file_name, time.time(), json.dumps(result, default=str)))
+            conn.execute("DELETE FROM acknowledged_parts WHERE key = ?", (key,))
+
+    def acknowledged_parts(self, key: str, part_count: int) -> Dict[int, Dict[str, Any]]:
+        """Results of the parts n8n already acknowledged for this upload, by part index"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT part_index, result FROM acknowledged_parts WHERE key = ? AND part_count = ?",
+                (key, part_count)
+            ).fetchall()
+        return {index: json.loads(result) for index, result in rows}
+
+    def record_part(self, key: str, part_count: int, part_index: int, result: Dict[str, Any]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO acknowledged_parts VALUES (?, ?, ?, ?)",
+                         (key, part_count, part_index, json.dumps(result, default=str)))
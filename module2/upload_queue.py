@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from upload_stream import ProgressCallback
+
+# Files processed at the same time by a bulk upload
+QUEUE_WORKERS = 3
+# Keep-alive connections per host; enough for every queue worker and segment upload at once
+POOL_SIZE = 16
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """Process-wide keep-alive session, so repeated requests to n8n reuse their TCP/TLS connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+@dataclass
+class UploadJob:
+    """State of one file in a bulk upload; written by a worker thread, read by the UI"""
+    file_name: str
+    size: int
+    status: str = 'Queued'
+    bytes_sent: int = 0
+    total_bytes: int = 0
+    queued_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+
+    @property
+    def progress(self) -> float:
+        if self.finished_at is not None:
+            return 1.0
+        return self.bytes_sent / self.total_bytes if self.total_bytes else 0.0
+
+    @property
+    def seconds(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    def update_progress(self, bytes_sent: int, total_bytes: int) -> None:
+        self.bytes_sent, self.total_bytes = bytes_sent, total_bytes
+        if total_bytes and bytes_sent >= total_bytes:
+            self.status = 'Processing'
+
+
+class UploadQueue:
+    """Runs uploads on a bounded pool of background threads.
+
+    Submitting returns immediately; the Streamlit script only reads job state,
+    so reruns are never blocked while n8n is working.
+    """
+
+    def __init__(self, max_workers: int = QUEUE_WORKERS):
+        self.max_workers = max_workers
+        self.jobs: List[UploadJob] = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='n8n-upload')
+
+    def submit(self, file_name: str, size: int,
+               task: Callable[[ProgressCallback], Dict[str, Any]]) -> UploadJob:
+        """Queue task(progress_callback), which must return an uploader result dict"""
+        job = UploadJob(file_name, size, queued_at=time.time())
+        self.jobs.append(job)
+        self._executor.submit(self._run, job, task)
+        return job
+
+    def add_failed(self, file_name: str, size: int, error: str) -> UploadJob:
+        """Record a file rejected before it was queued, so it still shows in the results"""
+        now = time.time()
+        job = UploadJob(file_name, size, status='Failed', queued_at=now, started_at=now, finished_at=now,
+                        result={"success": False, "error": error})
+        self.jobs.append(job)
+        return job
+
+    def _run(self, job: UploadJob, task: Callable[[ProgressCallback], Dict[str, Any]]) -> None:
+        job.status = 'Uploading'
+        job.started_at = time.time()
+        try:
+            result = task(job.update_progress)
+        except Exception as e:
+            result = {"success": False, "error": f"Unexpected error: {str(e)}"}
+        job.result = result
+        if not result.get("success"):
+            job.status = 'Failed'
+        else:
+            job.status = 'Cached' if result.get("cached") else 'Done'
+        # Set last: the UI treats a job with finished_at as complete
+        job.finished_at = time.time()
+
+    @property
+    def pending(self) -> bool:
+        return any(job.finished_at is None for job in self.jobs)
+
+    def clear_finished(self) -> None:
+        self.jobs = [job for job in self.jobs if job.finished_at is None]
+
+    def status_rows(self) -> List[Dict[str, Any]]:
+        return [{
+            'File': job.file_name,
+            'Size (MB)': round(job.size / (1024 * 1024), 2),
+            'Status': job.status,
+            'Progress': job.progress,
+            'Seconds': None if job.seconds is None else round(job.seconds, 1),
+            'Error': (job.result or {}).get('error', '')
+        } for job in self.jobs]
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts per status and wall time from the first queued file to the last finished one"""
+        finished = [job for job in self.jobs if job.finished_at is not None]
+        counts = {status: sum(job.status == status for job in self.jobs)
+                  for status in ('Done', 'Cached', 'Failed')}
+        wall = (max(job.finished_at for job in finished) - min(job.queued_at for job in self.jobs)) if finished else 0.0
+        return {**counts, 'files': len(self.jobs), 'wall_seconds': wall,
+                'sequential_seconds': sum(job.seconds or 0 for job in finished)}
@@ -0,0 +1,143 @@
+import os
+import uuid
+from typing import BinaryIO, Callable, Dict, Iterator, Optional
+
+# Bytes read from the uploaded file per chunk
+CHUNK_SIZE = 256 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _file_size(file: BinaryIO) -> Optional[int]:
+    """Return the number of bytes left to read from a file object, or None if it is not known yet"""
+    if hasattr(file, 'size'):
+        return None if file.size is None else file.size - file.tell()
+    position = file.tell()
+    end = file.seek(0, os.SEEK_END)
+    file.seek(position)
+    return end - position
+
+
+class MultipartStream:
+    """Streaming multipart/form-data body for requests.
+
+    Form fields and part headers are small and built up front; the file itself is
+    read in fixed-size chunks while the body is being sent, so it is never copied
+    into a second in-memory buffer. Content-Length is known in advance, so the
+    upload is not sent with chunked transfer encoding, unless the file reports
+    size None (e.g. encoder output); then total_bytes is None and the body must
+    be sent by iterating over it.
+    """
+
+    def __init__(self, fields: Dict[str, str], file_field: str, file_name: str, file: BinaryIO,
+                 file_type: Optional[str] = None, chunk_size: int = CHUNK_SIZE,
+                 progress_callback: Optional[ProgressCallback] = None):
+        self.boundary = uuid.uuid4().hex
+        self.file = file
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+
+        head = b''.join(self._field_part(name, value) for name, value in fields.items())
+        head += (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{_quote(file_name)}"\r\n'
+            f'Content-Type: {file_type or "application/octet-stream"}\r\n\r\n'
+        ).encode('utf-8')
+        self._head = head
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self._file_size = _file_size(file)
+        self.total_bytes = None if self._file_size is None else len(self._head) + self._file_size + len(self._tail)
+        self.bytes_sent = 0
+        self._chunks = self._generate()
+        self._buffer = b''
+        self._offset = 0
+
+    def _field_part(self, name: str, value: str) -> bytes:
+        return (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+            f'{value}\r\n'
+        ).encode('utf-8')
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def _generate(self) -> Iterator[bytes]:
+        yield self._head
+        remaining = self._file_size
+        while remaining is None or remaining > 0:
+            chunk = self.file.read(self.chunk_size if remaining is None else min(self.chunk_size, remaining))
+            if not chunk:
+                if remaining is None:
+                    break
+                raise IOError("Uploaded file ended before its reported size")
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+        yield self._tail
+
+    def _report(self, size: int) -> None:
+        self.bytes_sent += size
+        if self.progress_callback and self.total_bytes:
+            self.progress_callback(self.bytes_sent, self.total_bytes)
+
+    def read(self, size: int = -1) -> bytes:
+        """Return up to size bytes of the body; used by urllib3 while sending.
+
+        Reads stop at chunk boundaries, which file-like consumers handle by
+        calling read again, so each byte is copied at most once here.
+        """
+        if size is None or size < 0:
+            data = self._buffer[self._offset:] + b''.join(self._chunks)
+            self._buffer, self._offset = b'', 0
+            self._report(len(data))
+            return data
+
+        if self._offset >= len(self._buffer):
+            self._buffer, self._offset = next(self._chunks, b''), 0
+        data = self._buffer[self._offset:self._offset + size]
+        self._offset += len(data)
+        self._report(len(data))
+        return data
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            data = self.read(self.chunk_size)
+            if not data:
+                return
+            yield data
+
+    def __len__(self) -> int:
+        if self.total_bytes is None:
+            raise TypeError("Body length is unknown until the file has been read")
+        return self.total_bytes
+
+    @property
+    def request_data(self):
+        """Body to hand to requests: the stream itself, or an iterator sent with chunked encoding"""
+        return self if self.total_bytes is not None else iter(self)
+
+
+def progress_bar_callback(progress_bar) -> ProgressCallback:
+    """Create a callback that shows uploaded bytes on a Streamlit progress bar"""
+    last_percent = -1
+
+    def update(bytes_sent: int, total_bytes: int):
+        nonlocal last_percent
+        percent = int(bytes_sent * 100 / total_bytes) if total_bytes else 100
+        # Only redraw when the percentage changes; the callback fires once per chunk
+        if percent != last_percent:
+            last_percent = percent
+            if percent >= 100:
+                text = "Upload complete - waiting for N8N response..."
+            else:
+                text = f"Uploading... {bytes_sent / (1024 * 1024):.1f} of {total_bytes / (1024 * 1024):.1f} MB"
+            progress_bar.progress(percent, text=text)
+
+    return update
+
+
+def _quote(value: str) -> str:
+    """Escape a value for a Content-Disposition parameter"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\r', '').replace('\n', '')
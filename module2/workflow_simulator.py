@@ -0,0 +1,574 @@
+"""
+Local stand-in for the n8n meeting workflow, for benchmarking without n8n, OpenAI or Google Sheets.
+
+Reads the workflow export, runs its Code nodes with node.js and its If/Merge nodes in Python,
+and replaces the OpenAI and Google Sheets nodes with stubs that sleep for a configurable time.
+Serves the same webhook URLs as n8n:
+
+    python workflow_simulator.py --ai-latency 2 --sheets-latency 0.4
+    # then point the uploaders or Module1/app.py at
+    # http://localhost:5678/webhook/meeting-intelligence-webhook
+"""
+import argparse
+import base64
+import email.parser
+import json
+import queue
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+from meeting_classifier import DEFAULT_WORKFLOW_PATH
+from progress_events import HEARTBEAT_SECONDS, EventCallback, format_event
+
+DEFAULT_PORT = 5678
+WEBHOOK_PREFIXES = ('/webhook/', '/webhook-test/', '/form/')
+
+Item = Dict[str, Any]
+
+# Sheets whose rows are streamed to the caller as partial results, and the event they are sent as
+RESULT_SHEETS = {'Action Items': 'action_item', 'Executive Summary': 'summary'}
+
+# Evaluates Code nodes and {{ }} expressions, one JSON request per line
+JS_RUNNER = r"""
+const readline = require('readline');
+const quiet = { log() {}, info() {}, warn() {}, error() {}, debug() {} };
+readline.createInterface({ input: process.stdin }).on('line', line => {
+  const request = JSON.parse(line);
+  const items = request.items;
+  const $input = { all: () => items, first: () => items[0], last: () => items[items.length - 1], item: items[0] };
+  const $json = items.length ? items[0].json : {};
+  const $binary = items.length ? (items[0].binary || {}) : {};
+  let reply;
+  try {
+    if (request.expressions) {
+      reply = { result: request.expressions.map(expression =>
+        new Function('$input', '$json', '$binary', `return (${expression});`)($input, $json, $binary)) };
+    } else {
+      reply = { result: new Function('$input', '$json', '$binary', 'console', request.code)($input, $json, $binary, quiet) };
+    }
+  } catch (error) {
+    reply = { error: String(error && error.message || error) };
+  }
+  process.stdout.write(JSON.stringify(reply === undefined ? null : reply) + '\n');
+});
+"""
+
+# Sections the "Parse AI Analysis" node looks for
+DEFAULT_AI_RESPONSE = """**4. MEETING SUMMARY:**
+Simulated analysis of a {words}-word {meeting_type} meeting.
+
+**5. KEY DECISIONS:**
+- Continue with the current plan | Made by: Team | Impact: Medium
+
+**6. ACTION ITEMS:**
+- Follow up on the open questions | Owner: Not specified | Due: Not specified | Priority: Medium
+- Share the meeting notes | Owner: Not specified | Due: Not specified | Priority: Low
+"""
+
+
+class WorkflowError(Exception):
+    """A node failed, as an n8n execution error would"""
+
+
+@dataclass
+class StubLatency:
+    """Seconds the stubbed external nodes take; jitter is a +/- fraction applied at random"""
+    transcribe: float = 5.0
+    ai: float = 2.0
+    sheets: float = 0.4
+    jitter: float = 0.2
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds * (1 + random.uniform(-self.jitter, self.jitter)))
+
+
+@dataclass
+class NodeTiming:
+    node: str
+    node_type: str
+    items_in: int
+    items_out: int
+    seconds: float
+
+
+@dataclass
+class WorkflowRun:
+    """Outcome of one execution: what the webhook caller receives plus per-node timings"""
+    status_code: int = 500
+    response: Any = None
+    timings: List[NodeTiming] = field(default_factory=list)
+    seconds: float = 0.0
+    error: Optional[str] = None
+    # Receives stage changes and partial results while the run is in progress
+    on_event: Optional[EventCallback] = field(default=None, repr=False)
+
+    def emit(self, event: str, data: Any) -> None:
+        if self.on_event:
+            self.on_event(event, data)
+
+
+class JavaScriptRunner:
+    """A long-running node.js process that executes Code node bodies and expressions.
+
+    Requests are serialised, like code in the single n8n main process.
+    """
+
+    def __init__(self):
+        if shutil.which('node') is None:
+            raise RuntimeError("node.js is needed to run the workflow's Code nodes")
+        self._process = subprocess.Popen([shutil.which('node'), '-e', JS_RUNNER], stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, text=True, encoding='utf-8')
+        self._lock = threading.Lock()
+        # Pay for the node.js start-up here rather than in the first execution's timings
+        self.evaluate(['true'], {'json': {}})
+
+    def _call(self, request: Dict[str, Any]) -> Any:
+        with self._lock:
+            self._process.stdin.write(json.dumps(request) + '\n')
+            self._process.stdin.flush()
+            reply = json.loads(self._process.stdout.readline())
+        if reply.get('error'):
+            raise WorkflowError(reply['error'])
+        return reply.get('result')
+
+    def run_code(self, code: str, items: List[Item]) -> Any:
+        return self._call({'code': code, 'items': items})
+
+    def evaluate(self, expressions: List[str], item: Item) -> List[Any]:
+        return self._call({'expressions': expressions, 'items': [item]})
+
+    def close(self) -> None:
+        self._process.stdin.close()
+        self._process.wait()
+
+
+def node_stage(node: Dict[str, Any]) -> Optional[str]:
+    """The progress stage a node belongs to, or None for nodes that only move data along"""
+    node_type = node['type']
+    if node_type.endswith('.openAi'):
+        return 'transcribing' if node['parameters'].get('resource') == 'audio' else 'analysing'
+    if node_type == 'n8n-nodes-base.googleSheets':
+        return 'saving'
+    if 'Classifier' in node['name']:
+        return 'classifying'
+    return None
+
+
+def _normalise_items(result: Any) -> List[Item]:
+    """Code nodes may return items, plain objects or a single object; n8n wraps the latter in {json}"""
+    if result is None:
+        return []
+    if not isinstance(result, list):
+        result = [result]
+    return [entry if isinstance(entry, dict) and isinstance(entry.get('json'), dict) else {'json': entry}
+            for entry in result]
+
+
+class WorkflowSimulator:
+    """Executes a workflow export's routing graph with stubbed external nodes"""
+
+    def __init__(self, workflow_path: str = DEFAULT_WORKFLOW_PATH, latency: Optional[StubLatency] = None,
+                 ai_response: Optional[Callable[[str, str], str]] = None, transcript: str = '',
+                 sheet_writer_url: Optional[str] = None):
+        with open(workflow_path, encoding='utf-8') as f:
+            workflow = json.load(f)
+        self.nodes = {node['name']: node for node in workflow['nodes']}
+        self.connections = workflow.get('connections', {})
+        self.latency = latency or StubLatency()
+        self.ai_response = ai_response or (lambda prompt, meeting_type: DEFAULT_AI_RESPONSE.format(
+            words=len(prompt.split()), meeting_type=meeting_type))
+        self.transcript = transcript or "Simulated transcript: the team reviewed progress and agreed next steps."
+        self.trigger = next(name for name, node in self.nodes.items()
+                            if node['type'].endswith(('Trigger', '.webhook')))
+        # Number of connected inputs per node, so Merge nodes know what to wait for
+        self.input_counts: Dict[str, int] = defaultdict(int)
+        for outputs in self.connections.values():
+            for connections in outputs.get('main', []):
+                for connection in connections or []:
+                    self.input_counts[connection['node']] = max(self.input_counts[connection['node']],
+                                                                connection['index'] + 1)
+        self.sheets: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._sheets_lock = threading.Lock()
+        # With a sheet_writer.py service, Sheets nodes hand their rows to it instead of sleeping
+        self.sheet_writer_url = sheet_writer_url.rstrip('/') if sheet_writer_url else None
+        self._session = requests.Session()
+        self.js = JavaScriptRunner()
+
+    def _expression(self, value: Any, item: Item) -> Any:
+        """Resolve an n8n parameter: "={{ expr }}" is evaluated, "=text {{ expr }}" is interpolated"""
+        if not isinstance(value, str) or not value.startswith('='):
+            return value
+        template = value[1:]
+        parts = re.findall(r'\{\{(.*?)\}\}', template, re.S)
+        results = self.js.evaluate(parts, item) if parts else []
+        if len(parts) == 1 and template.strip() == '{{' + parts[0] + '}}':
+            return results[0]
+        results = iter(results)
+        return re.sub(r'\{\{.*?\}\}', lambda _: '' if (result := next(results)) is None else str(result),
+                      template, flags=re.S)
+
+    def _condition(self, kind: str, condition: Dict[str, Any], item: Item) -> bool:
+        value1 = self._expression(condition.get('value1'), item)
+        value2 = self._expression(condition.get('value2'), item)
+        operation = condition.get('operation', 'equal')
+        if kind == 'string':
+            text, other = '' if value1 is None else str(value1), '' if value2 is None else str(value2)
+            return {
+                'equal': lambda: text == other,
+                'notEqual': lambda: text != other,
+                'contains': lambda: other in text,
+                'notContains': lambda: other not in text,
+                'startsWith': lambda: text.startswith(other),
+                'endsWith': lambda: text.endswith(other),
+                'isEmpty': lambda: text == '',
+                'isNotEmpty': lambda: text != '',
+                'regex': lambda: re.search(other, text) is not None
+            }[operation]()
+        if kind == 'number':
+            number, other = float(value1 or 0), float(value2 or 0)
+            return {'equal': number == other, 'notEqual': number != other, 'smaller': number < other,
+                    'smallerEqual': number <= other, 'larger': number > other,
+                    'largerEqual': number >= other}[operation]
+        return (value1 == value2) if operation == 'equal' else (value1 != value2)
+
+    def _run_if(self, node: Dict[str, Any], items: List[Item]) -> List[List[Item]]:
+        conditions = node['parameters'].get('conditions', {})
+        combine = all if node['parameters'].get('combineOperation', 'all') == 'all' else any
+        true_items, false_items = [], []
+        for item in items:
+            checks = (self._condition(kind, condition, item)
+                      for kind, entries in conditions.items() for condition in entries)
+            (true_items if combine(checks) else false_items).append(item)
+        return [true_items, false_items]
+
+    def _run_merge(self, node: Dict[str, Any], inputs: Dict[int, List[Item]]) -> List[Item]:
+        parameters = node['parameters']
+        available = [inputs[index] for index in sorted(inputs)]
+        if parameters.get('mode') == 'combine' and parameters.get('combinationMode') == 'mergeByPosition' \
+                and len(available) > 1:
+            first, second = available[0], available[1]
+            return [{'json': {**a['json'], **b['json']}, 'binary': {**a.get('binary', {}), **b.get('binary', {})}}
+                    for a, b in zip(first, second)]
+        # Append, and what a Merge passes on when only one branch produced data
+        return [item for items in available for item in items]
+
+    def _run_openai(self, node: Dict[str, Any], items: List[Item]) -> List[Item]:
+        if node['parameters'].get('resource') == 'audio':
+            self.latency.sleep(self.latency.transcribe)
+            return [{'json': {'text': self.transcript}} for _ in items]
+        output = []
+        for item in items:
+            self.latency.sleep(self.latency.ai)
+            messages = node['parameters'].get('messages', {}).get('values', [])
+            prompt = '\n'.join(str(self._expression(message.get('content', ''), item)) for message in messages)
+            meeting_type = (item['json'].get('_original') or item['json']).get('meetingType', 'general')
+            # The OpenAI node outputs only the completion, not its input
+            output.append({'json': {'index': 0, 'message': {'role': 'assistant',
+                                                            'content': self.ai_response(prompt, meeting_type)},
+                                    'finish_reason': 'stop'}})
+        return output
+
+    def _run_sheets(self, node: Dict[str, Any], items: List[Item], run: WorkflowRun) -> List[Item]:
+        sheet = node['parameters'].get('sheetName', {})
+        sheet_name = sheet.get('cachedResultName') or str(sheet.get('value', node['name']))
+        rows = [{field['fieldId']: self._expression(field['fieldValue'], item)
+                 for field in node['parameters'].get('fieldsUi', {}).get('fieldValues', [])} for item in items]
+        if sheet_name in RESULT_SHEETS:
+            for row in rows:
+                run.emit(RESULT_SHEETS[sheet_name], row)
+        with self._sheets_lock:
+            self.sheets[sheet_name].extend(rows)
+        if self.sheet_writer_url:
+            response = self._session.post(f"{self.sheet_writer_url}/rows/{quote(sheet_name)}",
+                                          json={'rows': rows}, timeout=30)
+            if response.status_code != 202:
+                raise WorkflowError(f"Sheet writer answered {response.status_code}: {response.text}")
+        else:
+            self.latency.sleep(self.latency.sheets)
+        # Pass the items on so the rest of the graph sees the data it was given
+        return items
+
+    def _run_node(self, name: str, inputs: Dict[int, List[Item]], run: WorkflowRun) -> List[List[Item]]:
+        node = self.nodes[name]
+        node_type = node['type']
+        items = [item for index in sorted(inputs) for item in inputs[index]]
+        if node_type == 'n8n-nodes-base.code':
+            return [_normalise_items(self.js.run_code(node['parameters'].get('jsCode', ''), items))]
+        if node_type == 'n8n-nodes-base.if':
+            return self._run_if(node, items)
+        if node_type == 'n8n-nodes-base.merge':
+            return [self._run_merge(node, inputs)]
+        if node_type.endswith('.openAi'):
+            return [self._run_openai(node, items)]
+        if node_type == 'n8n-nodes-base.googleSheets':
+            return [self._run_sheets(node, items, run)]
+        if node_type == 'n8n-nodes-base.respondToWebhook':
+            if run.response is None and items:
+                run.status_code = node['parameters'].get('options', {}).get('responseCode', 200)
+                run.response = items[0]['json']
+            return [items]
+        # Triggers and anything else pass their items through
+        return [items]
+
+    def execute(self, items: List[Item], on_event: Optional[EventCallback] = None) -> WorkflowRun:
+        """Run the workflow depth first from the trigger, as n8n's v1 execution order does.
+
+        Merge nodes wait until every connected input has data, or until nothing
+        else is left to run, then continue with what they have. on_event gets a
+        "stage" event whenever the run moves to another stage (see node_stage)
+        and the rows saved to RESULT_SHEETS as they are written.
+        """
+        run = WorkflowRun(on_event=on_event)
+        stage = None
+        started = time.perf_counter()
+        stack: List[Tuple[str, Dict[int, List[Item]]]] = [(self.trigger, {0: items})]
+        waiting: 'OrderedDict[str, Dict[int, List[Item]]]' = OrderedDict()
+        try:
+            while stack or waiting:
+                if not stack:
+                    stack.append(waiting.popitem(last=False))
+                name, inputs = stack.pop()
+                if node_stage(self.nodes[name]) not in (None, stage):
+                    stage = node_stage(self.nodes[name])
+                    run.emit('stage', {'stage': stage, 'node': name})
+                node_started = time.perf_counter()
+                outputs = self._run_node(name, inputs, run)
+                run.timings.append(NodeTiming(name, self.nodes[name]['type'].rsplit('.', 1)[-1],
+                                              sum(len(items) for items in inputs.values()),
+                                              sum(len(items) for items in outputs),
+                                              time.perf_counter() - node_started))
+
+                children = []
+                for output_index, output in enumerate(outputs):
+                    connections = self.connections.get(name, {}).get('main', [])
+                    if not output or output_index >= len(connections):
+                        continue
+                    children.extend((connection['node'], connection['index'], output)
+                                    for connection in connections[output_index] or [])
+                # Pushed in reverse so the first connection runs first
+                for child, index, output in reversed(children):
+                    if self.nodes[child]['type'] == 'n8n-nodes-base.merge':
+                        received = waiting.setdefault(child, {})
+                        received[index] = received.get(index, []) + output
+                        if len(received) == self.input_counts[child]:
+                            stack.append((child, waiting.pop(child)))
+                    else:
+                        stack.append((child, {0: output}))
+        except WorkflowError as e:
+            run.error = f"{name}: {e}"
+            run.status_code, run.response = 500, {'message': 'Error in workflow', 'error': run.error}
+        if run.response is None:
+            run.status_code, run.response = 500, {'message': 'Workflow finished without responding'}
+        run.seconds = time.perf_counter() - started
+        return run
+
+
+class TimingStats:
+    """Per-node timings collected across executions, for load tests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, List[float]] = defaultdict(list)
+        self.executions = 0
+
+    def add(self, run: WorkflowRun) -> None:
+        with self._lock:
+            self.executions += 1
+            self._seconds['(workflow)'].append(run.seconds)
+            for timing in run.timings:
+                self._seconds[timing.node].append(timing.seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        def describe(values: List[float]) -> Dict[str, float]:
+            ordered = sorted(values)
+            return {'count': len(ordered), 'mean_ms': round(statistics.mean(ordered) * 1000, 2),
+                    'p50_ms': round(ordered[len(ordered) // 2] * 1000, 2),
+                    'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+                    'max_ms': round(ordered[-1] * 1000, 2)}
+        with self._lock:
+            return {'executions': self.executions,
+                    'nodes': {node: describe(values) for node, values in self._seconds.items()}}
+
+
+def parse_request(content_type: str, body: bytes) -> Item:
+    """Turn a webhook request into the item a form trigger produces: fields in json, files in binary"""
+    if content_type.startswith('multipart/'):
+        message = email.parser.BytesParser().parsebytes(
+            b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+        item: Item = {'json': {}, 'binary': {}}
+        for part in message.get_payload():
+            name = part.get_param('name', header='content-disposition')
+            data = part.get_payload(decode=True) or b''
+            file_name = part.get_filename()
+            if file_name is None:
+                item['json'][name] = data.decode('utf-8', errors='replace')
+            else:
+                item['binary'][name] = {'fileName': file_name, 'mimeType': part.get_content_type(),
+                                        'fileSize': len(data), 'data': base64.b64encode(data).decode('ascii')}
+        return item
+    payload = json.loads(body or b'{}')
+    return {'json': payload if isinstance(payload, dict) else {'body': payload}}
+
+
+def _timing_header(timings: List[NodeTiming]) -> str:
+    """Server-Timing header; node names are reduced to ASCII, which headers require"""
+    entries = []
+    for index, timing in enumerate(timings):
+        description = timing.node.encode('ascii', errors='ignore').decode().strip().replace('"', "'")
+        entries.append(f'n{index};desc="{description}";dur={timing.seconds * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def make_handler(simulator: WorkflowSimulator, stats: TimingStats, verbose: bool = False):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _read_body(self) -> bytes:
+            if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                body = b''
+                while True:
+                    size = int(self.rfile.readline().split(b';')[0], 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        return body
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+            return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+            data = json.dumps(payload, default=str).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._send(200, stats.summary())
+            elif self.path == '/sheets':
+                self._send(200, simulator.sheets)
+            elif self.path in ('/healthz', '/health'):
+                self._send(200, {'status': 'ok'})
+            else:
+                self._send(404, {'message': 'Not found'})
+
+        def do_POST(self):
+            body = self._read_body()
+            if not self.path.startswith(WEBHOOK_PREFIXES):
+                self._send(404, {'message': 'The requested webhook is not registered.'})
+                return
+            try:
+                item = parse_request(self.headers.get('Content-Type', ''), body)
+            except (ValueError, TypeError) as e:
+                self._send(400, {'message': f'Could not parse the request: {e}'})
+                return
+            if 'text/event-stream' in self.headers.get('Accept', ''):
+                run = self._stream(item)
+            else:
+                run = simulator.execute([item])
+                self._send(run.status_code, run.response, {'Server-Timing': _timing_header(run.timings)})
+            stats.add(run)
+            if verbose:
+                print(f"{run.status_code} in {run.seconds * 1000:.0f}ms: " +
+                      ', '.join(f"{timing.node} {timing.seconds * 1000:.0f}ms" for timing in run.timings))
+
+        def _stream(self, item: Item) -> WorkflowRun:
+            """Answer with server-sent events: stages and partial results as they happen, then the response"""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            events = queue.Queue()
+            result: List[WorkflowRun] = []
+
+            def execute() -> None:
+                try:
+                    result.append(simulator.execute([item], lambda event, data: events.put(format_event(event, data))))
+                finally:
+                    events.put(None)
+
+            worker = threading.Thread(target=execute, daemon=True)
+            worker.start()
+            try:
+                self.wfile.write(format_event('stage', {'stage': 'queued'}).encode('utf-8'))
+                started = time.monotonic()
+                while True:
+                    try:
+                        message = events.get(timeout=HEARTBEAT_SECONDS)
+                    except queue.Empty:
+                        message = format_event('waiting', {'seconds': round(time.monotonic() - started)})
+                    if message is None:
+                        break
+                    self.wfile.write(message.encode('utf-8'))
+                    self.wfile.flush()
+                run = result[0]
+                self.wfile.write((format_event('stage', {'stage': 'done'}) + format_event(
+                    'response', {'status_code': run.status_code, 'body': run.response,
+                                 'timings': _timing_header(run.timings)})).encode('utf-8'))
+            except (BrokenPipeError, ConnectionResetError):
+                # The caller went away; the execution still finishes, as it would in n8n
+                worker.join()
+            return result[0]
+
+        def log_message(self, format, *args):
+            pass
+
+    return WebhookHandler
+
+
+def serve(simulator: WorkflowSimulator, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+          verbose: bool = False) -> Tuple[ThreadingHTTPServer, TimingStats]:
+    """Start the webhook server on a background thread; returns the server and its timing stats"""
+    stats = TimingStats()
+    server = ThreadingHTTPServer((host, port), make_handler(simulator, stats, verbose))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workflow', default=DEFAULT_WORKFLOW_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--ai-latency', type=float, default=StubLatency.ai, help='seconds per AI analysis call')
+    parser.add_argument('--transcribe-latency', type=float, default=StubLatency.transcribe,
+                        help='seconds per audio transcription')
+    parser.add_argument('--sheets-latency', type=float, default=StubLatency.sheets, help='seconds per Sheets append')
+    parser.add_argument('--sheet-writer', help='URL of a sheet_writer.py service to send Sheets rows to')
+    parser.add_argument('--jitter', type=float, default=StubLatency.jitter, help='random +/- fraction of each latency')
+    parser.add_argument('--quiet', action='store_true', help='do not print per-node timings for each execution')
+    args = parser.parse_args()
+
+    latency = StubLatency(args.transcribe_latency, args.ai_latency, args.sheets_latency, args.jitter)
+    simulator = WorkflowSimulator(args.workflow, latency, sheet_writer_url=args.sheet_writer)
+    server, stats = serve(simulator, args.host, args.port, verbose=not args.quiet)
+    print(f"Simulating {args.workflow} on http://{args.host}:{args.port}/webhook/<path>")
+    print("GET /stats for per-node timings, /sheets for the rows written; Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(json.dumps(stats.summary(), indent=2))
+
+
+if __name__ == '__main__':
+    main()